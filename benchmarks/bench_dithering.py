@@ -0,0 +1,81 @@
+"""
+Measures the cost of each dithering mode per megapixel of character grid:
+intensities dithered across the 11 glyph levels, and colors dithered across
+the xterm 256-color and 16-color palettes. Grids are synthetic gradients with
+some noise, like the images of the other benchmarks. The undithered mapping
+is measured too, as the baseline every mode is compared against.
+
+Usage:
+    python benchmarks/bench_dithering.py [--sizes 80 320 1000] [--repeats 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SOURCE_DIR)
+
+from ansii import ASCII_CHARACTER_SET  # noqa: E402
+from dithering import DITHER_MODES, dither_levels  # noqa: E402
+from terminal import TerminalEncoder  # noqa: E402
+
+
+def make_grid(size: int) -> np.ndarray:
+    """
+    Builds a (size, size, 3) RGB gradient with some noise, the colors of a square character grid.
+    """
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    noise = np.random.default_rng(size).integers(0, 32, (size, size), dtype=np.uint8)
+    red = (ramp[np.newaxis, :] + noise).clip(0, 255).astype(np.uint8)
+    green = np.broadcast_to(ramp[:, np.newaxis], (size, size)).astype(np.uint8)
+    return np.dstack([red, green, 255 - red])
+
+
+def median_milliseconds(function, repeats: int) -> float:
+    """
+    Runs a function once to warm up, then repeatedly, and returns its median time in milliseconds.
+    """
+    function()
+    durations = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return float(np.median(durations)) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the cost of each dithering mode.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[80, 320, 1000],
+                        help="Side of the square character grids, in cells.")
+    parser.add_argument("--repeats", type=int, default=5, help="Measured runs per case.")
+    options = parser.parse_args()
+
+    print(f"{'target':>10} {'mode':>16} " + " ".join(f"{f'{size}x{size} ms':>14}" for size in options.sizes)
+          + f" {'ms/MP':>9}")
+    grids = {size: make_grid(size) for size in options.sizes}
+    # Same luma weights as Ansii._grayscale_pixels.
+    intensities = {size: (grid.astype(np.uint32) @ np.array([19595, 38470, 7471], dtype=np.uint32) + 0x8000) >> 16
+                   for size, grid in grids.items()}
+    targets = {
+        "glyphs": lambda size, mode: dither_levels(intensities[size], 25, len(ASCII_CHARACTER_SET), mode),
+        "256": lambda size, mode: TerminalEncoder("256", mode).quantize(grids[size]),
+        "16": lambda size, mode: TerminalEncoder("16", mode).quantize(grids[size]),
+    }
+    for target, convert in targets.items():
+        for mode in DITHER_MODES:
+            milliseconds = [median_milliseconds(lambda: convert(size, mode), options.repeats)
+                            for size in options.sizes]
+            # The cost per megapixel of the largest grid, where the per-call overhead matters least.
+            largest = options.sizes[-1]
+            per_megapixel = milliseconds[-1] / (largest * largest / 1e6)
+            print(f"{target:>10} {mode:>16} " + " ".join(f"{value:>14.2f}" for value in milliseconds)
+                  + f" {per_megapixel:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Compares the peak memory (RSS) of the regular, the memory-mapped input
+(image_input.load_image) and the streaming conversion paths for synthetic
+images of increasing size.
+
+Each measurement runs in a fresh interpreter so that peaks do not carry over.
+
+Usage:
+    python benchmarks/bench_memory.py [--sizes 1000 2000 4000] [--format ppm png] [--color]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from PIL import Image
+import numpy as np
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+# Code run in the child interpreter for each path. It prints the peak RSS in KiB.
+# On Linux VmHWM is used, because ru_maxrss also counts the parent's peak at fork
+# time; elsewhere ru_maxrss is the best available (in bytes on macOS).
+MEASURE_TEMPLATE = """
+import io, resource, sys
+sys.path.insert(0, {source_dir!r})
+from PIL import Image
+Image.MAX_IMAGE_PIXELS = None
+{conversion}
+try:
+    with open("/proc/self/status") as status:
+        peak = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak // 1024 if sys.platform == "darwin" else peak
+print(peak)
+"""
+
+CONVERSIONS = {
+    "regular": (
+        "from ansii import Ansii\n"
+        "png_image, console_output = Ansii(Image.open({path!r}), {color}).render()\n"
+    ),
+    "mapped": (
+        "from ansii import Ansii, ASCII_WIDTH\n"
+        "from image_input import load_image\n"
+        "png_image, console_output = Ansii(load_image({path!r}, ASCII_WIDTH), {color}).render()\n"
+    ),
+    "streaming": (
+        "from streaming import StreamingAnsii\n"
+        "StreamingAnsii({path!r}, {color}).write(io.StringIO(), io.BytesIO())\n"
+    ),
+}
+
+
+def make_synthetic_image(path: str, size: int):
+    """
+    Saves a square RGB gradient with some noise, which compresses like a photo rather than a flat color.
+    """
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    noise = np.random.default_rng(size).integers(0, 32, (size, size), dtype=np.uint8)
+    red = (ramp[np.newaxis, :] + noise).clip(0, 255).astype(np.uint8)
+    green = np.broadcast_to(ramp[:, np.newaxis], (size, size)).astype(np.uint8)
+    blue = 255 - red
+    Image.fromarray(np.dstack([red, green, blue]), "RGB").save(path)
+
+
+def measure_peak_rss(path: str, path_name: str, color: bool) -> int:
+    """
+    Runs one conversion in a child interpreter.
+
+    Returns:
+        int: The peak resident set size of the child, in KiB.
+    """
+    conversion = CONVERSIONS[path_name].format(path=path, color=color)
+    code = MEASURE_TEMPLATE.format(source_dir=SOURCE_DIR, conversion=conversion)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return int(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000],
+                        help="Side lengths, in pixels, of the synthetic square images.")
+    parser.add_argument("--format", nargs="+", default=["ppm", "png"], help="File formats to test.")
+    parser.add_argument("--color", action="store_true", help="Measure colored ASCII art.")
+    options = parser.parse_args()
+
+    print(f"{'format':>6} {'size':>12} {'megapixels':>10} {'regular MiB':>12} {'mapped MiB':>11} {'streaming MiB':>14}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for image_format in options.format:
+            for size in options.sizes:
+                path = os.path.join(work_dir, f"synthetic_{size}.{image_format}")
+                make_synthetic_image(path, size)
+                peaks = [measure_peak_rss(path, path_name, options.color) / 1024 for path_name in CONVERSIONS]
+                print(f"{image_format:>6} {f'{size}x{size}':>12} {size * size / 1e6:>10.1f} "
+                      f"{peaks[0]:>12.1f} {peaks[1]:>11.1f} {peaks[2]:>14.1f}")
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
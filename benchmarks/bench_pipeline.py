@@ -0,0 +1,207 @@
+"""
+Times each stage of the conversion pipeline (decode, resize, glyph mapping,
+color extraction, PNG rendering, console formatting and console output) in
+grayscale and color modes, for synthetic images of several sizes and for the
+sample images of the repository. Throughput and peak memory are recorded too.
+
+Each case runs in a fresh interpreter so that peak memory does not carry over,
+and the console output of the conversions is discarded.
+
+Results can be saved as JSON and compared against a previous run:
+
+    python benchmarks/bench_pipeline.py --json baseline.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --tolerance 0.15
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 500 1000 2000 4000] [--repeats 5] [--modes gray color]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from bench_memory import make_synthetic_image
+
+REPOSITORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SOURCE_DIR = os.path.join(REPOSITORY_DIR, "src")
+SAMPLE_IMAGES = [os.path.join(REPOSITORY_DIR, "images", name) for name in ("serpent.png", "test.png")]
+
+# Version of the JSON layout, bumped whenever it changes incompatibly.
+RESULTS_FORMAT_VERSION = 1
+
+
+def peak_rss_kib() -> int:
+    """
+    Returns the peak resident set size of the current process, in KiB.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(image_path: str, color: bool, repeats: int) -> dict:
+    """
+    Converts one image repeatedly, in the current process, timing every stage.
+
+    Args:
+        image_path (str): The image to convert.
+        color (bool): If True, colored ASCII art is generated.
+        repeats (int): The number of measured conversions, after one warm-up conversion.
+
+    Returns:
+        dict: The median time of each stage in milliseconds, the median total time,
+              the throughput in source megapixels per second and the peak RSS in KiB.
+    """
+    sys.path.insert(0, SOURCE_DIR)
+    import time
+    from PIL import Image
+    import numpy as np
+    from ansii import Ansii
+    from profiling import StageTimer
+
+    Image.MAX_IMAGE_PIXELS = None
+    stage_timer = StageTimer(enabled=True)
+    real_stdout = sys.stdout
+    totals = []
+    with open(os.devnull, "w") as null_output:
+        sys.stdout = null_output
+        try:
+            # The first conversion builds the glyph atlas and warms the caches; it is not measured.
+            for repeat in range(repeats + 1):
+                if repeat == 1:
+                    stage_timer.reset()
+                start_time = time.perf_counter()
+                with stage_timer.measure("decode"):
+                    image = Image.open(image_path)
+                    image.load()
+                Ansii(image, color, stage_timer=stage_timer).convert_image_to_ascii()
+                totals.append(time.perf_counter() - start_time)
+        finally:
+            sys.stdout = real_stdout
+
+    with Image.open(image_path) as image:
+        megapixels = image.size[0] * image.size[1] / 1e6
+        size = list(image.size)
+    total_ms = float(np.median(totals[1:])) * 1000
+    return {
+        "size": size,
+        "stages_ms": {stage: float(np.median(runs)) * 1000 for stage, runs in stage_timer.durations.items()},
+        "total_ms": total_ms,
+        "megapixels_per_second": megapixels / (total_ms / 1000),
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def measure_case(image_path: str, color: bool, repeats: int) -> dict:
+    """
+    Runs one case in a child interpreter (see run_case).
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", image_path,
+               "--repeats", str(repeats)] + (["--color"] if color else [])
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare_results(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """
+    Lists the stages that got slower than in a baseline run.
+
+    Args:
+        results (list[dict]): The cases of the current run.
+        baseline (dict): The JSON document of a previous run.
+        tolerance (float): The relative slowdown allowed before reporting a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        list[str]: One message per regression.
+    """
+    baseline_cases = {(case["name"], case["mode"]): case for case in baseline["cases"]}
+    regressions = []
+    for case in results:
+        baseline_case = baseline_cases.get((case["name"], case["mode"]))
+        if baseline_case is None:
+            continue
+        timings = dict(case["stages_ms"], total=case["total_ms"])
+        baseline_timings = dict(baseline_case["stages_ms"], total=baseline_case["total_ms"])
+        for stage, milliseconds in timings.items():
+            previous = baseline_timings.get(stage)
+            # Sub-millisecond stages are too noisy to compare.
+            if previous is None or max(previous, milliseconds) < 1.0:
+                continue
+            if milliseconds > previous * (1 + tolerance):
+                regressions.append(f"{case['name']} {case['mode']} {stage}: "
+                                   f"{previous:.2f} ms -> {milliseconds:.2f} ms (+{milliseconds / previous - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000],
+                        help="Side lengths, in pixels, of the synthetic square images.")
+    parser.add_argument("--modes", nargs="+", choices=("gray", "color"), default=["gray", "color"],
+                        help="Conversion modes to measure.")
+    parser.add_argument("--repeats", type=int, default=5, help="Measured conversions per case.")
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="A JSON file of a previous run to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown reported as a regression (default 0.1).")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--color", action="store_true", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.run_case:
+        # Child interpreter: measure a single case and hand the result back as JSON.
+        print(json.dumps(run_case(options.run_case, options.color, options.repeats)))
+        return 0
+
+    results = []
+    header = (f"{'image':>16} {'mode':>5} {'total ms':>9} {'MP/s':>7} {'peak MiB':>9}  stages (median ms)")
+    print(header)
+    with tempfile.TemporaryDirectory() as work_dir:
+        images = []
+        for size in options.sizes:
+            path = os.path.join(work_dir, f"synthetic_{size}.png")
+            make_synthetic_image(path, size)
+            images.append((f"synthetic_{size}", path))
+        images += [(os.path.basename(path), path) for path in SAMPLE_IMAGES if os.path.exists(path)]
+
+        for name, path in images:
+            for mode in options.modes:
+                case = dict(name=name, mode=mode, **measure_case(path, mode == "color", options.repeats))
+                results.append(case)
+                stages = "  ".join(f"{stage} {milliseconds:.1f}" for stage, milliseconds in case["stages_ms"].items())
+                print(f"{name:>16} {mode:>5} {case['total_ms']:>9.1f} {case['megapixels_per_second']:>7.1f} "
+                      f"{case['peak_rss_kib'] / 1024:>9.1f}  {stages}")
+
+    document = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": options.repeats,
+        "cases": results,
+    }
+    if options.json:
+        with open(options.json, "w") as json_file:
+            json.dump(document, json_file, indent=2)
+        print(f"Results written to {options.json}.")
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), options.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {options.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regression beyond {options.tolerance:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Compares the resampling filters that shrink an image to the character grid,
+by cost and by quality, so that the fastest acceptable filter can be chosen
+for each workload.
+
+Quality is measured against the exact area average of every cell (computed in
+floating point): the mean error of the cell intensities, and the share of cells
+that end up with a different character than the exact average would give. The
+sources are a smooth photo-like gradient with noise, and a zone plate of fine
+rings, where filters that skip source pixels alias badly. Grid widths include
+one dividing the source exactly, where area averaging is a plain block reduction;
+for that case a NumPy block sum is timed too, as the alternative to Image.reduce.
+
+Usage:
+    python benchmarks/bench_resampling.py [--sizes 1000 4000] [--widths 80 240] [--repeats 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SOURCE_DIR)
+
+from ansii import INTENSITY_TO_GLYPH_INDEX  # noqa: E402
+from resampling import RESAMPLE_FILTERS, ascii_output_height, resize_cells  # noqa: E402
+
+# Height of a character cell divided by its width used by every case, as in a terminal.
+CELL_ASPECT = 2.0
+
+
+def make_photo(size: int) -> Image.Image:
+    """
+    Builds a square RGB gradient with some noise, like the images of the other benchmarks.
+    """
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    noise = np.random.default_rng(size).integers(0, 32, (size, size), dtype=np.uint8)
+    red = (ramp[np.newaxis, :] + noise).clip(0, 255).astype(np.uint8)
+    green = np.broadcast_to(ramp[:, np.newaxis], (size, size)).astype(np.uint8)
+    return Image.fromarray(np.dstack([red, green, 255 - red]), "RGB")
+
+
+def make_zone_plate(size: int) -> Image.Image:
+    """
+    Builds a square grayscale zone plate: rings getting finer towards the corners, which
+    any filter sampling too few source pixels per cell turns into false patterns.
+    """
+    coordinates = np.linspace(-1, 1, size, dtype=np.float64)
+    radius_squared = coordinates[np.newaxis, :] ** 2 + coordinates[:, np.newaxis] ** 2
+    rings = 127.5 + 127.5 * np.cos(np.pi * size / 4 * radius_squared)
+    return Image.fromarray(rings.round().astype(np.uint8), "L")
+
+
+def exact_intensities(image: Image.Image, size: tuple[int, int]) -> np.ndarray:
+    """
+    Computes the exact area-averaged intensity of every cell, without rounding.
+    """
+    luminance = image.convert("L").convert("F")
+    return np.asarray(luminance.resize(size, Image.Resampling.BOX), dtype=np.float64)
+
+
+def numpy_block_average(pixels: np.ndarray, factors: tuple[int, int]) -> np.ndarray:
+    """
+    Averages blocks of pixels with NumPy sums, the alternative Image.reduce is compared with.
+    """
+    factor_x, factor_y = factors
+    height, width = pixels.shape[0] // factor_y, pixels.shape[1] // factor_x
+    row_sums = pixels.reshape((height, factor_y, -1)).sum(axis=1, dtype=np.uint32)
+    block_sums = row_sums.reshape((height, width, factor_x) + pixels.shape[2:]).sum(axis=2)
+    count = factor_x * factor_y
+    return ((block_sums + count // 2) // count).astype(np.uint8)
+
+
+def median_milliseconds(function, repeats: int) -> float:
+    """
+    Runs a function once to warm up, then repeatedly, and returns its median time in milliseconds.
+    """
+    function()
+    durations = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return float(np.median(durations)) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the cost and quality of the resampling filters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000], help="Side of the square sources.")
+    parser.add_argument("--widths", type=int, nargs="+", default=[80, 240],
+                        help="Widths of the character grids. A width dividing each source exactly is added.")
+    parser.add_argument("--repeats", type=int, default=5, help="Measured runs per case.")
+    options = parser.parse_args()
+
+    print(f"{'source':>16} {'grid':>9} {'filter':>12} {'ms':>9} {'mean error':>11} {'glyphs off':>11}")
+    for size in options.sizes:
+        # A width dividing the source, whose height at CELL_ASPECT divides it too for sides multiple of 20.
+        integral_width = size // 10
+        for source_name, source in (("photo", make_photo(size)), ("zone plate", make_zone_plate(size))):
+            for width in sorted(set(options.widths) | {integral_width}):
+                grid_size = (width, ascii_output_height(source.size, width, CELL_ASPECT))
+                exact = exact_intensities(source, grid_size)
+                exact_glyphs = INTENSITY_TO_GLYPH_INDEX[np.clip(exact.round(), 0, 255).astype(np.uint8)]
+                for resample in RESAMPLE_FILTERS:
+                    milliseconds = median_milliseconds(lambda: resize_cells(source, grid_size, resample),
+                                                       options.repeats)
+                    intensities = np.asarray(resize_cells(source, grid_size, resample).convert("L"))
+                    mean_error = np.abs(intensities - exact).mean()
+                    glyphs_off = (INTENSITY_TO_GLYPH_INDEX[intensities] != exact_glyphs).mean()
+                    print(f"{source_name + ' ' + str(size):>16} {grid_size[0]:>4}x{grid_size[1]:<4} {resample:>12} "
+                          f"{milliseconds:>9.2f} {mean_error:>11.2f} {glyphs_off:>11.1%}")
+                if size % grid_size[0] == 0 and size % grid_size[1] == 0:
+                    pixels = np.asarray(source)
+                    factors = (size // grid_size[0], size // grid_size[1])
+                    milliseconds = median_milliseconds(lambda: numpy_block_average(pixels, factors), options.repeats)
+                    print(f"{source_name + ' ' + str(size):>16} {grid_size[0]:>4}x{grid_size[1]:<4} "
+                          f"{'numpy blocks':>12} {milliseconds:>9.2f} {'(area)':>11} {'':>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Measures how long a short-lived conversion job spends starting up. It reports:
+
+- the import time of the headless API (src/headless.py), from `python -X importtime`,
+  with the modules costing the most;
+- the wall time of a bare interpreter, of importing the API, and of whole
+  `main.py convert` runs to text and to PNG, so that startup can be compared
+  with the conversion itself.
+
+That importing the API and converting to text load neither the GUI nor the
+drawing modules is checked by tests/test_headless.py.
+
+Usage:
+    python benchmarks/bench_startup.py [--image images/test.png] [--repeats 10] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPOSITORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SOURCE_DIR = os.path.join(REPOSITORY_DIR, "src")
+
+
+def python_command(*arguments: str) -> list[str]:
+    """
+    Builds the command running the current interpreter, isolated from the user site
+    directory so that measurements do not depend on what happens to be installed there.
+    """
+    return [sys.executable, "-s", *arguments]
+
+
+def import_profile(command: list[str]) -> list[tuple[str, int, int]]:
+    """
+    Runs a command with `-X importtime` and parses its report.
+
+    Args:
+        command (list[str]): The arguments following the interpreter options.
+
+    Returns:
+        list[tuple[str, int, int]]: The (module, self microseconds, cumulative microseconds)
+                                    of every imported module, in import order.
+    """
+    result = subprocess.run(python_command("-X", "importtime", *command), cwd=SOURCE_DIR, check=True,
+                            capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_time), int(cumulative_time)))
+    return modules
+
+
+def median_wall_milliseconds(command: list[str], repeats: int) -> float:
+    """
+    Runs a command repeatedly in a fresh interpreter and returns its median wall time in milliseconds.
+    """
+    durations = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        subprocess.run(python_command(*command), cwd=SOURCE_DIR, check=True, capture_output=True)
+        durations.append(time.perf_counter() - start_time)
+    durations.sort()
+    return durations[len(durations) // 2] * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the startup cost of headless conversions.")
+    parser.add_argument("--image", default=os.path.join(REPOSITORY_DIR, "images", "test.png"),
+                        help="The image converted by the end-to-end runs.")
+    parser.add_argument("--repeats", type=int, default=10, help="Runs per wall time measurement.")
+    parser.add_argument("--top", type=int, default=15, help="Number of costliest modules listed.")
+    options = parser.parse_args()
+    image_path = os.path.abspath(options.image)
+    png_path = os.path.join(os.path.abspath(REPOSITORY_DIR), "bench_startup.png")
+
+    modules = import_profile(["-c", "import headless"])
+    headless_microseconds = next(cumulative for name, _, cumulative in modules if name == "headless")
+    print(f"Importing headless: {headless_microseconds / 1000:.1f} ms, {len(modules)} modules.")
+    print(f"Costliest modules (self time, cumulative time):")
+    for name, self_time, cumulative_time in sorted(modules, key=lambda module: -module[1])[:options.top]:
+        print(f"  {name:<40} {self_time / 1000:>8.2f} ms {cumulative_time / 1000:>8.2f} ms")
+
+    text_run = ["main.py", "convert", image_path, "--text", os.devnull]
+    png_run = ["main.py", "convert", image_path, "--text", os.devnull, "--png", png_path]
+    wall_times = {
+        "interpreter": median_wall_milliseconds(["-c", "pass"], options.repeats),
+        "import headless": median_wall_milliseconds(["-c", "import headless"], options.repeats),
+        "convert to text": median_wall_milliseconds(text_run, options.repeats),
+        "convert to PNG": median_wall_milliseconds(png_run, options.repeats),
+    }
+    os.remove(png_path)
+    print(f"Median wall time over {options.repeats} runs:")
+    for name, milliseconds in wall_times.items():
+        share = milliseconds / wall_times["convert to text"]
+        print(f"  {name:<20} {milliseconds:>8.1f} ms ({share:.0%} of a conversion to text)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Drives the conversion server (python src/main.py serve) with concurrent
+clients and reports latency percentiles, throughput and response statuses.
+
+By default a server is started on a free local port for the duration of the
+test. Each client uploads one of --distinct image variants, so a low number of
+variants exercises the coalescing of identical requests and a high number
+exercises the worker pool; a concurrency above the pool and queue capacity
+exercises the 503 backpressure.
+
+Usage:
+    python benchmarks/load_test.py [--requests 500] [--concurrency 32] [--distinct 8] [--format text]
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 ...
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from PIL import Image
+import numpy as np
+
+REPOSITORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+DEFAULT_IMAGE = os.path.join(REPOSITORY_DIR, "images", "serpent.png")
+
+
+def make_variants(image_path: str, count: int) -> list[bytes]:
+    """
+    Encodes `count` PNG variants of an image that differ by a single pixel, so that
+    each one is a distinct upload for the server.
+    """
+    with Image.open(image_path) as image:
+        pixels = np.array(image.convert("RGB"))
+    variants = []
+    for variant_index in range(count):
+        pixels[0, 0] = (variant_index % 256, variant_index // 256 % 256, 0)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="PNG")
+        variants.append(buffer.getvalue())
+    return variants
+
+
+async def send_request(host: str, port: int, path: str, body: bytes = None) -> tuple[int, bytes]:
+    """
+    Sends one request (POST if there is a body, GET otherwise) on a new connection and reads the whole response.
+
+    Returns:
+        tuple[int, bytes]: The HTTP status and the body of the response.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        method = "GET" if body is None else "POST"
+        body = body or b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        content_length = int(re.search(rb"content-length: *(\d+)", head, re.IGNORECASE).group(1))
+        return status, await reader.readexactly(content_length)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, path: str, variants: list[bytes], request_count: int,
+                   concurrency: int) -> tuple[list[float], Counter, float]:
+    """
+    Sends `request_count` requests with `concurrency` clients working in parallel.
+
+    Returns:
+        tuple[list[float], Counter, float]: The latency of each successful request in seconds,
+                                            the count of each status, and the elapsed time.
+    """
+    latencies = []
+    statuses = Counter()
+    next_request = iter(range(request_count))
+
+    async def client():
+        for request_index in next_request:
+            start_time = time.perf_counter()
+            try:
+                status, _ = await send_request(host, port, path, variants[request_index % len(variants)])
+            except (ConnectionError, asyncio.IncompleteReadError):
+                statuses["connection error"] += 1
+                continue
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start_time
+
+
+def start_server(workers: int, queue_size: int) -> tuple[subprocess.Popen, int]:
+    """
+    Starts the server on a free port and waits until it accepts connections.
+
+    Returns:
+        tuple[subprocess.Popen, int]: The server process and its port.
+    """
+    command = [sys.executable, os.path.join(REPOSITORY_DIR, "src", "main.py"), "serve", "--port", "0"]
+    if workers:
+        command += ["--workers", str(workers)]
+    if queue_size is not None:
+        command += ["--queue-size", str(queue_size)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    banner = process.stdout.readline()
+    match = re.search(r":(\d+) ", banner)
+    if match is None:
+        process.kill()
+        raise RuntimeError(f"The server did not start: {banner!r}")
+    return process, int(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (by default a server is started).")
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Image uploaded by the clients.")
+    parser.add_argument("--requests", type=int, default=500, help="Total number of requests.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Number of concurrent clients.")
+    parser.add_argument("--distinct", type=int, default=8, help="Number of distinct image variants uploaded.")
+    parser.add_argument("--format", choices=("text", "ansi", "png"), default="text", help="Requested output.")
+    parser.add_argument("--color", action="store_true", help="Request colored ASCII art.")
+    parser.add_argument("--workers", type=int, help="Worker processes of the started server.")
+    parser.add_argument("--queue-size", type=int, help="Queue size of the started server.")
+    options = parser.parse_args()
+
+    variants = make_variants(options.image, options.distinct)
+    path = f"/convert?format={options.format}&color={int(options.color)}"
+
+    server_process = None
+    if options.url:
+        url = urlsplit(options.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        server_process, port = start_server(options.workers, options.queue_size)
+        host = "127.0.0.1"
+    try:
+        latencies, statuses, elapsed_seconds = asyncio.run(
+            run_load(host, port, path, variants, options.requests, options.concurrency))
+        _, health = asyncio.run(send_request(host, port, "/health"))
+        server_stats = json.loads(health)
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait()
+
+    print(f"{options.requests} requests, {options.concurrency} clients, {options.distinct} distinct images, "
+          f"format {options.format}{' (color)' if options.color else ''}")
+    print(f"Statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items(), key=str))}")
+    print(f"Throughput: {statuses[200] / elapsed_seconds:.1f} successful requests/s "
+          f"({sum(statuses.values()) / elapsed_seconds:.1f} requests/s overall)")
+    print(f"Server: {server_stats['conversions']} conversions, {server_stats['coalesced']} coalesced, "
+          f"{server_stats['rejected']} rejected")
+    if latencies:
+        latencies_ms = np.array(latencies) * 1000
+        print(f"Latency of successful requests: p50 {np.percentile(latencies_ms, 50):.1f} ms, "
+              f"p99 {np.percentile(latencies_ms, 99):.1f} ms, max {latencies_ms.max():.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
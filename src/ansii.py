@@ -1,4 +1,49 @@
-from PIL import Image, ImageDraw
+from PIL import Image
+import numpy as np
+
+from art_format import AsciiArt
+from dithering import DITHER_MODES, dither_levels
+from glyph_atlas import get_glyph_atlas
+from glyph_index import SHAPE_CHARACTER_SET, check_shape_cell_size, get_glyph_index
+from profiling import StageTimer, default_stage_timer
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE, ascii_output_height, check_resampling, resize_cells
+from tiled_render import TILED_RENDER_MIN_CELLS, TiledRenderer
+from terminal import TerminalEncoder, write_to_terminal
+
+# The set of ASCII characters ordered from darkest to lightest.
+# The number of characters determines the granularity of the intensity mapping.
+ASCII_CHARACTER_SET = ["@", "J", "D", "%", "*", "P", "+", "Y", "$", ",", "."]
+
+# Lookup table mapping every possible 8-bit intensity (0-255) to an index into
+# ASCII_CHARACTER_SET. Dividing by 25 (255 / 11 characters approx) distributes
+# intensities across the character set, exactly like the reference mapping.
+INTENSITY_TO_GLYPH_INDEX = (np.arange(256) // 25).astype(np.uint8)
+
+# Number of ASCII characters per row of the generated art.
+ASCII_WIDTH = 42
+
+# The (width, height) in pixels of each character in the generated PNG.
+CELL_SIZE = (12, 12)
+
+# How characters are chosen: "intensity" maps the brightness of each cell to
+# ASCII_CHARACTER_SET, "shape" picks from SHAPE_CHARACTER_SET the glyph whose
+# ink layout best matches the cell (see glyph_index.GlyphIndex).
+GLYPH_MODES = ("intensity", "shape")
+
+
+def parse_cell_size(text: str) -> tuple[int, int]:
+    """
+    Parses a cell size given on the command line, either as 'WIDTHxHEIGHT' or as a single number for square cells.
+
+    Args:
+        text (str): The text to parse, e.g. '12x12' or '8'.
+
+    Returns:
+        tuple[int, int]: The (width, height) of a cell in pixels.
+    """
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height or width)
+
 
 class Ansii:
     """
@@ -6,7 +51,10 @@ class Ansii:
     It resizes the image, maps pixel intensity to ASCII characters,
     and can either print the ASCII art to the console or generate a PNG image.
     """
-    def __init__(self, image: Image.Image, color: bool = False):
+    def __init__(self, image: Image.Image, color: bool = False, palette: str = "truecolor",
+                 ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE,
+                 stage_timer: StageTimer = None, glyph_mode: str = "intensity", dither: str = "none",
+                 resample: str = DEFAULT_RESAMPLE, cell_aspect: float = DEFAULT_CELL_ASPECT):
         """
         Initializes the Ansii object.
 
@@ -14,18 +62,105 @@ class Ansii:
             image (Image.Image): The input PIL Image object.
             color (bool): If True, the generated ASCII art will attempt to preserve original colors.
                           If False, it will be grayscale. Defaults to False.
+            palette (str): The terminal palette used for colored console output: "truecolor",
+                           "256" or "16". Defaults to "truecolor".
+            ascii_width (int): The number of ASCII characters per row. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The (width, height) in pixels of each character in the
+                                         generated PNG. Defaults to CELL_SIZE.
+            stage_timer (StageTimer): The timer recording the time spent in each stage. Defaults to
+                                      None, which uses profiling.default_stage_timer.
+            glyph_mode (str): One of GLYPH_MODES. Defaults to "intensity".
+            dither (str): How intensities are dithered across the characters, and colors across the
+                          terminal palette, one of dithering.DITHER_MODES. Shape matching is never
+                          dithered. Defaults to "none".
+            resample (str): The filter the image is resampled to the character grid with, one of
+                            resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+            cell_aspect (float): The height of a character cell divided by its width, which the
+                                 number of rows is corrected for. Defaults to DEFAULT_CELL_ASPECT.
         """
+        if glyph_mode not in GLYPH_MODES:
+            raise ValueError(f"Unknown glyph mode '{glyph_mode}', expected one of {', '.join(GLYPH_MODES)}.")
+        if glyph_mode == "shape":
+            check_shape_cell_size(cell_size)
+        if dither not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither}', expected one of {', '.join(DITHER_MODES)}.")
+        self.glyph_mode = glyph_mode  # How characters are chosen.
+        self.dither = dither  # How intensities and palette colors are dithered.
+        check_resampling(resample, cell_aspect)
+        self.resample = resample  # The filter resampling the image to one pixel per character.
+        self.cell_aspect = cell_aspect  # Height of a character cell divided by its width.
+        self.character_set = self.character_set_of(glyph_mode)  # The characters glyph indices refer to.
+        self.stage_timer = stage_timer or default_stage_timer  # Times each stage when enabled.
         self.original_image = image  # Stores the original image for reference.
+        self.ascii_width = ascii_width  # Number of characters per row of the ASCII art.
+        self.cell_size = cell_size  # Size of each character in the generated PNG.
         # Resize the image to a suitable dimension for ASCII conversion.
         self.processed_image = self._resize_for_ascii(self.original_image)
         self.enable_color = color  # Flag to determine if color ASCII art should be generated.
         self.width, _ = self.processed_image.size # Get the width of the processed image.
+        self.terminal_encoder = TerminalEncoder(palette, dither)  # Formats the console output.
+        self._pixels = None  # Pixels of the processed image, read once (see _pixel_buffer).
+        self._luminance = None  # Grayscale intensities of the processed image, computed once.
+
+    @classmethod
+    def from_processed_image(cls, processed_image: Image.Image, color: bool = False,
+                             palette: str = "truecolor", cell_size: tuple[int, int] = CELL_SIZE,
+                             stage_timer: StageTimer = None) -> "Ansii":
+        """
+        Creates an Ansii object from an image that is already at the ASCII art
+        resolution (one pixel per character), skipping the resize step.
+
+        Args:
+            processed_image (Image.Image): The PIL Image object, one pixel per output character.
+            color (bool): If True, the generated ASCII art will attempt to preserve original colors.
+                          Defaults to False.
+            palette (str): The terminal palette used for colored console output. Defaults to "truecolor".
+            cell_size (tuple[int, int]): The (width, height) in pixels of each character in the
+                                         generated PNG. Defaults to CELL_SIZE.
+            stage_timer (StageTimer): The timer recording the time spent in each stage. Defaults to
+                                      None, which uses profiling.default_stage_timer.
+
+        Returns:
+            Ansii: The new Ansii object.
+        """
+        ansii = cls.__new__(cls)
+        # Shape matching needs the image at a finer resolution than one pixel per character.
+        ansii.glyph_mode = "intensity"
+        ansii.dither = "none"
+        ansii.resample = DEFAULT_RESAMPLE
+        ansii.cell_aspect = DEFAULT_CELL_ASPECT
+        ansii.character_set = cls.character_set_of("intensity")
+        ansii.stage_timer = stage_timer or default_stage_timer
+        ansii.original_image = processed_image
+        ansii.ascii_width = processed_image.size[0]
+        ansii.cell_size = cell_size
+        ansii.processed_image = processed_image
+        ansii.enable_color = color
+        ansii.width, _ = processed_image.size
+        ansii.terminal_encoder = TerminalEncoder(palette)
+        ansii._pixels = None
+        ansii._luminance = None
+        return ansii
+
+    @staticmethod
+    def character_set_of(glyph_mode: str) -> tuple[str, ...]:
+        """
+        Returns the characters a glyph mode chooses from.
+
+        Args:
+            glyph_mode (str): One of GLYPH_MODES.
+
+        Returns:
+            tuple[str, ...]: The character set; glyph indices refer to positions in it.
+        """
+        return SHAPE_CHARACTER_SET if glyph_mode == "shape" else tuple(ASCII_CHARACTER_SET)
 
     def _resize_for_ascii(self, image: Image.Image) -> Image.Image:
         """
-        Resizes the input image to a fixed width while maintaining its aspect ratio.
+        Resizes the input image to the ASCII width while maintaining its aspect ratio.
         This is crucial for consistent ASCII art generation, as terminal output has
-        a different character aspect ratio than pixels.
+        a different character aspect ratio than pixels: the number of rows is divided
+        by self.cell_aspect, and the image is resampled with self.resample.
 
         Args:
             image (Image.Image): The PIL Image object to be resized.
@@ -33,22 +168,43 @@ class Ansii:
         Returns:
             Image.Image: The resized PIL Image object.
         """
-        original_width, original_height = image.size
-        aspect_ratio = original_width / original_height
-        
-        # Define a target width for the ASCII art output.
-        # This can be adjusted to control the detail level and output size.
-        target_width = 42 
+        # The target width of the ASCII art output controls the detail level and output size.
+        target_width = self.ascii_width
         # Calculate the corresponding height to maintain the aspect ratio.
-        target_height = int(target_width / aspect_ratio)
+        target_height = ascii_output_height(image.size, target_width, self.cell_aspect)
         
-        resized_image = image.resize((target_width, target_height))
+        with self.stage_timer.measure("resize"):
+            resized_image = resize_cells(image, (target_width, target_height), self.resample)
         return resized_image
     
-    def _create_png_from_ascii(self, ascii_character_matrix: list[list[str]], ascii_color_matrix: list[list[tuple]] = None) -> Image.Image:
+    def _create_png_from_ascii(self, glyph_indices: np.ndarray, color_matrix: np.ndarray = None) -> Image.Image:
+        """
+        Generates a PNG image from the glyph index matrix.
+        Each glyph is rasterized only once into a glyph atlas, and the image is
+        composed by tiling the atlas cells, tinted with the cell colors if enabled.
+        Large grids are rendered in tiles on several threads.
+
+        Args:
+            glyph_indices (np.ndarray): A (height, width) matrix of indices into self.character_set.
+            color_matrix (np.ndarray): An optional (height, width, 3) matrix of RGB colors, one per character.
+                                       Only used if self.enable_color is True. Defaults to None.
+
+        Returns:
+            Image.Image: A PIL Image object representing the ASCII art as a PNG.
+        """
+        # The size of each character in the output PNG is set by self.cell_size,
+        # which can be adjusted based on desired font size and appearance.
+        atlas = get_glyph_atlas(self.character_set, tuple(self.cell_size))
+        color_matrix = color_matrix if self.enable_color else None
+        if glyph_indices.size >= TILED_RENDER_MIN_CELLS:
+            return TiledRenderer(atlas).render(glyph_indices, color_matrix)
+        return atlas.render(glyph_indices, color_matrix)
+
+    def _create_png_from_ascii_reference(self, ascii_character_matrix: list[list[str]], ascii_color_matrix: list[list[tuple]] = None) -> Image.Image:
         """
         Generates a PNG image from the ASCII character matrix.
         Each character is drawn onto a new image, with optional color applied.
+        This is the reference renderer the glyph atlas is validated against.
 
         Args:
             ascii_character_matrix (list[list[str]]): A 2D list where each inner list represents a row
@@ -66,8 +222,11 @@ class Ansii:
         
         # Define the size of each character in the output PNG.
         # These values can be adjusted based on desired font size and appearance.
-        char_pixel_width, char_pixel_height = 12, 12
+        char_pixel_width, char_pixel_height = self.cell_size
         
+        # ImageDraw is only needed by this reference renderer, so it is not loaded with the module.
+        from PIL import ImageDraw
+
         # Create a new blank RGB image with a white background.
         png_image = Image.new("RGB", (grid_width * char_pixel_width, grid_height * char_pixel_height), color='white')
         canvas = ImageDraw.Draw(png_image)
@@ -91,104 +250,219 @@ class Ansii:
                     )
         return png_image
     
-    def convert_image_to_ascii(self) -> Image.Image:
+    def compute_glyph_indices(self) -> np.ndarray:
         """
-        Converts the processed image into ASCII art, printing it to the console
-        and returning a PIL Image object of the ASCII art.
+        Maps every pixel of the processed image to an ASCII character in a single
+        vectorized lookup, without creating a Python object per pixel.
+        In shape mode, each cell is instead matched against the glyph index.
 
-        The process involves:
-        1. Converting the image to grayscale to determine intensity.
-        2. Mapping pixel intensities to a predefined set of ASCII characters.
-        3. If color is enabled, extracting the original pixel colors.
-        4. Arranging the characters into lines based on the image width.
-        5. Printing the ASCII art to the console (with ANSI color codes if enabled).
-        6. Generating a PNG image of the ASCII art.
+        Returns:
+            np.ndarray: A (height, width) uint8 matrix where each entry is an index
+                        into self.character_set.
+        """
+        if self.glyph_mode == "shape":
+            columns, rows = self.processed_image.size
+            glyph_index = get_glyph_index(self.character_set, tuple(self.cell_size))
+            # Sub-cells are sampled from the original image, which has the detail the processed one lost.
+            return glyph_index.match_image(self.original_image, columns, rows)
+
+        # Grayscale intensity of each pixel, from 0 (darkest) to 255 (lightest).
+        grayscale_pixels = self._grayscale_pixels()
+        if self.dither != "none":
+            # Same levels as the lookup table, 25 intensities each, with dithering between them.
+            return dither_levels(grayscale_pixels, 25, len(self.character_set), self.dither)
+        # One fancy-indexing operation replaces the per-pixel list comprehension.
+        return INTENSITY_TO_GLYPH_INDEX[grayscale_pixels]
+
+    def compute_glyph_codepoints(self) -> np.ndarray:
+        """
+        Maps every pixel of the processed image directly to the Unicode code point
+        of its ASCII character.
 
         Returns:
-            Image.Image: A PIL Image object representing the ASCII art.
+            np.ndarray: A (height, width) uint32 matrix of code points.
+        """
+        return self._glyph_codepoint_table()[self.compute_glyph_indices()]
+
+    def compute_color_matrix(self) -> np.ndarray:
+        """
+        Extracts the RGB color of every pixel of the processed image.
+
+        Returns:
+            np.ndarray: A (height, width, 3) uint8 matrix of RGB values.
+        """
+        pixels = self._pixel_buffer()
+        if pixels is None:
+            return np.asarray(self.processed_image.convert("RGB"))
+        if pixels.ndim == 2:
+            return np.repeat(pixels[..., np.newaxis], 3, axis=2)
+        # Dropping the alpha channel is all Pillow does to convert RGBA to RGB.
+        return pixels[..., :3]
+
+    def _pixel_buffer(self) -> np.ndarray:
+        """
+        Reads the pixels of the processed image into a NumPy array once, so that the
+        grayscale intensities and the colors are both derived from the same buffer
+        instead of converting the image once to 'I' and once more to 'RGB'.
+
+        Returns:
+            np.ndarray: The (height, width) or (height, width, channels) uint8 pixels, or None
+                        if the image is not in 'L', 'RGB' or 'RGBA' mode.
+        """
+        if self._pixels is None and self.processed_image.mode in ("L", "RGB", "RGBA"):
+            self._pixels = np.asarray(self.processed_image)
+        return self._pixels
+
+    def _grayscale_pixels(self) -> np.ndarray:
+        """
+        Computes the grayscale intensity of every pixel of the processed image.
+
+        Returns:
+            np.ndarray: A (height, width) integer matrix of intensities from 0 to 255, equal to
+                        the image converted to 'I' mode. It is computed once and shared.
+        """
+        if self._luminance is not None:
+            return self._luminance
+        pixels = self._pixel_buffer()
+        if pixels is None:
+            # Other modes (palette, 16-bit, CMYK...) go through Pillow's own conversion.
+            # Clip defensively so that high bit-depth sources cannot index past the lookup table.
+            self._luminance = np.clip(np.asarray(self.processed_image.convert("I")), 0, 255)
+        elif pixels.ndim == 2:
+            self._luminance = pixels
+        else:
+            channels = pixels.astype(np.uint32)
+            # The fixed-point ITU-R 601-2 luma weights Pillow itself uses to convert RGB to 'L' or 'I'.
+            self._luminance = (channels[..., 0] * 19595 + channels[..., 1] * 38470
+                               + channels[..., 2] * 7471 + 0x8000) >> 16
+        return self._luminance
+
+    def _glyph_codepoint_table(self) -> np.ndarray:
+        """
+        Builds the table translating glyph indices into Unicode code points.
+
+        Returns:
+            np.ndarray: A uint32 array holding the code point of each character of self.character_set.
+        """
+        return np.array([ord(char) for char in self.character_set], dtype=np.uint32)
+
+    def _glyph_indices_to_lines(self, glyph_indices: np.ndarray) -> list[str]:
+        """
+        Turns a glyph index matrix into one string per row.
+
+        The code point matrix is reinterpreted as fixed-width Unicode strings, so
+        each row becomes a single string without any per-character concatenation.
+
+        Args:
+            glyph_indices (np.ndarray): A (height, width) matrix of indices into self.character_set.
+
+        Returns:
+            list[str]: The ASCII art, one string per row.
+        """
+        height, width = glyph_indices.shape
+        codepoint_matrix = np.ascontiguousarray(self._glyph_codepoint_table()[glyph_indices])
+        # A row of `width` UCS-4 code points has the same memory layout as a '<U{width}' string.
+        return codepoint_matrix.view(f"<U{width}").reshape(height).tolist()
+
+    def _convert_image_to_ascii_reference(self) -> tuple[list[str], list[list[tuple]]]:
+        """
+        Reference implementation of the glyph mapping, kept to validate the
+        vectorized engine. It walks every pixel in Python and builds the lines
+        by string slicing.
+
+        Returns:
+            tuple[list[str], list[list[tuple]]]: The ASCII lines and, if color is enabled,
+                                                 the RGB tuples of each line (otherwise an empty list).
         """
-        # Convert the image to a single-channel 'I' mode (integer pixels) for grayscale intensity.
         grayscale_image = self.processed_image.convert("I")
-        # Convert the image to 'RGB' mode to extract color information if needed.
         rgb_image_data = self.processed_image.convert("RGB")
-
-        # Define the set of ASCII characters ordered from darkest to lightest.
-        # The number of characters determines the granularity of the intensity mapping.
-        ascii_character_set = ["@", "J", "D", "%", "*", "P", "+", "Y", "$", ",", "."]
-        
-        # Get pixel data from the grayscale image. Each pixel value ranges from 0 (darkest) to 255 (lightest).
         grayscale_pixels = grayscale_image.getdata()
-        
-        # If color is enabled, get pixel data from the RGB image.
         if self.enable_color:
             color_pixels = rgb_image_data.getdata()
-        
-        # Map each grayscale pixel intensity to an ASCII character.
-        # Dividing by 25 (255 / 11 characters approx) distributes pixels across the character set.
-        mapped_ascii_characters = [ascii_character_set[pixel_value // 25] for pixel_value in grayscale_pixels]
-        
-        # Join the list of characters into a single string.
-        # This string now represents the entire image as a sequence of ASCII characters.
+
+        mapped_ascii_characters = [ASCII_CHARACTER_SET[pixel_value // 25] for pixel_value in grayscale_pixels]
         ascii_string_representation = ''.join(mapped_ascii_characters)
-        total_ascii_characters_count = len(ascii_string_representation)
-        
-        # Prepare lists to store the formatted ASCII art for console and PNG output.
-        ascii_lines_for_display = []        # For printing to console (grayscale)
-        ascii_color_lines_for_display = []  # For printing to console (colored)
-        ascii_colors_for_png = []           # For generating PNG with colors
 
-        # Split the single string of ASCII characters into lines, based on the processed image's width.
-        for i in range(0, total_ascii_characters_count, self.width):
+        ascii_lines = []
+        ascii_colors = []
+        for i in range(0, len(ascii_string_representation), self.width):
             if self.enable_color:
-                current_line_colors = []
-                current_line_colored_ascii = ""
-                # Iterate through characters in the current line.
-                for char_index in range(i, i + self.width):
-                    # Get the ANSI color escape sequence for the character.
-                    colored_char = self._get_ansi_color_code(
-                        ascii_string_representation[char_index],
-                        color_pixels[char_index]
-                    )
-                    current_line_colored_ascii += colored_char
-                    current_line_colors.append(color_pixels[char_index])
-                ascii_color_lines_for_display.append(current_line_colored_ascii)
-                ascii_colors_for_png.append(current_line_colors)
-            
-            # For both color and grayscale modes, build the basic ASCII character lines.
-            ascii_lines_for_display.append(ascii_string_representation[i : i + self.width])
-        
-        # Generate the PNG image from the ASCII character matrix and color matrix (if enabled).
-        generated_png_image = self._create_png_from_ascii(
-            ascii_character_matrix=ascii_lines_for_display,
-            ascii_color_matrix=ascii_colors_for_png if self.enable_color else None
-        )
+                ascii_colors.append([color_pixels[char_index] for char_index in range(i, i + self.width)])
+            ascii_lines.append(ascii_string_representation[i : i + self.width])
+        return ascii_lines, ascii_colors
 
-        # Print the ASCII art to the console.
-        if self.enable_color:
-            # Join the colored ASCII lines with newlines for terminal display.
-            formatted_color_output = ("\n").join(ascii_color_lines_for_display)
-            print(formatted_color_output + "\n")
-        else:
-            # Join the grayscale ASCII lines with newlines for terminal display.
-            formatted_grayscale_output = ("\n").join(ascii_lines_for_display)
-            print(formatted_grayscale_output + "\n")
+    def render(self) -> tuple[Image.Image, str]:
+        """
+        Converts the processed image into ASCII art without printing anything.
 
-        return generated_png_image
-        
-    def _get_ansi_color_code(self, char: str, rgb: tuple) -> str:
+        The process involves:
+        1. Mapping pixel intensities to a predefined set of ASCII characters
+           through a 256-entry lookup table.
+        2. If color is enabled, extracting the original pixel colors.
+        3. Arranging the characters into lines based on the image width.
+        4. Formatting the ASCII art for the console (with ANSI color codes if enabled).
+        5. Generating a PNG image of the ASCII art.
+
+        Returns:
+            tuple[Image.Image, str]: A PIL Image object representing the ASCII art,
+                                     and the ASCII art formatted for the console.
         """
-        Generates an ANSI escape sequence string to display a character with a specific RGB color
-        in a terminal that supports true color (24-bit color).
+        # Map all pixels to glyphs at once and split them into lines.
+        with self.stage_timer.measure("glyph_mapping"):
+            glyph_indices = self.compute_glyph_indices()
+            ascii_lines_for_display = self._glyph_indices_to_lines(glyph_indices)
+        with self.stage_timer.measure("color_extraction"):
+            color_matrix = self.compute_color_matrix() if self.enable_color else None
+
+        # Generate the PNG image from the glyph index matrix and color matrix (if enabled).
+        with self.stage_timer.measure("png_rendering"):
+            generated_png_image = self._create_png_from_ascii(glyph_indices, color_matrix)
+
+        # Join the (colored, if enabled) ASCII lines with newlines for terminal display.
+        with self.stage_timer.measure("console_formatting"):
+            console_output = ("\n").join(self.format_console_lines(ascii_lines_for_display, color_matrix))
+
+        return generated_png_image, console_output
+
+    def to_art(self) -> AsciiArt:
+        """
+        Converts the processed image into ASCII art data, which can be saved in the
+        binary format and rendered again later without the source image.
+
+        Returns:
+            AsciiArt: The character set, glyph index matrix and, if color is enabled, color matrix.
+        """
+        with self.stage_timer.measure("glyph_mapping"):
+            glyph_indices = self.compute_glyph_indices()
+        with self.stage_timer.measure("color_extraction"):
+            color_matrix = self.compute_color_matrix() if self.enable_color else None
+        return AsciiArt(self.character_set, glyph_indices, color_matrix)
+
+    def format_console_lines(self, ascii_lines: list[str], color_matrix: np.ndarray = None) -> list[str]:
+        """
+        Formats ASCII lines for the console, adding ANSI color codes if color is enabled.
 
         Args:
-            char (str): The ASCII character to be colored.
-            rgb (tuple): A tuple containing the (Red, Green, Blue) color values for the character.
+            ascii_lines (list[str]): The ASCII art, one string per row.
+            color_matrix (np.ndarray): The (height, width, 3) RGB matrix of the same rows.
+                                       Only used if self.enable_color is True. Defaults to None.
+
+        Returns:
+            list[str]: The lines to print, one per row.
+        """
+        # In color mode, escape sequences are only emitted where the color changes.
+        return self.terminal_encoder.format_lines(ascii_lines, color_matrix if self.enable_color else None)
+
+    def convert_image_to_ascii(self) -> Image.Image:
+        """
+        Converts the processed image into ASCII art, printing it to the console
+        and returning a PIL Image object of the ASCII art.
 
         Returns:
-            str: The ANSI escape sequence string for the colored character.
+            Image.Image: A PIL Image object representing the ASCII art.
         """
-        r, g, b = rgb
-        # ANSI escape sequence for 24-bit true color: \x1b[38;2;R;G;Bm<character>\x1b[0m
-        # 38;2 indicates true color foreground, R;G;B are the color components.
-        # \x1b[0m resets the color to default.
-        return f"\x1b[38;2;{r};{g};{b}m{char}\x1b[0m"
\ No newline at end of file
+        generated_png_image, console_output = self.render()
+        # Print the ASCII art to the console, in a single write.
+        with self.stage_timer.measure("console_output"):
+            write_to_terminal(console_output + "\n\n")
+        return generated_png_image
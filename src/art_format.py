@@ -0,0 +1,350 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+from PIL import Image
+import numpy as np
+
+from dithering import DITHER_MODES
+from glyph_atlas import get_glyph_atlas
+from terminal import PALETTES, TerminalEncoder, write_to_terminal
+from tiled_render import TILED_RENDER_MIN_CELLS, TiledRenderer
+
+# Extension of ASCII art files.
+ART_EXTENSION = ".aart"
+
+# Magic bytes opening every ASCII art file, and the version of the layout.
+ART_MAGIC = b"ANSIIART"
+ART_FORMAT_VERSION = 1
+
+# Fixed-size header: magic, version, color encoding, compression, columns, rows,
+# character set size in bytes, palette entries, glyph section size, color section size.
+HEADER = struct.Struct("<8sHBBIIIIQQ")
+
+# How the colors of the cells are stored.
+COLOR_NONE = 0      # No colors: grayscale art.
+COLOR_RGB = 1       # One packed RGB triplet per cell.
+COLOR_PALETTE = 2   # Up to 256 distinct RGB triplets, then one uint8 palette index per cell.
+COLOR_ENCODINGS = ("auto", "rgb", "palette")
+
+# Sections start on multiples of this many bytes, so that mapped arrays are aligned.
+SECTION_ALIGNMENT = 8
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+
+
+class AsciiArt:
+    """
+    ASCII art as data rather than as text or pixels: the character set, a uint8
+    glyph index per cell and optionally an RGB color per cell. It can be saved
+    to and loaded from a compact binary file (see to_bytes for the layout), and
+    rendered again to the console or to a PNG in any palette or cell size,
+    without the source image.
+    """
+    def __init__(self, character_set: tuple[str, ...], glyph_indices: np.ndarray, color_matrix: np.ndarray = None):
+        """
+        Initializes the AsciiArt object.
+
+        Args:
+            character_set (tuple[str, ...]): The characters glyph indices refer to, at most 256.
+            glyph_indices (np.ndarray): A (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) uint8 matrix of RGB colors.
+                                       Defaults to None (grayscale art).
+        """
+        if len(character_set) > 256:
+            raise ValueError(f"At most 256 characters can be stored, got {len(character_set)}.")
+        if any(len(char) != 1 for char in character_set):
+            raise ValueError("Every entry of the character set must be a single character.")
+        self.character_set = tuple(character_set)
+        self.glyph_indices = glyph_indices
+        self.color_matrix = color_matrix
+        self.rows, self.columns = glyph_indices.shape
+        if color_matrix is not None and color_matrix.shape != (self.rows, self.columns, 3):
+            raise ValueError(f"Expected a {self.rows}x{self.columns}x3 color matrix, got {color_matrix.shape}.")
+
+    def lines(self) -> list[str]:
+        """
+        Returns the ASCII art, one string per row.
+        """
+        codepoint_table = np.array([ord(char) for char in self.character_set], dtype=np.uint32)
+        codepoint_matrix = np.ascontiguousarray(codepoint_table[self.glyph_indices])
+        # A row of `columns` UCS-4 code points has the same memory layout as a '<U{columns}' string.
+        return codepoint_matrix.view(f"<U{self.columns}").reshape(self.rows).tolist()
+
+    def to_console(self, color: bool = True, palette: str = "truecolor", dither: str = "none") -> str:
+        """
+        Formats the ASCII art for the console.
+
+        Args:
+            color (bool): If True and the art has colors, ANSI color codes are added. Defaults to True.
+            palette (str): The terminal palette of the color codes, see terminal.PALETTES. Defaults to "truecolor".
+            dither (str): How colors are dithered across the palette, see dithering.DITHER_MODES.
+                          Defaults to "none".
+
+        Returns:
+            str: The lines of the ASCII art joined with newlines, as Ansii.render() formats them.
+        """
+        color_matrix = self.color_matrix if color else None
+        return "\n".join(TerminalEncoder(palette, dither).format_lines(self.lines(), color_matrix))
+
+    def to_png(self, cell_size: tuple[int, int] = (12, 12), color: bool = True) -> Image.Image:
+        """
+        Renders the ASCII art to an image.
+
+        Args:
+            cell_size (tuple[int, int]): The (width, height) in pixels of each character. Defaults to 12x12.
+            color (bool): If True and the art has colors, glyphs are drawn in their colors. Defaults to True.
+
+        Returns:
+            Image.Image: The PIL RGB Image of the ASCII art, as Ansii.render() draws it.
+        """
+        atlas = get_glyph_atlas(self.character_set, tuple(cell_size))
+        color_matrix = self.color_matrix if color else None
+        if self.glyph_indices.size >= TILED_RENDER_MIN_CELLS:
+            return TiledRenderer(atlas).render(self.glyph_indices, color_matrix)
+        return atlas.render(self.glyph_indices, color_matrix)
+
+    def write_png(self, png_file, cell_size: tuple[int, int] = (12, 12), color: bool = True, workers: int = None):
+        """
+        Renders the ASCII art straight into a PNG file, band by band on several threads,
+        without ever holding the whole image (see tiled_render.TiledRenderer.write_png).
+
+        Args:
+            png_file: A binary file object receiving the PNG.
+            cell_size (tuple[int, int]): The (width, height) in pixels of each character. Defaults to 12x12.
+            color (bool): If True and the art has colors, glyphs are drawn in their colors. Defaults to True.
+            workers (int): The number of rendering threads. Defaults to None (the number of CPUs).
+        """
+        atlas = get_glyph_atlas(self.character_set, tuple(cell_size))
+        TiledRenderer(atlas, workers).write_png(png_file, self.glyph_indices, self.color_matrix if color else None)
+
+    def to_bytes(self, compress: bool = False, color_encoding: str = "auto") -> bytes:
+        """
+        Encodes the ASCII art in the binary format.
+
+        The layout is a fixed header (HEADER), the character set in UTF-8, the glyph
+        section (one uint8 per cell, row by row) and the color section: nothing,
+        one RGB triplet per cell, or a palette of RGB triplets followed by one uint8
+        palette index per cell. Each section starts on a multiple of SECTION_ALIGNMENT
+        bytes, and the glyph and color sections may each be compressed with zlib.
+
+        Args:
+            compress (bool): If True, the glyph and color sections are zlib-compressed. Defaults to False,
+                             which lets load map the arrays without copying them.
+            color_encoding (str): One of COLOR_ENCODINGS. "palette" requires at most 256 distinct colors,
+                                  and "auto" uses it whenever that is the case. Defaults to "auto".
+
+        Returns:
+            bytes: The encoded ASCII art.
+        """
+        if color_encoding not in COLOR_ENCODINGS:
+            raise ValueError(f"Unknown color encoding '{color_encoding}', "
+                             f"expected one of {', '.join(COLOR_ENCODINGS)}.")
+        glyph_section = np.ascontiguousarray(self.glyph_indices, dtype=np.uint8).tobytes()
+
+        encoding, palette_size, color_section = COLOR_NONE, 0, b""
+        if self.color_matrix is not None:
+            colors = np.asarray(self.color_matrix, dtype=np.uint32)
+            packed = (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+            palette, palette_indices = np.unique(packed, return_inverse=True)
+            if color_encoding == "palette" and len(palette) > 256:
+                raise ValueError(f"The art has {len(palette)} distinct colors, a palette holds at most 256.")
+            if color_encoding != "rgb" and len(palette) <= 256:
+                encoding, palette_size = COLOR_PALETTE, len(palette)
+                palette_colors = np.stack([palette >> 16, (palette >> 8) & 0xFF, palette & 0xFF], axis=1)
+                color_section = palette_colors.astype(np.uint8).tobytes() + palette_indices.astype(np.uint8).tobytes()
+            else:
+                encoding = COLOR_RGB
+                color_section = np.ascontiguousarray(self.color_matrix, dtype=np.uint8).tobytes()
+
+        compression = COMPRESSION_ZLIB if compress else COMPRESSION_NONE
+        if compress:
+            glyph_section = zlib.compress(glyph_section, 9)
+            color_section = zlib.compress(color_section, 9) if color_section else b""
+
+        character_set = "".join(self.character_set).encode("utf-8")
+        header = HEADER.pack(ART_MAGIC, ART_FORMAT_VERSION, encoding, compression, self.columns, self.rows,
+                             len(character_set), palette_size, len(glyph_section), len(color_section))
+        parts = []
+        offset = 0
+        for part in (header, character_set, glyph_section, color_section):
+            parts.append(b"\0" * (-offset % SECTION_ALIGNMENT))
+            offset += -offset % SECTION_ALIGNMENT
+            parts.append(part)
+            offset += len(part)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, buffer) -> "AsciiArt":
+        """
+        Decodes ASCII art encoded by to_bytes.
+
+        Args:
+            buffer: The encoded bytes, or any object exposing them through the buffer protocol (e.g. an mmap).
+                    Uncompressed arrays are views of the buffer, not copies.
+
+        Returns:
+            AsciiArt: The decoded ASCII art.
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError("Truncated ASCII art: the header is incomplete.")
+        (magic, version, encoding, compression, columns, rows, charset_size, palette_size,
+         glyph_size, color_size) = HEADER.unpack_from(buffer, 0)
+        if magic != ART_MAGIC:
+            raise ValueError("Not an ASCII art file.")
+        if version != ART_FORMAT_VERSION:
+            raise ValueError(f"Unsupported ASCII art format version {version}.")
+
+        charset_offset = _aligned(HEADER.size)
+        glyph_offset = _aligned(charset_offset + charset_size)
+        color_offset = _aligned(glyph_offset + glyph_size)
+        if len(buffer) < color_offset + color_size:
+            raise ValueError("Truncated ASCII art: a section is incomplete.")
+        character_set = tuple(bytes(buffer[charset_offset:charset_offset + charset_size]).decode("utf-8"))
+
+        def section(offset: int, size: int, expected_size: int) -> np.ndarray:
+            if compression == COMPRESSION_ZLIB:
+                data = np.frombuffer(zlib.decompress(buffer[offset:offset + size]), dtype=np.uint8)
+            else:
+                data = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset)
+            if data.size != expected_size:
+                raise ValueError("Corrupted ASCII art: a section does not match the dimensions.")
+            return data
+
+        glyph_indices = section(glyph_offset, glyph_size, rows * columns).reshape(rows, columns)
+        # Indices out of range would only fail later, deep in lines() or to_png().
+        if glyph_indices.size and glyph_indices.max() >= len(character_set):
+            raise ValueError("Corrupted ASCII art: a glyph index is outside of the character set.")
+        color_matrix = None
+        if encoding == COLOR_RGB:
+            color_matrix = section(color_offset, color_size, rows * columns * 3).reshape(rows, columns, 3)
+        elif encoding == COLOR_PALETTE:
+            data = section(color_offset, color_size, palette_size * 3 + rows * columns)
+            palette = data[:palette_size * 3].reshape(palette_size, 3)
+            palette_indices = data[palette_size * 3:].reshape(rows, columns)
+            if palette_indices.size and palette_indices.max() >= palette_size:
+                raise ValueError("Corrupted ASCII art: a color index is outside of the palette.")
+            color_matrix = palette[palette_indices]
+        elif encoding != COLOR_NONE:
+            raise ValueError(f"Unknown color encoding {encoding}.")
+        return cls(character_set, glyph_indices, color_matrix)
+
+    def save(self, path: str, compress: bool = False, color_encoding: str = "auto"):
+        """
+        Writes the ASCII art to a file, under a temporary name first so that readers never see a partial file.
+
+        Args:
+            path (str): The path of the file, usually ending with ART_EXTENSION.
+            compress (bool): If True, the sections are zlib-compressed. Defaults to False.
+            color_encoding (str): One of COLOR_ENCODINGS. Defaults to "auto".
+        """
+        data = self.to_bytes(compress, color_encoding)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                                           suffix=ART_EXTENSION + ".tmp")
+        with os.fdopen(file_descriptor, "wb") as art_file:
+            art_file.write(data)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AsciiArt":
+        """
+        Reads ASCII art from a file. The file is memory-mapped, so an uncompressed
+        file is not read beyond the pages its arrays actually touch.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            AsciiArt: The ASCII art. Its arrays are read-only.
+        """
+        with open(path, "rb") as art_file:
+            if os.fstat(art_file.fileno()).st_size == 0:
+                raise ValueError("Not an ASCII art file: it is empty.")
+            file_map = mmap.mmap(art_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # The arrays keep the map alive for as long as they are used.
+        return cls.from_bytes(file_map)
+
+
+def _aligned(offset: int) -> int:
+    """
+    Rounds an offset up to the next multiple of SECTION_ALIGNMENT.
+    """
+    return offset + (-offset % SECTION_ALIGNMENT)
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the 'art' mode: saves the ASCII art of an image in the binary
+    format, or renders a saved file again to the console, a text file or a PNG.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'art'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+    from ansii import Ansii, ASCII_WIDTH, CELL_SIZE, GLYPH_MODES, parse_cell_size
+
+    parser = argparse.ArgumentParser(prog="main.py art", description="Save and render ASCII art files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = commands.add_parser("save", help="Convert an image and save its ASCII art.")
+    save_parser.add_argument("image", help="The image to convert.")
+    save_parser.add_argument("--out", help=f"The file to write (defaults to the image name with {ART_EXTENSION}).")
+    save_parser.add_argument("--color", action="store_true", help="Store the color of every character.")
+    save_parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                             help=f"Number of characters per row (default {ASCII_WIDTH}).")
+    save_parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                             help="Size in pixels of each character cell, which shape glyphs are matched at, "
+                                  "as WIDTHxHEIGHT or a single number.")
+    save_parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                             help="Choose characters by cell brightness (intensity) or by glyph shape (shape).")
+    save_parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                             help="Dither intensities across the characters (intensity glyphs only).")
+    save_parser.add_argument("--compress", action="store_true", help="Compress the file with zlib.")
+    save_parser.add_argument("--colors", choices=COLOR_ENCODINGS, default="auto",
+                             help="How colors are stored (default auto: a palette when there are at most 256).")
+
+    render_parser = commands.add_parser("render", help="Render a saved ASCII art file.")
+    render_parser.add_argument("art", help=f"The {ART_EXTENSION} file to render.")
+    render_parser.add_argument("--png", help="Write the rendered image to this file.")
+    render_parser.add_argument("--text", help="Write the console output to this file instead of the terminal.")
+    render_parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                               help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    render_parser.add_argument("--palette", choices=PALETTES, default="truecolor",
+                               help="Terminal palette of the console output (default truecolor).")
+    render_parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                               help="Dither the stored colors across the palette (256 and 16 colors only).")
+    render_parser.add_argument("--no-color", action="store_true", help="Ignore the stored colors.")
+    options = parser.parse_args(arguments)
+
+    try:
+        if options.command == "save":
+            with Image.open(options.image) as image:
+                art = Ansii(image, options.color, ascii_width=options.width, cell_size=options.cell_size,
+                            glyph_mode=options.glyphs, dither=options.dither).to_art()
+            out_path = options.out or os.path.splitext(options.image)[0] + ART_EXTENSION
+            art.save(out_path, options.compress, options.colors)
+            print(f"Saved {art.columns}x{art.rows} ASCII art to '{out_path}' ({os.path.getsize(out_path)} bytes).")
+            return 0
+
+        art = AsciiArt.load(options.art)
+        color = not options.no_color
+        if options.png:
+            with open(options.png, "wb") as png_file:
+                art.write_png(png_file, options.cell_size, color)
+        console_output = art.to_console(color, options.palette, options.dither)
+        if options.text:
+            with open(options.text, "w", encoding="utf-8") as text_file:
+                text_file.write(console_output + "\n")
+        elif not options.png:
+            write_to_terminal(console_output + "\n")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,239 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+# Only the conversion code is imported here: worker processes import this module
+# to run _convert_one, and must never pay for (or require) tkinter.
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE, GLYPH_MODES, parse_cell_size
+from art_format import ART_EXTENSION
+from cache import ConversionCache, file_digest
+from dithering import DITHER_MODES
+from glyph_index import check_shape_cell_size
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE, RESAMPLE_FILTERS
+
+# File extensions picked up when a directory is given as the batch source.
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".ppm"}
+
+# The conversion cache of the current worker process, set up by _init_worker.
+_worker_cache = None
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the headless batch mode. Converts every image matched by the
+    source directory or glob pattern in a pool of worker processes, writes the
+    PNG and text outputs, and reports throughput and failures.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'batch'.
+
+    Returns:
+        int: The process exit status, 0 if every image was converted and 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Convert many images to ASCII art.")
+    parser.add_argument("source", help="A directory of images or a glob pattern such as 'images/*.png'.")
+    parser.add_argument("--out", required=True, help="Directory where the outputs are written.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (defaults to the number of CPUs).")
+    parser.add_argument("--color", action="store_true", help="Generate colored ASCII art.")
+    parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                        help="Choose characters by cell brightness (intensity) or by glyph shape (shape).")
+    parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                        help="Dither intensities across the characters (intensity glyphs only).")
+    parser.add_argument("--resample", choices=RESAMPLE_FILTERS, default=DEFAULT_RESAMPLE,
+                        help=f"Filter resampling the image to the character grid (default {DEFAULT_RESAMPLE}).")
+    parser.add_argument("--cell-aspect", type=float, default=DEFAULT_CELL_ASPECT,
+                        help="Height of a character cell divided by its width, e.g. 2 for terminal fonts.")
+    parser.add_argument("--cache-dir", help="Directory of a conversion cache shared by the workers and "
+                                            "reused by later runs over the same inputs.")
+    parser.add_argument("--art", action="store_true",
+                        help=f"Also save the ASCII art data of each image as a compressed '{ART_EXTENSION}' file, "
+                             "which 'main.py art render' renders again in any style.")
+    options = parser.parse_args(arguments)
+    if options.glyphs == "shape":
+        # Checked here rather than failing every conversion in the workers.
+        try:
+            check_shape_cell_size(options.cell_size)
+        except ValueError as error:
+            parser.error(str(error))
+
+    image_paths = _collect_image_paths(options.source)
+    if not image_paths:
+        print(f"Error: No images found for '{options.source}'.")
+        return 1
+    os.makedirs(options.out, exist_ok=True)
+
+    # Images whose outputs would still overwrite each other are reported instead of converted.
+    stems = output_stems(image_paths, _source_root(options.source))
+    image_paths_by_stem = {}
+    for image_path in image_paths:
+        image_paths_by_stem.setdefault(os.path.normcase(stems[image_path]), []).append(image_path)
+    failures = [(image_path, f"Its outputs would overwrite those of '{other_paths[0]}'.")
+                for other_paths in image_paths_by_stem.values() for image_path in other_paths[1:]]
+    image_paths = [other_paths[0] for other_paths in image_paths_by_stem.values()]
+
+    cached_count = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=options.workers, initializer=_init_worker,
+                             initargs=(options.cache_dir,)) as executor:
+        pending = {
+            executor.submit(_convert_one, image_path, os.path.join(options.out, stems[image_path]), options.color,
+                            options.width, options.cell_size, options.glyphs, options.art,
+                            options.dither, options.resample, options.cell_aspect): image_path
+            for image_path in image_paths
+        }
+        for future in as_completed(pending):
+            error, served_from_cache = future.result()
+            if error is not None:
+                failures.append((pending[future], error))
+            elif served_from_cache:
+                cached_count += 1
+    elapsed_seconds = time.perf_counter() - start_time
+
+    image_count = len(stems)
+    converted_count = image_count - len(failures)
+    print(f"Converted {converted_count}/{image_count} images in {elapsed_seconds:.2f}s "
+          f"({converted_count / elapsed_seconds:.2f} images/s) with {options.workers} workers.")
+    if options.cache_dir is not None:
+        print(f"Served {cached_count} images from the cache in '{options.cache_dir}'.")
+    for image_path, error in sorted(failures):
+        print(f"Failed: '{image_path}': {error}")
+    return 1 if failures else 0
+
+
+def _collect_image_paths(source: str) -> list[str]:
+    """
+    Lists the images to convert.
+
+    Args:
+        source (str): A directory (all images directly inside it are used) or a glob pattern.
+
+    Returns:
+        list[str]: The sorted image paths.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+        )
+    return sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+
+
+def _source_root(source: str) -> str:
+    """
+    Returns the directory the images of a source are named relative to: the directory
+    itself, or the part of a glob pattern before its first wildcard.
+    """
+    if os.path.isdir(source):
+        return source
+    root = os.path.dirname(source)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root or os.curdir
+
+
+def output_stems(image_paths: list[str], root: str) -> dict:
+    """
+    Names the outputs of images so that they do not overwrite each other.
+
+    The outputs of an image keep its path relative to the source root, so that images
+    of different subdirectories (found by a recursive glob) stay apart, without the
+    extension of the image. Images which would then share a name, such as 'x.png' and
+    'x.jpg', keep their extension instead: 'x.png.txt' and 'x.jpg.txt'.
+
+    Args:
+        image_paths (list[str]): The paths of the images.
+        root (str): The directory the paths are named relative to.
+
+    Returns:
+        dict: The path of the outputs of every image, relative to the output directory
+              and without extension, keyed by image path.
+    """
+    relative_paths = {image_path: os.path.relpath(image_path, root) for image_path in image_paths}
+    # Compared as the file system does, which may ignore case.
+    stem_counts = {}
+    for relative_path in relative_paths.values():
+        stem = os.path.normcase(os.path.splitext(relative_path)[0])
+        stem_counts[stem] = stem_counts.get(stem, 0) + 1
+    stems = {}
+    for image_path, relative_path in relative_paths.items():
+        stem = os.path.splitext(relative_path)[0]
+        stems[image_path] = stem if stem_counts[os.path.normcase(stem)] == 1 else relative_path
+    return stems
+
+
+def _init_worker(cache_dir: str):
+    """
+    Sets up the conversion cache of a worker process.
+
+    Args:
+        cache_dir (str): The directory of the on-disk cache, or None to disable caching.
+    """
+    global _worker_cache
+    _worker_cache = ConversionCache(cache_dir=cache_dir) if cache_dir is not None else None
+
+
+def _convert_one(image_path: str, output_stem: str, color: bool, ascii_width: int = ASCII_WIDTH,
+                 cell_size: tuple[int, int] = CELL_SIZE, glyph_mode: str = "intensity",
+                 save_art: bool = False, dither: str = "none", resample: str = DEFAULT_RESAMPLE,
+                 cell_aspect: float = DEFAULT_CELL_ASPECT) -> tuple[str, bool]:
+    """
+    Converts a single image and writes '<output_stem>.png' and '<output_stem>.txt', and
+    '<output_stem>.aart' if requested. Runs inside a worker process.
+
+    Args:
+        image_path (str): The path of the image to convert.
+        output_stem (str): The path of the outputs without extension (see output_stems).
+        color (bool): If True, the ASCII art is colored.
+        ascii_width (int): The number of characters per row. Defaults to ASCII_WIDTH.
+        cell_size (tuple[int, int]): The size in pixels of each rendered character. Defaults to CELL_SIZE.
+        glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+        save_art (bool): If True, the ASCII art data is saved too (see art_format). Defaults to False.
+        dither (str): How intensities are dithered, see dithering.DITHER_MODES. Defaults to "none".
+        resample (str): The resampling filter, see resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+        cell_aspect (float): The height of a character cell divided by its width. Defaults to DEFAULT_CELL_ASPECT.
+
+    Returns:
+        tuple[str, bool]: None on success, otherwise a description of the error,
+                          and whether the conversion was served from the cache.
+    """
+    served_from_cache = False
+    try:
+        os.makedirs(os.path.dirname(output_stem) or os.curdir, exist_ok=True)
+        result = None
+        if save_art:
+            # The art data is not cached: it is converted once, and the outputs are rendered from it.
+            with Image.open(image_path) as image:
+                art = Ansii(image, color, ascii_width=ascii_width, cell_size=cell_size,
+                            glyph_mode=glyph_mode, dither=dither, resample=resample, cell_aspect=cell_aspect).to_art()
+            art.save(output_stem + ART_EXTENSION, compress=True)
+            result = art.to_png(cell_size), art.to_console()
+        elif _worker_cache is not None:
+            # Hashing the file is enough to find a cached conversion, without decoding the image.
+            cache_key = _worker_cache.make_key(file_digest(image_path), color, ascii_width, cell_size,
+                                             glyph_mode, dither, resample, cell_aspect)
+            result = _worker_cache.get(cache_key)
+            served_from_cache = result is not None
+        if result is None:
+            with Image.open(image_path) as image:
+                result = Ansii(image, color, ascii_width=ascii_width, cell_size=cell_size,
+                               glyph_mode=glyph_mode, dither=dither, resample=resample,
+                               cell_aspect=cell_aspect).render()
+            if _worker_cache is not None:
+                _worker_cache.put(cache_key, result)
+        png_image, console_output = result
+
+        png_image.save(output_stem + ".png")
+        with open(output_stem + ".txt", "w", encoding="utf-8") as text_file:
+            text_file.write(console_output + "\n")
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", served_from_cache
+    return None, served_from_cache
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE
+
+# Evicting from disk scans the whole cache directory, so each scan removes this fraction of
+# max_disk_entries more than needed: the next scan is only due after as many new entries.
+DISK_EVICTION_HEADROOM = 0.1
+
+
+def file_digest(path: str) -> str:
+    """
+    Computes a digest of the raw bytes of a file, which avoids decoding the image
+    when only a cache lookup is needed.
+
+    Args:
+        path (str): The path of the file to hash.
+
+    Returns:
+        str: A hexadecimal digest of the file content.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class ConversionCache:
+    """
+    Caches ASCII art conversions keyed by the image content and the render
+    parameters, so that converting the same image twice is served without
+    recomputation. Results live in an in-memory LRU tier and, if a cache
+    directory is given, in an on-disk tier shared between processes and runs.
+    A cache can be used from several threads at once.
+    """
+    def __init__(self, max_entries: int = 32, cache_dir: str = None, max_disk_entries: int = 4096):
+        """
+        Initializes the ConversionCache object.
+
+        Args:
+            max_entries (int): The maximum number of results kept in memory. Defaults to 32.
+            cache_dir (str): An optional directory for the on-disk tier. Defaults to None (memory only).
+            max_disk_entries (int): The maximum number of results kept on disk. Defaults to 4096.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (PNG image, console output), least recently used first.
+        self._lock = threading.Lock()  # Guards the in-memory tier and the counters.
+
+        # Counters describing how the cache has been used.
+        self.hits = 0          # Served from memory.
+        self.disk_hits = 0     # Served from disk.
+        self.misses = 0        # Not cached, left to the caller to convert.
+        self.evictions = 0     # Entries dropped from either tier to respect the size bounds.
+
+        # Entries of the on-disk tier, counted once here and then kept up to date by this process.
+        # Other processes sharing the directory are only noticed by the eviction scans.
+        self._disk_entries = 0
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_entries = sum(1 for entry in os.scandir(self.cache_dir) if entry.name.endswith(".txt"))
+
+    def make_key(self, digest: str, color: bool, ascii_width: int = ASCII_WIDTH,
+                 cell_size: tuple[int, int] = CELL_SIZE, glyph_mode: str = "intensity", dither: str = "none",
+                 resample: str = DEFAULT_RESAMPLE, cell_aspect: float = DEFAULT_CELL_ASPECT) -> str:
+        """
+        Builds the cache key of a conversion.
+
+        Args:
+            digest (str): The digest of the image content (see file_digest).
+            color (bool): If True, the key is for colored ASCII art.
+            ascii_width (int): The number of ASCII characters per row. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The size of each character in the PNG. Defaults to CELL_SIZE.
+            glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+            dither (str): How intensities are dithered, see dithering.DITHER_MODES. Defaults to "none".
+            resample (str): The resampling filter, see resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+            cell_aspect (float): The height of a character cell divided by its width. Defaults to
+                                 DEFAULT_CELL_ASPECT.
+
+        Returns:
+            str: A key combining the content digest with every parameter affecting the output.
+        """
+        # The character set of the mode is part of the key, so changing it invalidates old entries.
+        character_set = "".join(Ansii.character_set_of(glyph_mode))
+        parameters = f"{digest}|{ascii_width}|{glyph_mode}:{character_set}|{int(color)}|{cell_size[0]}x{cell_size[1]}|{dither}|{resample}|{cell_aspect!r}"
+        return hashlib.blake2b(parameters.encode(), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> tuple[Image.Image, str]:
+        """
+        Looks a key up in memory, then on disk.
+
+        Args:
+            key (str): A key built by make_key.
+
+        Returns:
+            tuple[Image.Image, str]: The cached result, or None if the key is not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        result = self._read_from_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        if result is not None:
+            self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: tuple[Image.Image, str]):
+        """
+        Stores a result in every tier of the cache.
+
+        Args:
+            key (str): A key built by make_key.
+            result (tuple[Image.Image, str]): The PNG image and the console output.
+        """
+        self._remember(key, result)
+        self._write_to_disk(key, result)
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The hit, disk hit, miss and eviction counts and the number of entries in memory.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+    def _remember(self, key: str, result: tuple[Image.Image, str]):
+        """
+        Adds a result to the in-memory tier, evicting the least recently used entries if needed.
+        """
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_paths(self, key: str) -> tuple[str, str]:
+        """
+        Returns the paths of the PNG and text files of a key in the on-disk tier.
+        """
+        stem = os.path.join(self.cache_dir, key)
+        return stem + ".png", stem + ".txt"
+
+    def _read_from_disk(self, key: str) -> tuple[Image.Image, str]:
+        """
+        Loads a result from the on-disk tier.
+
+        Returns:
+            tuple[Image.Image, str]: The cached result, or None if it is not on disk.
+        """
+        if self.cache_dir is None:
+            return None
+        png_path, text_path = self._disk_paths(key)
+        try:
+            with open(text_path, encoding="utf-8") as text_file:
+                console_output = text_file.read()
+            with Image.open(png_path) as png_image:
+                png_image.load()
+            # Touch the entry so that disk eviction also follows a least recently used order.
+            os.utime(text_path)
+        except OSError:
+            # Missing, or evicted by another process while being read.
+            return None
+        return png_image, console_output
+
+    def _write_to_disk(self, key: str, result: tuple[Image.Image, str]):
+        """
+        Saves a result to the on-disk tier. Files are written under a temporary name
+        and renamed, so concurrent readers never see a partial entry.
+        """
+        if self.cache_dir is None:
+            return
+        png_image, console_output = result
+        png_path, text_path = self._disk_paths(key)
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".png.tmp")
+        with os.fdopen(file_descriptor, "wb") as png_file:
+            png_image.save(png_file, format="PNG")
+        os.replace(temporary_path, png_path)
+
+        # The text file is written last: its presence marks the entry as complete.
+        is_new_entry = not os.path.exists(text_path)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".txt.tmp")
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as text_file:
+            text_file.write(console_output)
+        os.replace(temporary_path, text_path)
+
+        with self._lock:
+            self._disk_entries += is_new_entry
+            must_evict = self._disk_entries > self.max_disk_entries
+        if must_evict:
+            self._evict_from_disk()
+
+    def _evict_from_disk(self):
+        """
+        Deletes the least recently used entries of the on-disk tier, leaving
+        DISK_EVICTION_HEADROOM of max_disk_entries free.
+        """
+        text_entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".txt"):
+                try:
+                    text_entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass  # Evicted by another process in the meantime.
+        kept_count = min(len(text_entries), int(self.max_disk_entries * (1 - DISK_EVICTION_HEADROOM)))
+        text_entries.sort()
+        for _, text_path in text_entries[:len(text_entries) - kept_count]:
+            for path in (text_path, text_path[:-len(".txt")] + ".png"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._disk_entries = kept_count
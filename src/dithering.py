@@ -0,0 +1,178 @@
+import numpy as np
+
+# Dithering modes: "none" quantizes every value on its own, "bayer" adds an ordered
+# threshold pattern before quantizing, and the other modes diffuse the quantization
+# error of each value onto its neighbours.
+DITHER_MODES = ("none", "bayer", "floyd-steinberg", "atkinson")
+
+# Error diffusion kernels: (row offset, column offset, share of the error) of each neighbour.
+# Atkinson only diffuses 6/8 of the error, which keeps more contrast.
+ERROR_DIFFUSION_KERNELS = {
+    "floyd-steinberg": ((0, 1, 7 / 16), (1, -1, 3 / 16), (1, 0, 5 / 16), (1, 1, 1 / 16)),
+    "atkinson": ((0, 1, 1 / 8), (0, 2, 1 / 8), (1, -1, 1 / 8), (1, 0, 1 / 8), (1, 1, 1 / 8), (2, 0, 1 / 8)),
+}
+
+# Columns a kernel may reach on each side, and rows below, which the error buffer is padded with.
+KERNEL_REACH = 2
+
+# Values are 8-bit intensities or channels. Diffused errors are clipped to this range, so
+# that a large flat area at an extreme cannot pile up error that nothing can absorb.
+MAX_VALUE = 255
+
+
+def bayer_matrix(order: int = 3) -> np.ndarray:
+    """
+    Builds the Bayer ordered dithering matrix of size 2^order.
+
+    Args:
+        order (int): The log2 of the matrix size. Defaults to 3 (8x8).
+
+    Returns:
+        np.ndarray: A (2^order, 2^order) float32 matrix of thresholds evenly spread over [-0.5, 0.5).
+    """
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    for _ in range(order):
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return ((matrix + 0.5) / matrix.size - 0.5).astype(np.float32)
+
+
+# The 8x8 Bayer matrix, tiled over the image by ordered dithering.
+BAYER_MATRIX = bayer_matrix(3)
+
+
+def ordered_offsets(shape: tuple[int, int]) -> np.ndarray:
+    """
+    Tiles BAYER_MATRIX over an image.
+
+    Args:
+        shape (tuple[int, int]): The (height, width) of the image.
+
+    Returns:
+        np.ndarray: A (height, width) float32 array of thresholds in [-0.5, 0.5).
+    """
+    height, width = shape
+    size = BAYER_MATRIX.shape[0]
+    return np.tile(BAYER_MATRIX, (-(-height // size), -(-width // size)))[:height, :width]
+
+
+def diffuse_errors(values: np.ndarray, quantize, kernel: tuple) -> np.ndarray:
+    """
+    Quantizes an image with error diffusion.
+
+    Error diffusion is sequential by nature: a value can only be quantized once the
+    errors of the values before it have been spread onto it. Every kernel only
+    reaches one column back on the next rows, so the value at (row, column) only
+    depends on values with a smaller column + 2 * row. The image is therefore swept
+    along those skewed diagonals, and each diagonal (up to one value per row) is
+    quantized and spread in one array operation instead of value by value, which
+    takes columns + 2 * rows steps in all.
+
+    Args:
+        values (np.ndarray): A (height, width, channels) float array of values.
+        quantize: A function mapping a (count, channels) float array to the codes of the
+                  nearest levels and the (count, channels) values of those levels.
+        kernel (tuple): An entry of ERROR_DIFFUSION_KERNELS.
+
+    Returns:
+        np.ndarray: The (height, width) array of codes.
+    """
+    height, width, channels = values.shape
+    padded_width = width + 2 * KERNEL_REACH
+    # Errors received by every value, padded so that the kernel never falls outside of the
+    # buffer. Buffers are flattened so that a diagonal is addressed by a single index array.
+    errors = np.zeros(((height + KERNEL_REACH) * padded_width, channels), dtype=np.float32)
+    flat_values = np.ascontiguousarray(values, dtype=np.float32).reshape(-1, channels)
+    codes = np.zeros(height * width, dtype=np.int32)
+    # Offset of each neighbour within the flattened error buffer.
+    kernel_offsets = [(row_offset * padded_width + column_offset, np.float32(share))
+                      for row_offset, column_offset, share in kernel]
+    all_rows = np.arange(height)
+    for step in range(width + 2 * (height - 1)):
+        # Rows whose column step - 2 * row is inside the image.
+        first_row = max(0, -(-(step - width + 1) // 2))
+        last_row = min(height - 1, step // 2)
+        rows = all_rows[first_row:last_row + 1]
+        columns = step - 2 * rows
+        value_index = rows * width + columns
+        error_index = rows * padded_width + columns + KERNEL_REACH
+
+        wanted = flat_values[value_index] + errors[error_index]
+        np.clip(wanted, 0, MAX_VALUE, out=wanted)
+        step_codes, quantized = quantize(wanted)
+        codes[value_index] = step_codes
+        residual = wanted - quantized
+        # Each target of a diagonal is a different cell, so plain fancy-index updates are safe.
+        for offset, share in kernel_offsets:
+            errors[error_index + offset] += residual * share
+    return codes.reshape(height, width)
+
+
+def dither_levels(intensities: np.ndarray, step: int, level_count: int, mode: str) -> np.ndarray:
+    """
+    Quantizes intensities to evenly spaced levels, level k holding the intensities
+    from k * step to (k + 1) * step and the last level everything above. Without
+    dithering this is intensity // step (see ansii.INTENSITY_TO_GLYPH_INDEX).
+
+    Args:
+        intensities (np.ndarray): A (height, width) array of intensities from 0 to 255.
+        step (int): The width of each level.
+        level_count (int): The number of levels.
+        mode (str): One of DITHER_MODES.
+
+    Returns:
+        np.ndarray: A (height, width) uint8 array of levels.
+    """
+    # The intensity each level stands for: the middle of its range, except black and
+    # white for the darkest and lightest levels, so that flat black and white areas stay flat.
+    level_values = (np.arange(level_count) + 0.5) * step
+    level_values[0], level_values[-1] = 0, MAX_VALUE
+
+    def quantize(wanted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        levels = np.minimum(wanted // step, level_count - 1).astype(np.int32)
+        return levels[..., 0], level_values[levels]
+
+    if mode == "none":
+        return quantize(np.asarray(intensities)[..., np.newaxis])[0].astype(np.uint8)
+    if mode == "bayer":
+        values = np.asarray(intensities, dtype=np.float32)
+        # Each intensity lies between two level values; the threshold pattern picks the upper
+        # one in proportion to how close the intensity is to it.
+        lower = np.clip(np.searchsorted(level_values, values, side="right") - 1, 0, level_count - 2)
+        fraction = (values - level_values[lower]) / (level_values[lower + 1] - level_values[lower])
+        return (lower + (fraction > ordered_offsets(values.shape) + 0.5)).astype(np.uint8)
+    if mode in ERROR_DIFFUSION_KERNELS:
+        values = np.asarray(intensities, dtype=np.float32)[..., np.newaxis]
+        return diffuse_errors(values, quantize, ERROR_DIFFUSION_KERNELS[mode]).astype(np.uint8)
+    raise ValueError(f"Unknown dither mode '{mode}', expected one of {', '.join(DITHER_MODES)}.")
+
+
+def dither_colors(color_matrix: np.ndarray, palette_colors: np.ndarray, nearest_codes, mode: str,
+                  spread: float) -> np.ndarray:
+    """
+    Quantizes colors to the codes of a palette.
+
+    Args:
+        color_matrix (np.ndarray): A (height, width, 3) array of RGB colors.
+        palette_colors (np.ndarray): A (code count, 3) array of the RGB color of every code.
+        nearest_codes: A function mapping a (..., 3) array of colors to the codes of the nearest palette colors.
+        mode (str): One of DITHER_MODES.
+        spread (float): The typical distance between neighbouring palette colors on one channel,
+                        which sets the amplitude of ordered dithering.
+
+    Returns:
+        np.ndarray: A (height, width) array of palette codes.
+    """
+    colors = np.asarray(color_matrix, dtype=np.float32)
+    if mode == "none":
+        return nearest_codes(np.asarray(color_matrix))
+    if mode == "bayer":
+        # Shifting every channel by up to half the palette spacing either way turns a color
+        # between palette colors into a pattern mixing them.
+        offsets = ordered_offsets(colors.shape[:2])[..., np.newaxis] * spread
+        return nearest_codes(np.clip(np.rint(colors + offsets), 0, MAX_VALUE))
+    if mode in ERROR_DIFFUSION_KERNELS:
+        def quantize(wanted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            codes = nearest_codes(np.rint(wanted))
+            return codes, palette_colors[codes]
+        return diffuse_errors(colors, quantize, ERROR_DIFFUSION_KERNELS[mode])
+    raise ValueError(f"Unknown dither mode '{mode}', expected one of {', '.join(DITHER_MODES)}.")
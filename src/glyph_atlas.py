@@ -0,0 +1,298 @@
+import math
+from functools import lru_cache
+
+from PIL import Image
+import numpy as np
+
+
+class GlyphAtlas:
+    """
+    Pre-rasterizes every character of a character set once and composes ASCII art
+    images from those rasterized glyphs with array operations, instead of asking
+    the font engine to draw every single cell.
+    """
+    def __init__(self, character_set: tuple[str, ...], cell_size: tuple[int, int] = (12, 12)):
+        """
+        Initializes the GlyphAtlas object and rasterizes the character set.
+
+        Args:
+            character_set (tuple[str, ...]): The characters to rasterize. Glyph indices used
+                                             when rendering refer to positions in this tuple.
+            cell_size (tuple[int, int]): The (width, height) in pixels of one character cell.
+                                         Defaults to 12x12.
+        """
+        self.character_set = tuple(character_set)
+        self.cell_width, self.cell_height = cell_size
+        # Glyphs may ink outside of their own cell (e.g. the tail of ',', or whole glyphs
+        # in cells smaller than the font), so each glyph is rasterized into a tile with
+        # a margin around the cell, wide enough for the ink of the whole set.
+        self.margin = self._measure_margin()
+        self.coverage_masks = self._rasterize_glyphs()
+        self._trim_margin()
+        # The number of neighbouring (rows, columns) of cells the ink of a cell can reach.
+        self.reach = (math.ceil(self.margin / self.cell_height), math.ceil(self.margin / self.cell_width))
+        self._passes = self._split_tiles()
+
+    def _measure_margin(self) -> int:
+        """
+        Measures how far outside of its cell the font may ink any glyph of the set.
+
+        Returns:
+            int: The margin in pixels, with a little slack; _trim_margin reduces it to the ink actually drawn.
+        """
+        # ImageDraw (and the font machinery behind it) is only loaded once an atlas is actually built.
+        from PIL import ImageDraw
+
+        canvas = ImageDraw.Draw(Image.new("L", (1, 1)))
+        margin = 0
+        for char in self.character_set:
+            left, top, right, bottom = canvas.textbbox((0, 0), char)
+            margin = max(margin, -left, -top, right - self.cell_width, bottom - self.cell_height)
+        return margin + 2
+
+    def _rasterize_glyphs(self) -> np.ndarray:
+        """
+        Draws each glyph once, with the same default font used by ImageDraw.text,
+        and records its coverage (0 = no ink, 255 = full ink).
+
+        Returns:
+            np.ndarray: A (glyph count, tile height, tile width) uint8 array of coverage masks.
+        """
+        tile_width = self.cell_width + 2 * self.margin
+        tile_height = self.cell_height + 2 * self.margin
+        from PIL import ImageDraw
+
+        masks = np.zeros((len(self.character_set), tile_height, tile_width), dtype=np.uint8)
+        for glyph_index, char in enumerate(self.character_set):
+            # Drawing full intensity on a black 'L' tile yields the antialiased coverage directly.
+            tile = Image.new("L", (tile_width, tile_height), color=0)
+            ImageDraw.Draw(tile).text((self.margin, self.margin), char, fill=255)
+            masks[glyph_index] = np.asarray(tile)
+        return masks
+
+    def _trim_margin(self):
+        """
+        Shrinks the margin to the widest overflow actually inked by any glyph, so
+        that rendering does not blend rows and columns of empty coverage.
+        """
+        cell_top = cell_left = self.margin
+        cell_bottom = self.margin + self.cell_height
+        cell_right = self.margin + self.cell_width
+        inked_rows = np.flatnonzero(self.coverage_masks.any(axis=(0, 2)))
+        inked_columns = np.flatnonzero(self.coverage_masks.any(axis=(0, 1)))
+        if inked_rows.size == 0:
+            needed_margin = 0
+        else:
+            needed_margin = max(
+                cell_top - inked_rows[0], inked_rows[-1] + 1 - cell_bottom,
+                cell_left - inked_columns[0], inked_columns[-1] + 1 - cell_right, 0
+            )
+        trim = self.margin - needed_margin
+        if trim > 0:
+            self.coverage_masks = np.ascontiguousarray(self.coverage_masks[:, trim:-trim, trim:-trim])
+            self.margin = needed_margin
+
+    def _split_tiles(self) -> list[tuple]:
+        """
+        Cuts the tiles of the glyphs into cell-sized pieces, one per cell the ink of a glyph can reach.
+
+        Drawing the characters one after the other, row by row, blends each pixel with
+        the ink of every cell reaching it in that order: first the cells of the rows above,
+        and within a row first the cells on the left. Blending, for every cell at once, the
+        piece of its tile falling (row offset, column offset) cells away, by decreasing row
+        offset and then decreasing column offset, follows the same order for every pixel,
+        while the pieces of one pass never overlap.
+
+        Returns:
+            list[tuple]: The passes, in blending order: the (row offset, column offset) of the piece,
+                         its (top, bottom, left, right) box of ink within the cell, and the
+                         (glyph count, box height, box width) coverage of the box.
+        """
+        reach_rows, reach_columns = self.reach
+        # Pad the tiles to whole cells around the glyph's own cell.
+        pad_top = reach_rows * self.cell_height - self.margin
+        pad_left = reach_columns * self.cell_width - self.margin
+        tiles = np.pad(self.coverage_masks, ((0, 0), (pad_top, pad_top), (pad_left, pad_left)))
+        tiles = tiles.reshape(len(self.character_set), 2 * reach_rows + 1, self.cell_height,
+                              2 * reach_columns + 1, self.cell_width)
+
+        passes = []
+        for row_offset in range(reach_rows, -reach_rows - 1, -1):
+            for column_offset in range(reach_columns, -reach_columns - 1, -1):
+                piece = tiles[:, reach_rows + row_offset, :, reach_columns + column_offset]
+                inked_rows = np.flatnonzero(piece.any(axis=(0, 2)))
+                inked_columns = np.flatnonzero(piece.any(axis=(0, 1)))
+                if inked_rows.size == 0:
+                    continue
+                top, bottom = inked_rows[0], inked_rows[-1] + 1
+                left, right = inked_columns[0], inked_columns[-1] + 1
+                passes.append(((row_offset, column_offset), (top, bottom, left, right),
+                               np.ascontiguousarray(piece[:, top:bottom, left:right])))
+        return passes
+
+    def render(self, glyph_indices: np.ndarray, color_matrix: np.ndarray = None) -> Image.Image:
+        """
+        Composes an image of the ASCII art from the rasterized glyphs.
+
+        Every cell is blended onto a white background with the same integer
+        arithmetic Pillow uses when drawing text, and in the same order, so the
+        output matches drawing each character with ImageDraw.text, even where
+        the glyphs of neighbouring cells overlap.
+
+        Args:
+            glyph_indices (np.ndarray): A (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) uint8 matrix of RGB colors,
+                                       one per cell. If None, glyphs are drawn in black.
+
+        Returns:
+            Image.Image: A PIL RGB Image of the ASCII art.
+        """
+        return Image.fromarray(self.render_array(glyph_indices, color_matrix), "RGB")
+
+    def render_array(self, glyph_indices: np.ndarray, color_matrix: np.ndarray = None) -> np.ndarray:
+        """
+        Composes the pixels of the ASCII art from the rasterized glyphs (see render).
+
+        Args:
+            glyph_indices (np.ndarray): A (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) uint8 matrix of RGB colors,
+                                       one per cell. If None, glyphs are drawn in black.
+
+        Returns:
+            np.ndarray: The (height, width, 3) uint8 RGB pixels of the ASCII art.
+        """
+        rows, columns = glyph_indices.shape
+        reach_rows, reach_columns = self.reach
+
+        # Work on a white canvas with room for the cells reached on every side, so that
+        # ink spilling over the image border fits before the canvas is cropped to the final size.
+        # uint16 is enough for the blend: out * (255 - a) + ink * a never exceeds 255 * 255 + 128.
+        canvas = np.full(((rows + 2 * reach_rows) * self.cell_height, (columns + 2 * reach_columns) * self.cell_width, 3),
+                         255, dtype=np.uint16)
+        # The canvas as a grid of cells: (rows, cell height, columns, cell width, 3).
+        cells = canvas.reshape(rows + 2 * reach_rows, self.cell_height, columns + 2 * reach_columns, self.cell_width, 3)
+
+        if color_matrix is None:
+            ink = np.zeros((rows, columns, 3), dtype=np.uint16)
+        else:
+            ink = np.asarray(color_matrix, dtype=np.uint16)
+        # (rows, 1, columns, 1, 3), to broadcast over the pixels of each cell.
+        cell_ink = ink[:, np.newaxis, :, np.newaxis]
+
+        for (row_offset, column_offset), (top, bottom, left, right), pieces in self._passes:
+            first_row, first_column = reach_rows + row_offset, reach_columns + column_offset
+            targets = cells[first_row:first_row + rows, top:bottom, first_column:first_column + columns, left:right]
+            # (rows, piece height, columns, piece width, 1) coverage.
+            coverage = pieces[glyph_indices].transpose(0, 2, 1, 3)[..., np.newaxis].astype(np.uint16)
+            # Same fixed-point blend as Pillow's text drawing: (out * (255 - a) + ink * a) / 255.
+            blended = targets * (255 - coverage) + cell_ink * coverage + 128
+            targets[...] = ((blended >> 8) + blended) >> 8
+
+        top, left = reach_rows * self.cell_height, reach_columns * self.cell_width
+        canvas = canvas[top:top + rows * self.cell_height, left:left + columns * self.cell_width]
+        return canvas.astype(np.uint8)
+
+    def render_region(self, glyph_indices: np.ndarray, color_matrix: np.ndarray,
+                      top: int, bottom: int, left: int, right: int) -> np.ndarray:
+        """
+        Renders the pixels of a rectangle of cells of a grid, exactly as they are in the render of the whole grid.
+
+        The rectangle is rendered with the cells around it whose ink can reach it
+        (see reach) as context; the blending order of a pixel only depends on the
+        cells reaching it, so the context renders it exactly as the whole grid does.
+
+        Args:
+            glyph_indices (np.ndarray): The (rows, columns) glyph index matrix of the whole grid.
+            color_matrix (np.ndarray): The (rows, columns, 3) uint8 colors of the whole grid, or None for black glyphs.
+            top (int): The first row of the rectangle.
+            bottom (int): The row after the last row of the rectangle.
+            left (int): The first column of the rectangle.
+            right (int): The column after the last column of the rectangle.
+
+        Returns:
+            np.ndarray: The ((bottom - top) * cell height, (right - left) * cell width, 3) uint8 RGB pixels.
+        """
+        rows, columns = glyph_indices.shape
+        reach_rows, reach_columns = self.reach
+        context_top = max(top - reach_rows, 0)
+        context_left = max(left - reach_columns, 0)
+        context_bottom = min(bottom + reach_rows, rows)
+        context_right = min(right + reach_columns, columns)
+        context_colors = None
+        if color_matrix is not None:
+            context_colors = color_matrix[context_top:context_bottom, context_left:context_right]
+        context = self.render_array(glyph_indices[context_top:context_bottom, context_left:context_right],
+                                    context_colors)
+        region_top = (top - context_top) * self.cell_height
+        region_left = (left - context_left) * self.cell_width
+        return context[region_top:region_top + (bottom - top) * self.cell_height,
+                       region_left:region_left + (right - left) * self.cell_width]
+
+    def redraw(self, pixels: np.ndarray, glyph_indices: np.ndarray, color_matrix: np.ndarray,
+               changed_cells: np.ndarray) -> int:
+        """
+        Updates pixels rendered by render_array after some cells changed glyph or color,
+        recomposing only the areas around those cells. The result is identical to
+        rendering the new grid from scratch.
+
+        A cell's tile can spill ink into its neighbours, so the area of every changed
+        cell and of the neighbours its ink reaches is recomposed. Those areas are grouped into
+        rectangles, each rendered on its own with render_region.
+
+        Args:
+            pixels (np.ndarray): The (height, width, 3) uint8 pixels of the previous grid, modified in place.
+            glyph_indices (np.ndarray): The new (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): The new (rows, columns, 3) uint8 colors, or None for black glyphs.
+            changed_cells (np.ndarray): A (rows, columns) boolean matrix of the cells that changed.
+
+        Returns:
+            int: The number of cells whose area was recomposed.
+        """
+        rows, columns = glyph_indices.shape
+        reach_rows, reach_columns = self.reach
+        dirty_cells = changed_cells
+        if reach_rows or reach_columns:
+            padded = np.pad(changed_cells, ((reach_rows, reach_rows), (reach_columns, reach_columns)))
+            dirty_cells = np.zeros_like(changed_cells)
+            for row_offset in range(2 * reach_rows + 1):
+                for column_offset in range(2 * reach_columns + 1):
+                    dirty_cells |= padded[row_offset:row_offset + rows, column_offset:column_offset + columns]
+
+        redrawn_cells = 0
+        for top, bottom in _true_runs(dirty_cells.any(axis=1)):
+            for left, right in _true_runs(dirty_cells[top:bottom].any(axis=0)):
+                pixels[top * self.cell_height:bottom * self.cell_height,
+                       left * self.cell_width:right * self.cell_width] = \
+                    self.render_region(glyph_indices, color_matrix, top, bottom, left, right)
+                redrawn_cells += (bottom - top) * (right - left)
+        return redrawn_cells
+
+
+def _true_runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """
+    Finds the runs of consecutive True values of a boolean vector.
+
+    Args:
+        mask (np.ndarray): A 1-D boolean array.
+
+    Returns:
+        list[tuple[int, int]]: The (start, end) of each run, end excluded.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+@lru_cache(maxsize=None)
+def get_glyph_atlas(character_set: tuple[str, ...], cell_size: tuple[int, int] = (12, 12)) -> GlyphAtlas:
+    """
+    Returns the glyph atlas for a character set and cell size, rasterizing it
+    only the first time it is requested.
+
+    Args:
+        character_set (tuple[str, ...]): The characters to rasterize.
+        cell_size (tuple[int, int]): The (width, height) in pixels of one character cell.
+
+    Returns:
+        GlyphAtlas: The shared atlas for these parameters.
+    """
+    return GlyphAtlas(character_set, cell_size)
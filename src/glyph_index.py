@@ -0,0 +1,162 @@
+from functools import lru_cache
+
+from PIL import Image
+import numpy as np
+
+from glyph_atlas import get_glyph_atlas
+
+# The characters available to shape matching: every printable ASCII character,
+# including the space, so that each image cell can pick the glyph whose shape
+# fits it best rather than only the one with the closest overall darkness.
+SHAPE_CHARACTER_SET = tuple(chr(code_point) for code_point in range(32, 127))
+
+# The (columns, rows) of sub-cells each character cell is described by.
+FEATURE_GRID = (3, 3)
+
+# Number of cells matched per matrix product, which bounds the size of the distance matrix.
+MATCH_CHUNK_CELLS = 1 << 16
+
+
+class GlyphIndex:
+    """
+    Describes every glyph of a character set by its ink coverage in each sub-cell
+    of a small grid, and finds the glyph whose shape best matches a cell of an
+    image. The glyph features are computed once; matching a whole image is then
+    a single matrix product against them instead of a search per cell.
+    """
+    def __init__(self, character_set: tuple[str, ...], cell_size: tuple[int, int] = (12, 12),
+                 grid: tuple[int, int] = FEATURE_GRID):
+        """
+        Initializes the GlyphIndex object and computes the glyph features.
+
+        Args:
+            character_set (tuple[str, ...]): The characters to choose from. Matched indices
+                                             refer to positions in this tuple.
+            cell_size (tuple[int, int]): The (width, height) in pixels of one character cell.
+                                         Defaults to 12x12.
+            grid (tuple[int, int]): The (columns, rows) of sub-cells describing each cell.
+                                    Defaults to FEATURE_GRID.
+        """
+        self.character_set = tuple(character_set)
+        self.grid = tuple(grid)
+        cell_width, cell_height = cell_size
+
+        # The glyphs are rasterized by the atlas shared with the PNG renderer.
+        atlas = get_glyph_atlas(self.character_set, tuple(cell_size))
+        margin = atlas.margin
+        coverage = atlas.coverage_masks[:, margin:margin + cell_height, margin:margin + cell_width] / 255.0
+
+        # The font usually inks only part of the cell (the default font is about half
+        # as wide as a 12x12 cell), so the grid spans the box inked by the whole set:
+        # that box is what a cell of the image is compared against.
+        inked_rows = np.flatnonzero(coverage.any(axis=(0, 2)))
+        inked_columns = np.flatnonzero(coverage.any(axis=(0, 1)))
+        if inked_rows.size:
+            coverage = coverage[:, inked_rows[0]:inked_rows[-1] + 1, inked_columns[0]:inked_columns[-1] + 1]
+        box_height, box_width = coverage.shape[1:]
+        if not (1 <= self.grid[0] <= box_width and 1 <= self.grid[1] <= box_height):
+            raise ValueError(f"A {self.grid[0]}x{self.grid[1]} grid does not fit in {box_width}x{box_height} glyphs.")
+
+        # Mean coverage of each sub-cell; the boundaries spread any remainder pixels across the grid.
+        grid_columns, grid_rows = self.grid
+        row_starts = np.linspace(0, box_height, grid_rows + 1).astype(int)
+        column_starts = np.linspace(0, box_width, grid_columns + 1).astype(int)
+        sums = np.add.reduceat(np.add.reduceat(coverage, row_starts[:-1], axis=1), column_starts[:-1], axis=2)
+        areas = np.outer(np.diff(row_starts), np.diff(column_starts))
+        features = (sums / areas).reshape(len(self.character_set), grid_rows * grid_columns)
+
+        # Even the densest glyph only inks part of its cell, so the features are
+        # stretched for the densest sub-cell of the set to stand for solid black.
+        densest = features.max()
+        self.features = (features / densest if densest > 0 else features).astype(np.float32)
+        self._squared_norms = (self.features ** 2).sum(axis=1)
+
+    def cell_features(self, image: Image.Image, columns: int, rows: int) -> np.ndarray:
+        """
+        Describes each cell of an image the same way the glyphs are described.
+
+        Args:
+            image (Image.Image): The PIL Image object to describe.
+            columns (int): The number of character cells per row.
+            rows (int): The number of character rows.
+
+        Returns:
+            np.ndarray: A (rows, columns, sub-cells) float32 array of darkness, from 0 (white) to 1 (black).
+        """
+        grid_columns, grid_rows = self.grid
+        # A box filter averages exactly the source pixels falling in each sub-cell.
+        luminance = image.convert("L").resize((columns * grid_columns, rows * grid_rows), Image.BOX)
+        darkness = 1.0 - np.asarray(luminance, dtype=np.float32) / 255.0
+        darkness = darkness.reshape(rows, grid_rows, columns, grid_columns).transpose(0, 2, 1, 3)
+        return darkness.reshape(rows, columns, grid_rows * grid_columns)
+
+    def match(self, cell_features: np.ndarray) -> np.ndarray:
+        """
+        Finds the nearest glyph (in Euclidean distance) to each cell.
+
+        Args:
+            cell_features (np.ndarray): A (..., sub-cells) array, as returned by cell_features.
+
+        Returns:
+            np.ndarray: An array of glyph indices with the shape of cell_features minus its last axis.
+        """
+        flat_features = cell_features.reshape(-1, self.features.shape[1]).astype(np.float32, copy=False)
+        glyph_indices = np.empty(flat_features.shape[0], dtype=np.uint8 if len(self.character_set) <= 256 else np.int32)
+        for start in range(0, flat_features.shape[0], MATCH_CHUNK_CELLS):
+            chunk = flat_features[start:start + MATCH_CHUNK_CELLS]
+            # |cell - glyph|^2 = |cell|^2 - 2 cell.glyph + |glyph|^2, and |cell|^2 is the same for every glyph.
+            distances = self._squared_norms - 2.0 * (chunk @ self.features.T)
+            glyph_indices[start:start + MATCH_CHUNK_CELLS] = distances.argmin(axis=1)
+        return glyph_indices.reshape(cell_features.shape[:-1])
+
+    def match_image(self, image: Image.Image, columns: int, rows: int) -> np.ndarray:
+        """
+        Chooses the glyph of every cell of an image.
+
+        Args:
+            image (Image.Image): The PIL Image object to convert.
+            columns (int): The number of character cells per row.
+            rows (int): The number of character rows.
+
+        Returns:
+            np.ndarray: A (rows, columns) matrix of indices into the character set.
+        """
+        return self.match(self.cell_features(image, columns, rows))
+
+
+@lru_cache(maxsize=None)
+def get_glyph_index(character_set: tuple[str, ...], cell_size: tuple[int, int] = (12, 12),
+                    grid: tuple[int, int] = FEATURE_GRID) -> GlyphIndex:
+    """
+    Returns the glyph index for a character set, cell size and grid, computing
+    it only the first time it is requested.
+
+    Args:
+        character_set (tuple[str, ...]): The characters to choose from.
+        cell_size (tuple[int, int]): The (width, height) in pixels of one character cell.
+        grid (tuple[int, int]): The (columns, rows) of sub-cells describing each cell.
+
+    Returns:
+        GlyphIndex: The shared index for these parameters.
+    """
+    return GlyphIndex(character_set, cell_size, grid)
+
+
+def check_shape_cell_size(cell_size: tuple[int, int]):
+    """
+    Validates the cell size of shape matching, whose feature grid must fit in the box
+    the glyphs ink within a cell. The index is built (and cached) for the check, so the
+    conversion that follows finds it ready.
+
+    Args:
+        cell_size (tuple[int, int]): The (width, height) in pixels of one character cell.
+
+    Raises:
+        ValueError: If the cells are too small to describe the glyphs on FEATURE_GRID.
+    """
+    try:
+        get_glyph_index(SHAPE_CHARACTER_SET, tuple(cell_size))
+    except ValueError:
+        raise ValueError(f"Cells of {cell_size[0]}x{cell_size[1]} pixels are too small for shape glyphs: the part "
+                         f"the glyphs ink must hold their {FEATURE_GRID[0]}x{FEATURE_GRID[1]} feature grid. "
+                         "Use larger cells.") from None
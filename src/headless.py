@@ -0,0 +1,96 @@
+import sys
+
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE
+from art_format import AsciiArt
+from image_input import load_image
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE
+
+
+def convert(path: str, color: bool = False, ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE,
+            glyph_mode: str = "intensity", dither: str = "none", resample: str = DEFAULT_RESAMPLE,
+            cell_aspect: float = DEFAULT_CELL_ASPECT) -> AsciiArt:
+    """
+    Converts an image file to ASCII art without loading anything GUI related.
+
+    Importing this module only loads NumPy, the core of Pillow and the conversion
+    code. The drawing modules are loaded when a PNG is first rendered (see
+    GlyphAtlas), and tkinter never is, so short-lived jobs and display-less
+    servers only pay for what they use. In intensity mode the image is decoded
+    for the ASCII width only (see image_input.load_image).
+
+    Args:
+        path (str): The path of the image file.
+        color (bool): If True, the color of every character is kept. Defaults to False.
+        ascii_width (int): The number of ASCII characters per row. Defaults to ASCII_WIDTH.
+        cell_size (tuple[int, int]): The (width, height) in pixels of each character, which
+                                     shape matching depends on. Defaults to CELL_SIZE.
+        glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+        dither (str): How intensities are dithered, see dithering.DITHER_MODES. Defaults to "none".
+        resample (str): The filter resampling the image to the character grid, see
+                        resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+        cell_aspect (float): The height of a character cell divided by its width. Defaults to
+                             DEFAULT_CELL_ASPECT.
+
+    Returns:
+        AsciiArt: The ASCII art, with lines(), to_console() and to_png() to render it.
+    """
+    # Shape matching samples the source at a finer resolution than one pixel per character.
+    target_width = ascii_width if glyph_mode == "intensity" else None
+    with load_image(path, target_width, resample, cell_aspect) as image:
+        return Ansii(image, color, ascii_width=ascii_width, cell_size=tuple(cell_size), glyph_mode=glyph_mode,
+                     dither=dither, resample=resample, cell_aspect=cell_aspect).to_art()
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the 'convert' mode: converts one image and prints it, or writes
+    it to text and PNG files, with the shortest possible startup.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'convert'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+    from ansii import GLYPH_MODES, parse_cell_size
+    from dithering import DITHER_MODES
+    from resampling import RESAMPLE_FILTERS
+    from terminal import PALETTES, write_to_terminal
+
+    parser = argparse.ArgumentParser(prog="main.py convert", description="Convert one image to ASCII art.")
+    parser.add_argument("image", help="The image to convert.")
+    parser.add_argument("--color", action="store_true", help="Generate colored ASCII art.")
+    parser.add_argument("--palette", choices=PALETTES, default="truecolor",
+                        help="Terminal palette of the colored output.")
+    parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                        help="Choose characters by cell brightness (intensity) or by glyph shape (shape).")
+    parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                        help="Dither intensities across the characters and colors across the palette.")
+    parser.add_argument("--resample", choices=RESAMPLE_FILTERS, default=DEFAULT_RESAMPLE,
+                        help=f"Filter resampling the image to the character grid (default {DEFAULT_RESAMPLE}).")
+    parser.add_argument("--cell-aspect", type=float, default=DEFAULT_CELL_ASPECT,
+                        help="Height of a character cell divided by its width, e.g. 2 for terminal fonts.")
+    parser.add_argument("--text", help="Write the console output to this file instead of the terminal.")
+    parser.add_argument("--png", help="Write a PNG of the ASCII art to this file.")
+    options = parser.parse_args(arguments)
+
+    try:
+        art = convert(options.image, options.color, options.width, options.cell_size, options.glyphs, options.dither,
+                      options.resample, options.cell_aspect)
+        if options.png:
+            art.to_png(options.cell_size).save(options.png)
+        console_output = art.to_console(palette=options.palette, dither=options.dither)
+        if options.text:
+            with open(options.text, "w", encoding="utf-8") as text_file:
+                text_file.write(console_output + "\n")
+        elif not options.png:
+            write_to_terminal(console_output + "\n")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
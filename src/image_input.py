@@ -0,0 +1,481 @@
+import math
+import mmap
+import os
+
+from PIL import Image
+import numpy as np
+
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE, PILLOW_FILTERS, ascii_output_height, integral_factors
+
+# Raw pixel layouts that can be mapped: the mode they are exposed as, the bytes
+# per pixel in the file and the order of the file channels within the mode
+# (None when it is already the mode's order).
+RAW_LAYOUTS = {
+    "L": ("L", 1, None),
+    "RGB": ("RGB", 3, None),
+    "BGR": ("RGB", 3, (2, 1, 0)),
+    "RGBA": ("RGBA", 4, None),
+    "RGBX": ("RGB", 4, (0, 1, 2)),
+    "BGRA": ("RGBA", 4, (2, 1, 0, 3)),
+    "BGRX": ("RGB", 4, (2, 1, 0)),
+}
+
+# Modes of NumPy (.npy) pixel files, by number of channels.
+NPY_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+
+# Number of source rows read at a time when a mapped image is resized.
+MAPPED_BAND_ROWS = 256
+
+# Half width, in source pixels at scale 1, of the convolution filters of Image.resize.
+FILTER_SUPPORTS = {
+    Image.Resampling.BOX: 0.5,
+    Image.Resampling.BILINEAR: 1.0,
+    Image.Resampling.BICUBIC: 2.0,
+    Image.Resampling.LANCZOS: 3.0,
+}
+
+# Fractional bits of the fixed-point weights Image.resize blends 8-bit channels with.
+PRECISION_BITS = 22
+
+# Modes that Image.resize premultiplies by alpha while resampling, and the premultiplied mode it uses.
+PREMULTIPLIED_MODES = {"RGBA": "RGBa", "LA": "La"}
+
+
+def narrow_band(band: Image.Image, width: int, resample: int = Image.Resampling.BICUBIC) -> np.ndarray:
+    """
+    Resizes a band of rows horizontally only, as the first pass of a resize.
+
+    Image.resize runs its horizontal pass one row at a time, so narrowing bands
+    of rows separately and then running the vertical pass once on the narrowed
+    rows (see finish_resize) gives exactly the same result as resizing the whole
+    image, while only ever holding one band at full width.
+
+    Args:
+        band (Image.Image): A horizontal band of the source image.
+        width (int): The width of the result.
+        resample (int): The Pillow filter of the resize. Defaults to bicubic.
+
+    Returns:
+        np.ndarray: The (rows, width) or (rows, width, channels) uint8 narrowed rows, premultiplied
+                    by alpha for the modes of PREMULTIPLIED_MODES, as Image.resize does internally
+                    with every filter but nearest.
+    """
+    if band.mode in PREMULTIPLIED_MODES and resample != Image.Resampling.NEAREST:
+        band = band.convert(PREMULTIPLIED_MODES[band.mode])
+    return np.asarray(band.resize((width, band.height), resample, box=(0, 0, band.width, band.height)))
+
+
+def _filter_weights(resample: int, x: np.ndarray) -> np.ndarray:
+    """
+    Evaluates a convolution filter of Image.resize, with the same floating-point
+    operations as Pillow, so that the weights are bit for bit the same.
+    """
+    if resample == Image.Resampling.BOX:
+        return np.where((x > -0.5) & (x <= 0.5), 1.0, 0.0)
+    if resample == Image.Resampling.BILINEAR:
+        x = np.abs(x)
+        return np.where(x < 1.0, 1.0 - x, 0.0)
+    if resample == Image.Resampling.BICUBIC:
+        # Pillow's bicubic filter, with a = -0.5.
+        x = np.abs(x)
+        return np.where(x < 1.0, (1.5 * x - 2.5) * x * x + 1,
+                        np.where(x < 2.0, (((x - 5) * x + 8) * x - 4) * -0.5, 0.0))
+
+    # Lanczos: sinc(x) * sinc(x / 3), with the sines of the C library Pillow uses.
+    def sinc(value: float) -> float:
+        if value == 0.0:
+            return 1.0
+        value = value * math.pi
+        return math.sin(value) / value
+
+    return np.array([sinc(value) * sinc(value / 3) if -3.0 <= value < 3.0 else 0.0
+                     for value in x.ravel().tolist()]).reshape(x.shape)
+
+
+def iter_vertical_taps(source_height: int, height: int, band_rows: int,
+                       resample: int = Image.Resampling.BICUBIC):
+    """
+    Computes the source rows and the weights Image.resize blends into each output
+    row in its vertical pass, exactly as Pillow computes them, one band of output
+    rows at a time.
+
+    Args:
+        source_height (int): The number of rows of the source image.
+        height (int): The number of rows of the result.
+        band_rows (int): The number of output rows per band.
+        resample (int): The Pillow filter of the resize. Defaults to bicubic.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray]: For each band, the first source row of each of its output rows,
+                                       and the (rows, taps) int32 fixed-point weights of the source
+                                       rows from there on (0 past the rows an output row blends).
+    """
+    scale = source_height / height
+    if resample == Image.Resampling.NEAREST:
+        # Pillow steps through the source with a running sum, whose rounding is kept here.
+        position = scale * 0.5
+        for top in range(0, height, band_rows):
+            first_rows = np.empty(min(band_rows, height - top), dtype=np.int64)
+            for row in range(len(first_rows)):
+                first_rows[row] = int(position)
+                position += scale
+            yield first_rows, np.full((len(first_rows), 1), 1 << PRECISION_BITS, dtype=np.int32)
+        return
+
+    filter_scale = max(scale, 1.0)
+    support = FILTER_SUPPORTS[resample] * filter_scale
+    taps = np.arange(math.ceil(support) * 2 + 1)
+    for top in range(0, height, band_rows):
+        centers = (np.arange(top, min(top + band_rows, height)) + 0.5) * scale
+        # Truncation towards zero, as the C casts do.
+        first_rows = np.maximum((centers - support + 0.5).astype(np.int64), 0)
+        counts = np.minimum((centers + support + 0.5).astype(np.int64), source_height) - first_rows
+        positions = (first_rows[:, np.newaxis] + taps - centers[:, np.newaxis] + 0.5) * (1.0 / filter_scale)
+        weights = np.where(taps < counts[:, np.newaxis], _filter_weights(resample, positions), 0.0)
+        # Pillow normalizes by the sum accumulated in order, which cumsum reproduces (adding 0.0 changes nothing).
+        totals = np.cumsum(weights, axis=1)[:, -1:]
+        weights = np.divide(weights, totals, out=weights, where=totals != 0.0)
+        fixed = weights * (1 << PRECISION_BITS)
+        yield first_rows, np.where(weights < 0, fixed - 0.5, fixed + 0.5).astype(np.int32)
+
+
+def finish_resize(narrow_rows: np.ndarray, mode: str, first_rows: np.ndarray, weights: np.ndarray,
+                  resample: int = Image.Resampling.BICUBIC) -> Image.Image:
+    """
+    Runs the vertical pass of a resize on rows produced by narrow_band, with the
+    fixed-point arithmetic of Image.resize, so that every output row is the same
+    whichever rows around it are resized along.
+
+    Args:
+        narrow_rows (np.ndarray): The narrowed rows covering the output rows.
+        mode (str): The mode of the source image.
+        first_rows (np.ndarray): The first row of narrow_rows blended into each output row (see iter_vertical_taps).
+        weights (np.ndarray): The (output rows, taps) fixed-point weights of the rows from there on.
+        resample (int): The Pillow filter of the resize, the one narrow_band used. Defaults to bicubic.
+
+    Returns:
+        Image.Image: The resized rows, in the source mode.
+    """
+    # Taps past the end of the rows only ever have a weight of 0.
+    rows = np.minimum(first_rows[:, np.newaxis] + np.arange(weights.shape[1]), len(narrow_rows) - 1)
+    tapped_rows = narrow_rows.reshape(len(narrow_rows), -1)[rows].astype(np.int32)
+    # int32 holds the sums, as it does in Pillow: the weights of a row add up to 1 << PRECISION_BITS.
+    sums = np.einsum("rt,rtp->rp", weights, tapped_rows) + (1 << (PRECISION_BITS - 1))
+    pixels = np.clip(sums >> PRECISION_BITS, 0, 255).astype(np.uint8).reshape((len(first_rows),) + narrow_rows.shape[1:])
+
+    # The rows are premultiplied by alpha if narrow_band premultiplied them.
+    resampling_mode = PREMULTIPLIED_MODES.get(mode, mode) if resample != Image.Resampling.NEAREST else mode
+    resized_image = Image.frombuffer(resampling_mode, (pixels.shape[1], pixels.shape[0]), pixels,
+                                     "raw", resampling_mode, 0, 1)
+    return resized_image.convert(mode) if resampling_mode != mode else resized_image
+
+
+def resize_bands(bands, source_height: int, size: tuple[int, int], band_rows: int,
+                 resample: int = Image.Resampling.BICUBIC):
+    """
+    Resizes an image read as successive horizontal bands, producing the result band by band.
+
+    Each source band is narrowed as soon as it is read (see narrow_band), and each band
+    of output rows is resized vertically (see finish_resize) as soon as the narrowed rows
+    it blends have been read. Only those rows are kept: rows above the first one the next
+    output row blends are dropped, so memory is bounded by a band, whatever the image height.
+
+    Args:
+        bands: An iterable of the successive horizontal bands of the source image, all in the same mode.
+        source_height (int): The total number of rows of the source image.
+        size (tuple[int, int]): The (width, height) of the result.
+        band_rows (int): The number of output rows produced at a time.
+        resample (int): The Pillow filter of the resize. Defaults to bicubic.
+
+    Yields:
+        Image.Image: Successive bands of band_rows rows of the result (fewer for the last one),
+                     identical to the same rows of a resize of the whole image.
+    """
+    width, height = size
+    band_taps = iter_vertical_taps(source_height, height, band_rows, resample)
+    first_rows, weights = next(band_taps)   # Those of the next band of output rows.
+
+    window = None       # Narrowed source rows from window_top on.
+    window_top = 0
+    rows_read = 0
+    next_row = 0        # First output row not produced yet.
+    for band in bands:
+        narrowed_band = narrow_band(band, width, resample)
+        window = narrowed_band if window is None else np.concatenate((window, narrowed_band))
+        rows_read += len(narrowed_band)
+
+        # Produce every band of output rows whose source rows have all been read.
+        while next_row < height and min(first_rows[-1] + weights.shape[1], source_height) <= rows_read:
+            yield finish_resize(window, band.mode, first_rows - window_top, weights, resample)
+            next_row += len(first_rows)
+            first_rows, weights = next(band_taps, (None, None))
+
+        # Rows above the first row of the next output row are never needed again.
+        if next_row < height:
+            dropped_rows = min(int(first_rows[0]), rows_read) - window_top
+            if dropped_rows > 0:
+                window = window[dropped_rows:]
+                window_top += dropped_rows
+
+
+class MappedImage:
+    """
+    An 8-bit image whose pixels are memory-mapped straight from an uncompressed
+    file (PPM/PGM, uncompressed BMP, single-strip TIFF or NumPy .npy) instead of
+    being decoded into memory. Only the rows actually being processed are paged
+    in, and rows read band by band are released again once their band has been
+    handed out, so even multi-hundred-megapixel files are read in bounded memory.
+    """
+    def __init__(self, path: str, offset: int, size: tuple[int, int], bytes_per_pixel: int, stride: int,
+                 orientation: int, mode: str, channel_order: tuple[int, ...] = None):
+        """
+        Initializes the MappedImage object and maps the file.
+
+        Args:
+            path (str): The path of the file.
+            offset (int): The position of the first stored row in the file.
+            size (tuple[int, int]): The (width, height) of the image.
+            bytes_per_pixel (int): The number of bytes (channels) of each stored pixel.
+            stride (int): The number of bytes between the starts of two stored rows.
+            orientation (int): 1 if rows are stored top to bottom, -1 if bottom to top.
+            mode (str): The Pillow mode the pixels are exposed as: "L", "RGB" or "RGBA".
+            channel_order (tuple[int, ...]): The stored channels making up the mode, in order.
+                                             Defaults to None (stored order is the mode order).
+        """
+        self.size = size
+        self.mode = mode
+        self.channel_order = channel_order
+        self._offset = offset
+        self._stride = stride
+        self._orientation = orientation
+        with open(path, "rb") as source_file:
+            self._file_map = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        width, height = size
+        # A read-only view of the pixels, with channels in stored order.
+        pixels = np.ndarray((height, width, bytes_per_pixel), dtype=np.uint8, buffer=self._file_map,
+                            offset=offset, strides=(stride, bytes_per_pixel, 1))
+        if orientation < 0:
+            pixels = pixels[::-1]
+        self.pixels = pixels[..., 0] if bytes_per_pixel == 1 else pixels
+
+    def band(self, top: int, bottom: int) -> Image.Image:
+        """
+        Reads a horizontal band of rows.
+
+        Args:
+            top (int): The first row of the band.
+            bottom (int): The row after the last row of the band.
+
+        Returns:
+            Image.Image: The band. Only the band is copied into memory.
+        """
+        rows = self.pixels[top:bottom]
+        if self.channel_order is not None:
+            rows = rows[..., list(self.channel_order)]
+        # The array shape alone identifies the mode: (h, w) is L, (h, w, 3) RGB and (h, w, 4) RGBA.
+        return Image.fromarray(np.array(rows))
+
+    def iter_bands(self, band_rows: int = MAPPED_BAND_ROWS):
+        """
+        Reads the image from top to bottom, releasing the pages of each band once it has been read.
+
+        Args:
+            band_rows (int): The number of rows per band. Defaults to MAPPED_BAND_ROWS.
+
+        Yields:
+            Image.Image: Successive horizontal bands of the image.
+        """
+        height = self.size[1]
+        for top in range(0, height, band_rows):
+            bottom = min(top + band_rows, height)
+            band = self.band(top, bottom)
+            self._release_rows(top, bottom)
+            yield band
+
+    def _release_rows(self, top: int, bottom: int):
+        """
+        Tells the system the file pages holding rows top to bottom are not needed any more, so
+        that they stop counting towards the memory of the process. They are read again from
+        the file if they are accessed later.
+        """
+        if not hasattr(self._file_map, "madvise") or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        height = self.size[1]
+        first_stored_row, end_stored_row = (top, bottom) if self._orientation > 0 else (height - bottom, height - top)
+        start = self._offset + first_stored_row * self._stride
+        end = self._offset + end_stored_row * self._stride
+        # madvise works on whole pages; only the pages entirely inside the rows are released.
+        start = -(-start // mmap.PAGESIZE) * mmap.PAGESIZE
+        end = min(end, len(self._file_map)) // mmap.PAGESIZE * mmap.PAGESIZE
+        if end > start:
+            self._file_map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def resize(self, size: tuple[int, int], band_rows: int = MAPPED_BAND_ROWS,
+               resample: str = DEFAULT_RESAMPLE) -> Image.Image:
+        """
+        Resizes the image, reading it band by band. The result is identical to
+        resizing the whole image with resampling.resize_cells (see resize_bands).
+
+        Args:
+            size (tuple[int, int]): The (width, height) of the result.
+            band_rows (int): The number of source rows read at a time. Defaults to MAPPED_BAND_ROWS.
+            resample (str): One of resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+
+        Returns:
+            Image.Image: The resized image.
+        """
+        width, height = size
+        source_height = self.size[1]
+        if resample == "area":
+            factors = integral_factors(self.size, size)
+            if factors is not None:
+                return self._reduce(factors, band_rows)
+            # Any other area average is what the box filter computes.
+            pillow_filter = Image.Resampling.BOX
+        else:
+            pillow_filter = PILLOW_FILTERS[resample]
+
+        # Output bands covering about as many source rows as a source band.
+        output_band_rows = max(band_rows * height // source_height, 1)
+        resized_image = Image.new(self.mode, size)
+        top = 0
+        for resized_band in resize_bands(self.iter_bands(band_rows), source_height, size, output_band_rows,
+                                         pillow_filter):
+            resized_image.paste(resized_band, (0, top))
+            top += resized_band.height
+        return resized_image
+
+    def _reduce(self, factors: tuple[int, int], band_rows: int) -> Image.Image:
+        """
+        Shrinks the image by integral factors, averaging blocks of pixels. Bands hold
+        whole blocks, and every block is averaged on its own, so reducing band by
+        band gives exactly the same result as reducing the whole image.
+
+        Args:
+            factors (tuple[int, int]): The (horizontal, vertical) reduction factors.
+            band_rows (int): The approximate number of source rows read at a time, rounded to whole blocks.
+
+        Returns:
+            Image.Image: The reduced image.
+        """
+        block_rows = max(band_rows // factors[1], 1) * factors[1]
+        reduced_bands = [np.asarray(band.reduce(factors)) for band in self.iter_bands(block_rows)]
+        return Image.fromarray(np.concatenate(reduced_bands), self.mode)
+
+    def to_image(self) -> Image.Image:
+        """
+        Copies the whole image into a regular PIL Image.
+        """
+        return self.band(0, self.size[1])
+
+
+def map_image(path: str) -> MappedImage:
+    """
+    Memory-maps the pixels of an image file when they are stored uncompressed.
+
+    Args:
+        path (str): The path of the image file.
+
+    Returns:
+        MappedImage: The mapped image, or None if the file has to be decoded by Pillow.
+    """
+    if os.path.splitext(path)[1].lower() == ".npy":
+        return _map_npy(path)
+    try:
+        image = Image.open(path)
+    except OSError:
+        return None
+    with image:
+        tile = image.tile
+        if len(tile) != 1 or tile[0][0] != "raw" or tile[0][1] != (0, 0) + image.size:
+            return None
+        _, _, offset, arguments = tile[0][:4]
+        if isinstance(arguments, str):
+            arguments = (arguments,)
+        rawmode = arguments[0]
+        stride = arguments[1] if len(arguments) > 1 else 0
+        orientation = arguments[2] if len(arguments) > 2 else 1
+        if rawmode not in RAW_LAYOUTS or RAW_LAYOUTS[rawmode][0] != image.mode:
+            return None
+        mode, bytes_per_pixel, channel_order = RAW_LAYOUTS[rawmode]
+        width, height = image.size
+
+    row_bytes = width * bytes_per_pixel
+    stride = stride or row_bytes
+    if os.path.getsize(path) < offset + (height - 1) * stride + row_bytes:
+        return None  # Truncated file: let Pillow report it.
+    return MappedImage(path, offset, (width, height), bytes_per_pixel, stride, orientation, mode, channel_order)
+
+
+def _map_npy(path: str) -> MappedImage:
+    """
+    Memory-maps a NumPy .npy file of uint8 pixels, shaped (height, width) or (height, width, channels).
+
+    Returns:
+        MappedImage: The mapped image, or None if the array is not an 8-bit image stored in C order.
+    """
+    with open(path, "rb") as source_file:
+        try:
+            version = np.lib.format.read_magic(source_file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(source_file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(source_file)
+        except ValueError:
+            return None
+        offset = source_file.tell()
+    if dtype != np.uint8 or fortran_order or len(shape) not in (2, 3):
+        return None
+    channels = shape[2] if len(shape) == 3 else 1
+    if channels not in NPY_MODES:
+        return None
+    height, width = shape[:2]
+    if height == 0 or width == 0:
+        return None
+    return MappedImage(path, offset, (width, height), channels, width * channels, 1, NPY_MODES[channels])
+
+
+def load_image(path: str, target_width: int = None, resample: str = DEFAULT_RESAMPLE,
+               cell_aspect: float = DEFAULT_CELL_ASPECT) -> Image.Image:
+    """
+    Opens an image, doing as little decoding and copying as its format allows.
+
+    Uncompressed files are memory-mapped and, if a target width is given,
+    resized band by band without ever being loaded whole. JPEGs are decoded
+    directly at a reduced scale (Image.draft) that is still at least as large
+    as the target. Other formats are decoded by Pillow as usual.
+
+    Args:
+        path (str): The path of the image file.
+        target_width (int): The number of characters per row the caller converts the image to.
+                            Defaults to None (the image is needed at full size).
+        resample (str): The filter the caller resizes with, see resampling.RESAMPLE_FILTERS.
+                        Mapped files are resized with it. Defaults to DEFAULT_RESAMPLE.
+        cell_aspect (float): The height of a character cell divided by its width, as the caller
+                             passes it to Ansii. Defaults to DEFAULT_CELL_ASPECT.
+
+    Returns:
+        Image.Image: The image, loaded. With a target width, its size is somewhere between the character
+                     grid and the full size, with the aspect ratio of the image, so the caller still resizes
+                     it as it would have. Mapped files come at the grid size when the cells are square.
+    """
+    mapped_image = map_image(path)
+    if mapped_image is not None:
+        # With other cells the grid does not keep the aspect ratio of the image: the caller would
+        # shrink the rows of a resized image again, resampling twice.
+        if target_width is None or cell_aspect != DEFAULT_CELL_ASPECT:
+            return mapped_image.to_image()
+        # Same target size as the callers compute, so that their resize does nothing.
+        target_height = ascii_output_height(mapped_image.size, target_width)
+        return mapped_image.resize((target_width, target_height), resample=resample)
+
+    image = Image.open(path)
+    if target_width is not None:
+        source_width, source_height = image.size
+        # Cells flatter than square need more rows than the width gives at the aspect ratio of the image.
+        target_height = max(1, math.ceil(target_width * source_height / (source_width * min(cell_aspect, 1.0))))
+        # JPEG only: decode at the smallest scale that is not below the target. Other formats ignore it.
+        image.draft("RGB", (target_width, target_height))
+    image.load()
+    return image
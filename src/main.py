@@ -1,38 +1,104 @@
 from PIL import Image 
-from window import Window  
 import sys  
 
+# Width in pixels of the image shown in the window.
+DISPLAY_WIDTH = 500
+
 
 def main():
     """
-    The main function of the script. It processes a command-line argument
-    (expected to be an image file path), opens and resizes the image,
+    The main function of the script. It processes the command-line arguments
+    (an image file path and optional output sizes), opens and resizes the image,
     and then uses the 'Window' class to display it.
     """
+    # Headless modes are dispatched before anything GUI related is imported.
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        import headless
+        sys.exit(headless.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import batch
+        sys.exit(batch.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "stream":
+        import streaming
+        sys.exit(streaming.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "play":
+        import playback
+        sys.exit(playback.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "pyramid":
+        import pyramid
+        sys.exit(pyramid.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "art":
+        import art_format
+        sys.exit(art_format.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import server
+        sys.exit(server.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        import watch
+        sys.exit(watch.main(sys.argv[2:]))
+
+    import argparse
+    from ansii import ASCII_WIDTH, CELL_SIZE, GLYPH_MODES, parse_cell_size
+    from dithering import DITHER_MODES
+
+    # sys.argv is a list of command-line arguments; the first one is expected to be the image path.
+    parser = argparse.ArgumentParser(prog="main.py", description="Show an image and its ASCII art in a window.")
+    parser.add_argument("image", help="The image to display and convert.")
+    parser.add_argument("--ascii-width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--display-width", type=int, default=DISPLAY_WIDTH,
+                        help=f"Width in pixels of the displayed image (default {DISPLAY_WIDTH}).")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                        help="How characters are chosen: by cell intensity (default) or by matching glyph shapes.")
+    parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                        help="Dither intensities across the characters; can also be changed in the window.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each conversion stage and print a summary when the window closes.")
+    options = parser.parse_args(sys.argv[1:])
+    if options.glyphs == "shape":
+        from glyph_index import check_shape_cell_size
+        try:
+            check_shape_cell_size(options.cell_size)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if options.profile:
+        from profiling import default_stage_timer
+        # Every Ansii object created from now on records its stage timings.
+        default_stage_timer.enabled = True
+
     try:
-        # sys.argv is a list of command-line arguments.
-        # sys.argv[0] is the script name itself (e.g., 'main.py').
-        # sys.argv[1] is the first argument provided by the user (expected to be the image path).
-        image_path = sys.argv[1]
+        image_path = options.image
 
-        # Open the image file using Pillow's Image.open() function.
-        original_image = Image.open(image_path)
+        # Open the image, decoding only what the display size needs: uncompressed files are
+        # memory-mapped and reduced band by band, and JPEGs are scaled down while decoding.
+        from image_input import load_image
+        original_image = load_image(image_path, options.display_width)
         
-        # Resize the image to a predefined display size.
-        display_image = _resize_image_for_display(original_image)
+        # Resize the image to the display size.
+        display_image = _resize_image_for_display(original_image, options.display_width)
         
         # Get the dimensions of the resized image.
         image_width, image_height = display_image.size
         
+        # Import the GUI lazily so that headless modes never load tkinter.
+        from window import Window
+
         # Initialize the custom Window object with the image dimensions and the image itself.
         # The 'Window' class is expected to handle the graphical display of the image.
-        display_window = Window(image_width, image_height, display_image)
+        display_window = Window(image_width, image_height, display_image, options.ascii_width, options.cell_size,
+                                options.glyphs, options.dither)
         
         # Call a method on the Window object to draw/display the picture.
         display_window._display_original_picture()
         
         # Call a method on the Window object to keep the window open until the user closes it.
         display_window.wait_for_close()
+
+        if options.profile:
+            print(default_stage_timer.report())
         
     except ValueError:
         # This exception typically occurs if an incorrect number of arguments is provided.
@@ -44,24 +110,35 @@ def main():
         # Catch any other unexpected exceptions and print a generic error message.
         print(f"An unexpected error occurred: {e}")
         print("Usage: python3 main.py <path/to/image>")
+        print("       python3 main.py convert <path/to/image> [--text out.txt] [--png out.png] [--color]")
+        print("       python3 main.py batch <dir|glob> --out <dir> [--workers N] [--color]")
+        print("       python3 main.py stream <path/to/image> [--text out.txt] [--png out.png] [--color]")
+        print("       python3 main.py play <animation|frames dir> [--fps N] [--color] [--loop] [--dither bayer]")
+        print("       python3 main.py pyramid <path/to/image> --out <dir> [--widths 40 80 160 320]")
+        print("       python3 main.py serve [--port 8000] [--workers N] [--queue-size N]")
+        print("       python3 main.py watch <dir> --out <dir> [--workers N] [--interval 1] [--once] [--color]")
+        print("       python3 main.py art save <path/to/image> [--out art.aart] [--color] [--compress]")
+        print("       python3 main.py art render <art.aart> [--png out.png] [--cell-size N] [--palette 256]")
 
-def _resize_image_for_display(image: Image.Image) -> Image.Image:
+def _resize_image_for_display(image: Image.Image, target_width: int = DISPLAY_WIDTH) -> Image.Image:
     """
-    Resizes the input PIL Image to a fixed width of 500 pixels while maintaining
+    Resizes the input PIL Image to a fixed width (500 pixels by default) while maintaining
     its aspect ratio. This is a common practice for displaying images
     consistently, especially in a custom window environment.
 
     Args:
         image (Image.Image): The input PIL Image object to be resized.
+        target_width (int): The width in pixels of the resized image. Defaults to DISPLAY_WIDTH.
 
     Returns:
         Image.Image: The resized PIL Image object.
     """
     original_width, original_height = image.size
+    if original_width == target_width:
+        # Already reduced to the display size while loading.
+        return image
     aspect_ratio = original_width / original_height
     
-    # Define a target width for display purposes.
-    target_width = 500
     # Calculate the corresponding height to maintain the aspect ratio.
     target_height = int(target_width / aspect_ratio)
     
@@ -0,0 +1,295 @@
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageSequence
+import numpy as np
+
+from ansii import Ansii, ASCII_WIDTH, GLYPH_MODES
+from batch import IMAGE_EXTENSIONS
+from dithering import DITHER_MODES
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE, RESAMPLE_FILTERS
+from terminal import PALETTES, TerminalEncoder, write_to_terminal
+
+# Escape sequences used to redraw frames in place instead of scrolling.
+CURSOR_HOME = "\x1b[H"
+CLEAR_SCREEN = "\x1b[2J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+# Frame rate used when the source does not specify frame durations.
+DEFAULT_FPS = 24.0
+
+# Pipeline stages whose latency is reported.
+STAGES = ("decode", "convert", "encode", "write")
+
+
+class AsciiPlayer:
+    """
+    Plays animated images (GIF, APNG) or sequences of frame files as ASCII art
+    in the terminal. Frames are decoded in order, converted on a pool of worker
+    threads, and redrawn in place at a target frame rate. Frames that can no
+    longer be shown on time are dropped instead of slowing the playback down.
+    """
+    def __init__(self, source: str, fps: float = None, color: bool = False, palette: str = "truecolor",
+                 workers: int = 4, loop: bool = False, ascii_width: int = ASCII_WIDTH, glyph_mode: str = "intensity",
+                 dither: str = "none", resample: str = DEFAULT_RESAMPLE, cell_aspect: float = DEFAULT_CELL_ASPECT):
+        """
+        Initializes the AsciiPlayer object.
+
+        Args:
+            source (str): An animated image, a directory of frame images or a glob pattern of frame images.
+            fps (float): The target frame rate. Defaults to None, which uses the frame durations of an
+                         animated image, or DEFAULT_FPS.
+            color (bool): If True, frames are played as colored ASCII art. Defaults to False.
+            palette (str): The terminal palette of colored frames. Defaults to "truecolor".
+            workers (int): The number of conversion threads. Defaults to 4.
+            loop (bool): If True, an animated image is played until interrupted. Defaults to False.
+            ascii_width (int): The number of characters per row. Defaults to ASCII_WIDTH.
+            glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+            dither (str): How intensities and palette colors are dithered, see dithering.DITHER_MODES.
+                          Defaults to "none".
+            resample (str): The filter resampling frames to the character grid, see
+                            resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+            cell_aspect (float): The height of a character cell divided by its width. Defaults to
+                                 DEFAULT_CELL_ASPECT.
+        """
+        self.source = source
+        self.enable_color = color
+        self.workers = workers
+        self.loop = loop
+        self.ascii_width = ascii_width
+        self.glyph_mode = glyph_mode
+        self.dither = dither
+        self.resample = resample
+        self.cell_aspect = cell_aspect
+        self.fps = fps if fps is not None else self._source_fps()
+        self._encoder = TerminalEncoder(palette, dither)
+        # Seconds spent in each stage, one entry per frame that went through it.
+        self.stage_latencies = {stage: [] for stage in STAGES}
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.elapsed_seconds = 0.0
+        self._last_shown_time = float("-inf")
+
+    def _frame_paths(self) -> list[str]:
+        """
+        Lists the frame files of a sequence source.
+
+        Returns:
+            list[str]: The sorted frame paths, or an empty list if the source is a single (animated) image.
+        """
+        return list_frame_paths(self.source)
+
+    def _source_fps(self) -> float:
+        """
+        Reads the frame rate from the frame durations of an animated image.
+
+        Returns:
+            float: The frame rate implied by the mean frame duration, or DEFAULT_FPS.
+        """
+        if self._frame_paths():
+            return DEFAULT_FPS
+        with Image.open(self.source) as animation:
+            durations = [frame.info.get("duration", 0) for frame in ImageSequence.Iterator(animation)]
+        durations = [duration for duration in durations if duration > 0]
+        return 1000.0 / (sum(durations) / len(durations)) if durations else DEFAULT_FPS
+
+    def _iter_frames(self):
+        """
+        Decodes the frames in playback order.
+
+        Yields:
+            Image.Image: Each frame, as an independent RGB image that can be handed to a worker thread.
+        """
+        frame_paths = self._frame_paths()
+        while True:
+            if frame_paths:
+                for frame_path in frame_paths:
+                    with Image.open(frame_path) as frame:
+                        yield frame.convert("RGB")
+            else:
+                with Image.open(self.source) as animation:
+                    # ImageSequence reuses one image object, so each frame is copied by convert().
+                    for frame in ImageSequence.Iterator(animation):
+                        yield frame.convert("RGB")
+            if not self.loop:
+                return
+
+    def _convert_frame(self, frame: Image.Image) -> tuple[list[str], np.ndarray, float]:
+        """
+        Converts one frame to ASCII art. Runs on a worker thread.
+
+        Returns:
+            tuple[list[str], np.ndarray, float]: The ASCII lines, the RGB matrix (None if color is
+                                                 disabled) and the conversion time in seconds.
+        """
+        start_time = time.perf_counter()
+        ansii = Ansii(frame, self.enable_color, ascii_width=self.ascii_width, glyph_mode=self.glyph_mode,
+                      dither=self.dither, resample=self.resample, cell_aspect=self.cell_aspect)
+        glyph_indices = ansii.compute_glyph_indices()
+        ascii_lines = ansii._glyph_indices_to_lines(glyph_indices)
+        color_matrix = ansii.compute_color_matrix() if self.enable_color else None
+        return ascii_lines, color_matrix, time.perf_counter() - start_time
+
+    def play(self):
+        """
+        Plays the source until its last frame (or until interrupted when looping).
+        """
+        frame_interval = 1.0 / self.fps
+        # Enough frames in flight to keep every worker busy, but no more, so that
+        # frames are not converted long before they are due.
+        pipeline_depth = 2 * self.workers
+        pending = deque()
+
+        write_to_terminal(CLEAR_SCREEN + HIDE_CURSOR)
+        start_time = time.perf_counter()
+        last_submit_time = self._last_shown_time = float("-inf")
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                frames = self._iter_frames()
+                frame_index = 0
+                while True:
+                    decode_start = time.perf_counter()
+                    frame = next(frames, None)
+                    if frame is None:
+                        break
+                    self.stage_latencies["decode"].append(time.perf_counter() - decode_start)
+
+                    due_time = start_time + frame_index * frame_interval
+                    frame_index += 1
+                    # A frame that is already late by a full interval is skipped before being
+                    # converted, unless no frame at all was submitted during the last interval
+                    # (which happens when decoding alone cannot keep up with the frame rate).
+                    now = time.perf_counter()
+                    if now > due_time + frame_interval and now - last_submit_time < frame_interval:
+                        self.frames_dropped += 1
+                        continue
+                    last_submit_time = now
+                    pending.append((due_time, executor.submit(self._convert_frame, frame)))
+                    if len(pending) >= pipeline_depth:
+                        self._present(*pending.popleft(), frame_interval)
+                while pending:
+                    self._present(*pending.popleft(), frame_interval)
+        finally:
+            self.elapsed_seconds = time.perf_counter() - start_time
+            write_to_terminal(SHOW_CURSOR)
+
+    def _present(self, due_time: float, conversion, frame_interval: float):
+        """
+        Waits for a converted frame and shows it at its due time, or drops it if it is too late.
+
+        Args:
+            due_time (float): The time (time.perf_counter()) at which the frame should be shown.
+            conversion (Future): The future of the frame's conversion.
+            frame_interval (float): The time between two frames, in seconds.
+        """
+        ascii_lines, color_matrix, convert_seconds = conversion.result()
+        self.stage_latencies["convert"].append(convert_seconds)
+
+        # Same rule as before the conversion: late frames are dropped, but never
+        # to the point of showing nothing for more than one interval.
+        now = time.perf_counter()
+        if now > due_time + frame_interval and now - self._last_shown_time < frame_interval:
+            self.frames_dropped += 1
+            return
+
+        encode_start = time.perf_counter()
+        frame_output = self._encoder.encode(ascii_lines, color_matrix)
+        self.stage_latencies["encode"].append(time.perf_counter() - encode_start)
+
+        wait_seconds = due_time - time.perf_counter()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+        write_start = time.perf_counter()
+        # Redraw over the previous frame rather than scrolling.
+        write_to_terminal(CURSOR_HOME.encode() + frame_output)
+        self._last_shown_time = time.perf_counter()
+        self.stage_latencies["write"].append(self._last_shown_time - write_start)
+        self.frames_shown += 1
+
+    def report(self) -> str:
+        """
+        Summarizes the last playback.
+
+        Returns:
+            str: The achieved frame rate, the dropped frames and the latency of each stage.
+        """
+        achieved_fps = self.frames_shown / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        lines = [f"Played {self.frames_shown} frames in {self.elapsed_seconds:.2f}s: {achieved_fps:.1f} fps "
+                 f"(target {self.fps:.1f} fps), {self.frames_dropped} frames dropped."]
+        for stage in STAGES:
+            latencies_ms = np.array(self.stage_latencies[stage]) * 1000
+            if latencies_ms.size:
+                lines.append(f"  {stage:<8} mean {latencies_ms.mean():7.2f} ms   "
+                             f"p95 {np.percentile(latencies_ms, 95):7.2f} ms   max {latencies_ms.max():7.2f} ms")
+        return "\n".join(lines)
+
+
+def list_frame_paths(source: str) -> list[str]:
+    """
+    Lists the frame files of a sequence source: the images of a directory, or the
+    images matched by a glob pattern. Other files (e.g. a stray .txt) are skipped.
+
+    Args:
+        source (str): An animated image, a directory of frame images or a glob pattern of frame images.
+
+    Returns:
+        list[str]: The sorted frame paths, or an empty list if the source is a single (animated) image.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    elif os.path.isfile(source):
+        return []
+    else:
+        paths = glob.glob(source)
+    return sorted(path for path in paths
+                  if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS and os.path.isfile(path))
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the playback mode.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'play'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py play", description="Play an animation as ASCII art.")
+    parser.add_argument("source", help="An animated GIF/APNG, a directory of frames or a glob pattern of frames.")
+    parser.add_argument("--fps", type=float, help="Target frame rate (defaults to the animation's own).")
+    parser.add_argument("--color", action="store_true", help="Play colored ASCII art.")
+    parser.add_argument("--palette", choices=PALETTES, default="truecolor",
+                        help="Terminal palette of the colored output.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of conversion threads.")
+    parser.add_argument("--loop", action="store_true", help="Loop until interrupted with Ctrl+C.")
+    parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                        help="Choose characters by cell brightness (intensity) or by glyph shape (shape).")
+    parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                        help="Dither intensities across the characters and colors across the palette.")
+    parser.add_argument("--resample", choices=RESAMPLE_FILTERS, default=DEFAULT_RESAMPLE,
+                        help=f"Filter resampling frames to the character grid (default {DEFAULT_RESAMPLE}).")
+    parser.add_argument("--cell-aspect", type=float, default=DEFAULT_CELL_ASPECT,
+                        help="Height of a character cell divided by its width, e.g. 2 for terminal fonts.")
+    options = parser.parse_args(arguments)
+
+    if not os.path.isfile(options.source) and not list_frame_paths(options.source):
+        print(f"Error: No frames found at '{options.source}'.")
+        return 1
+    player = AsciiPlayer(options.source, options.fps, options.color, options.palette, options.workers, options.loop,
+                         options.width, options.glyphs, options.dither, options.resample, options.cell_aspect)
+    try:
+        player.play()
+    except KeyboardInterrupt:
+        pass
+    print(player.report())
+    return 0
@@ -0,0 +1,90 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Every PNG file starts with this signature.
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Compressed data is emitted in IDAT chunks of at least this many bytes.
+IDAT_CHUNK_SIZE = 1 << 16
+
+
+class PngStreamWriter:
+    """
+    Writes an 8-bit RGB PNG file incrementally, a band of rows at a time, so that
+    the full image never has to be held in memory.
+    """
+    def __init__(self, output_file, width: int, height: int, compression_level: int = 6):
+        """
+        Initializes the PngStreamWriter object and writes the PNG header.
+
+        Args:
+            output_file: A binary file object opened for writing.
+            width (int): The width of the image in pixels.
+            height (int): The height of the image in pixels.
+            compression_level (int): The zlib compression level, from 0 (none) to 9. Defaults to 6.
+        """
+        self.output_file = output_file
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compression_level)
+        self._pending_data = bytearray()
+
+        self.output_file.write(PNG_SIGNATURE)
+        # Width, height, bit depth 8, color type 2 (RGB), default compression, filter and no interlacing.
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def write_rows(self, rows: np.ndarray):
+        """
+        Appends rows to the image.
+
+        Args:
+            rows (np.ndarray): A (row count, width, 3) uint8 array of RGB pixels.
+        """
+        row_count = rows.shape[0]
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Expected rows of shape (n, {self.width}, 3), got {rows.shape}.")
+        if self.rows_written + row_count > self.height:
+            raise ValueError("More rows were written than the image height.")
+
+        # Each scanline is prefixed with its filter type; 0 means unfiltered.
+        scanlines = np.zeros((row_count, 1 + self.width * 3), dtype=np.uint8)
+        scanlines[:, 1:] = rows.reshape(row_count, self.width * 3)
+        self._pending_data += self._compressor.compress(scanlines.tobytes())
+        self.rows_written += row_count
+        self._flush_pending_data(final=False)
+
+    def close(self):
+        """
+        Finishes the compressed stream and writes the end of the PNG file.
+        The output file itself is left open.
+        """
+        if self.rows_written != self.height:
+            raise ValueError(f"Only {self.rows_written} of {self.height} rows were written.")
+        self._pending_data += self._compressor.flush()
+        self._flush_pending_data(final=True)
+        self._write_chunk(b"IEND", b"")
+
+    def _flush_pending_data(self, final: bool):
+        """
+        Writes the compressed data gathered so far as IDAT chunks.
+
+        Args:
+            final (bool): If True, everything is written; otherwise small leftovers
+                          are kept to avoid emitting many tiny chunks.
+        """
+        while len(self._pending_data) >= IDAT_CHUNK_SIZE or (final and self._pending_data):
+            chunk_data = bytes(self._pending_data[:IDAT_CHUNK_SIZE])
+            del self._pending_data[:IDAT_CHUNK_SIZE]
+            self._write_chunk(b"IDAT", chunk_data)
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        """
+        Writes one PNG chunk: length, type, data and CRC.
+        """
+        self.output_file.write(struct.pack(">I", len(data)))
+        self.output_file.write(chunk_type)
+        self.output_file.write(data)
+        self.output_file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
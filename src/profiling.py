@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Setting this environment variable to a non-empty value other than "0" switches
+# the default stage timer on when the program starts.
+PROFILE_ENVIRONMENT_VARIABLE = "ANSII_PROFILE"
+
+# Stages of the conversion pipeline, in the order they run.
+PIPELINE_STAGES = ("resize", "glyph_mapping", "color_extraction", "png_rendering", "console_formatting",
+                   "console_output")
+
+
+class StageTimer:
+    """
+    Accumulates the wall-clock time spent in each named stage of the pipeline.
+    When disabled, measuring a stage costs a single attribute check, so the
+    instrumentation can stay in place in production code.
+    """
+    def __init__(self, enabled: bool = False):
+        """
+        Initializes the StageTimer object.
+
+        Args:
+            enabled (bool): If True, stages are timed right away. Defaults to False.
+        """
+        self.enabled = enabled
+        # Seconds spent in each stage, one entry per time the stage ran.
+        self.durations = {}
+        # Stages may be timed from several threads (e.g. the window's conversions).
+        self._lock = threading.Lock()
+
+    def measure(self, stage: str):
+        """
+        Returns a context manager timing the code it wraps as one run of a stage.
+
+        Args:
+            stage (str): The name of the stage, usually one of PIPELINE_STAGES.
+
+        Returns:
+            A context manager, which does nothing if the timer is disabled.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(stage)
+
+    @contextmanager
+    def _measure(self, stage: str):
+        """
+        Times the wrapped code and records it as one run of the stage.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start_time)
+
+    def record(self, stage: str, seconds: float):
+        """
+        Adds one run of a stage measured elsewhere.
+
+        Args:
+            stage (str): The name of the stage.
+            seconds (float): The duration of the run.
+        """
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def reset(self):
+        """
+        Forgets every measurement.
+        """
+        with self._lock:
+            self.durations = {}
+
+    def totals(self) -> dict:
+        """
+        Returns the total time of each stage.
+
+        Returns:
+            dict: Maps each measured stage to its total time in seconds, in pipeline order.
+        """
+        with self._lock:
+            durations = dict(self.durations)
+        ordered_stages = [stage for stage in PIPELINE_STAGES if stage in durations]
+        ordered_stages += [stage for stage in durations if stage not in PIPELINE_STAGES]
+        return {stage: sum(durations[stage]) for stage in ordered_stages}
+
+    def report(self) -> str:
+        """
+        Summarizes the measurements.
+
+        Returns:
+            str: One line per stage with its run count, total and mean time, and share of the total.
+        """
+        with self._lock:
+            counts = {stage: len(runs) for stage, runs in self.durations.items()}
+        totals = self.totals()
+        overall = sum(totals.values()) or 1.0
+        lines = ["Stage timings:"]
+        for stage, total in totals.items():
+            lines.append(f"  {stage:<20} {counts[stage]:>5} runs  total {total * 1000:9.2f} ms  "
+                         f"mean {total / counts[stage] * 1000:8.2f} ms  {total / overall:6.1%}")
+        return "\n".join(lines)
+
+
+# The timer used by Ansii objects that are not given one explicitly. It can be
+# switched on at runtime by setting its `enabled` attribute.
+default_stage_timer = StageTimer(enabled=os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, "0") not in ("", "0"))
@@ -0,0 +1,106 @@
+import os
+import time
+
+from PIL import Image
+
+from ansii import Ansii, CELL_SIZE, ascii_output_height, parse_cell_size
+
+# ASCII widths (characters per row) generated by default, one per zoom level.
+PYRAMID_WIDTHS = (40, 80, 160, 320)
+
+
+def build_ascii_pyramid(image: Image.Image, widths: tuple[int, ...] = PYRAMID_WIDTHS, color: bool = False,
+                        palette: str = "truecolor", cell_size: tuple[int, int] = CELL_SIZE) -> dict:
+    """
+    Prepares the ASCII art of an image at several widths from a single decode.
+
+    The source is resized only once, to the largest width. Every smaller level is
+    then reduced from the level just above it, which is far cheaper than resizing
+    the full-size source again for each width.
+
+    Args:
+        image (Image.Image): The PIL Image object to convert.
+        widths (tuple[int, ...]): The number of characters per row of each level. Defaults to PYRAMID_WIDTHS.
+        color (bool): If True, the ASCII art is colored. Defaults to False.
+        palette (str): The terminal palette used for colored console output. Defaults to "truecolor".
+        cell_size (tuple[int, int]): The size in pixels of each character in the PNGs. Defaults to CELL_SIZE.
+
+    Returns:
+        dict: Maps each width to an Ansii object ready to render that level.
+    """
+    if image.mode not in ("L", "RGB", "RGBA"):
+        # Palette and bilevel images would otherwise be resized with nearest neighbour sampling.
+        image = image.convert("RGB")
+
+    levels = {}
+    level_image = None
+    for width in sorted(set(widths), reverse=True):
+        height = ascii_output_height(image.size, width)
+        if level_image is None:
+            level_image = image.resize((width, height))
+        else:
+            level_image = _reduce_level(level_image, width, height)
+        levels[width] = Ansii.from_processed_image(level_image, color, palette, cell_size)
+    return levels
+
+
+def _reduce_level(level_image: Image.Image, width: int, height: int) -> Image.Image:
+    """
+    Derives a smaller pyramid level from the level above it.
+
+    Args:
+        level_image (Image.Image): The next larger level.
+        width (int): The width of the new level.
+        height (int): The height of the new level.
+
+    Returns:
+        Image.Image: The new level.
+    """
+    previous_width, previous_height = level_image.size
+    factor = previous_width // width
+    # Image.reduce averages factor x factor blocks, which is exact and fast for integral ratios.
+    if factor > 1 and previous_width == factor * width and -(-previous_height // factor) == height:
+        return level_image.reduce(factor)
+    return level_image.resize((width, height))
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the pyramid mode. Writes the PNG and text ASCII art of one image at several widths.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'pyramid'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py pyramid", description="Convert an image at several ASCII widths.")
+    parser.add_argument("image", help="The image to convert.")
+    parser.add_argument("--out", required=True, help="Directory where the outputs are written.")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(PYRAMID_WIDTHS),
+                        help="Characters per row of each level (default: %(default)s).")
+    parser.add_argument("--color", action="store_true", help="Generate colored ASCII art.")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    options = parser.parse_args(arguments)
+
+    os.makedirs(options.out, exist_ok=True)
+    output_stem = os.path.join(options.out, os.path.splitext(os.path.basename(options.image))[0])
+
+    start_time = time.perf_counter()
+    with Image.open(options.image) as image:
+        # Let JPEG decode at a reduced scale that is still large enough for the widest level.
+        largest_width = max(options.widths)
+        image.draft("RGB", (largest_width, ascii_output_height(image.size, largest_width)))
+        levels = build_ascii_pyramid(image, tuple(options.widths), options.color, cell_size=options.cell_size)
+
+    for width, ansii in levels.items():
+        png_image, console_output = ansii.render()
+        png_image.save(f"{output_stem}_{width}.png")
+        with open(f"{output_stem}_{width}.txt", "w", encoding="utf-8") as text_file:
+            text_file.write(console_output + "\n")
+    print(f"Wrote {len(levels)} levels ({', '.join(str(width) for width in sorted(levels))} columns) "
+          f"in {time.perf_counter() - start_time:.2f}s.")
+    return 0
@@ -0,0 +1,116 @@
+from PIL import Image
+
+# Filters the image can be resampled to the character grid with. "area" averages every
+# source pixel covered by a cell (see area_resize); the others are Pillow's filters.
+PILLOW_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "bilinear": Image.Resampling.BILINEAR,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+}
+RESAMPLE_FILTERS = ("area",) + tuple(PILLOW_FILTERS)
+
+# The filter used unless another one is chosen: Pillow's own default.
+DEFAULT_RESAMPLE = "bicubic"
+
+# Modes that cannot be averaged as they are (palette indices, bilevel and 16-bit pixels),
+# with the mode they are converted to first.
+AVERAGING_MODES = {"P": "RGBA", "PA": "RGBA", "1": "L", "I;16": "I", "I;16B": "I", "I;16L": "I", "I;16N": "I"}
+
+# Height of a character cell divided by its width. Rendered PNG cells are square by default;
+# terminal fonts are about twice as tall as they are wide.
+DEFAULT_CELL_ASPECT = 1.0
+
+
+def ascii_output_height(source_size: tuple[int, int], ascii_width: int, cell_aspect: float = DEFAULT_CELL_ASPECT) -> int:
+    """
+    Computes the number of ASCII rows for an image, maintaining its aspect ratio.
+
+    Args:
+        source_size (tuple[int, int]): The (width, height) of the source image.
+        ascii_width (int): The number of ASCII characters per row.
+        cell_aspect (float): The height of a character cell divided by its width: taller cells
+                             need fewer rows to cover the same image. Defaults to DEFAULT_CELL_ASPECT.
+
+    Returns:
+        int: The number of rows, at least 1.
+    """
+    original_width, original_height = source_size
+    # A single division: dividing by a rounded aspect ratio can land just below a whole
+    # number of rows, so that an image already at the grid size would lose a row.
+    return max(1, int(ascii_width * original_height / (original_width * cell_aspect)))
+
+
+def check_resampling(resample: str, cell_aspect: float):
+    """
+    Validates a resampling filter and a cell aspect ratio.
+
+    Raises:
+        ValueError: If the filter is not one of RESAMPLE_FILTERS or the aspect ratio is not positive.
+    """
+    if resample not in RESAMPLE_FILTERS:
+        raise ValueError(f"Unknown resampling filter '{resample}', expected one of {', '.join(RESAMPLE_FILTERS)}.")
+    if not cell_aspect > 0:
+        raise ValueError(f"The cell aspect ratio must be positive, got {cell_aspect}.")
+
+
+def integral_factors(source_size: tuple[int, int], size: tuple[int, int]) -> tuple[int, int]:
+    """
+    Returns the block size of a reduction, if the source is exactly a whole number of blocks.
+
+    Args:
+        source_size (tuple[int, int]): The (width, height) of the source.
+        size (tuple[int, int]): The (width, height) of the result.
+
+    Returns:
+        tuple[int, int]: The (horizontal, vertical) reduction factors, or None if the scale is not
+                         integral on both axes (or the result is larger than the source).
+    """
+    (source_width, source_height), (width, height) = source_size, size
+    if source_width < width or source_height < height or source_width % width or source_height % height:
+        return None
+    return source_width // width, source_height // height
+
+
+def area_resize(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """
+    Shrinks an image by averaging, for every result pixel, all the source pixels it
+    covers (weighted by how much of them it covers), so no source pixel is skipped.
+
+    Integral scales are block reductions, done by Image.reduce in one pass over
+    the pixels (faster than summing NumPy blocks, see benchmarks/bench_resampling.py);
+    other scales are the same average with fractional weights at the block edges,
+    which is what Pillow's box filter computes.
+
+    Args:
+        image (Image.Image): The image to shrink.
+        size (tuple[int, int]): The (width, height) of the result.
+
+    Returns:
+        Image.Image: The resized image, in the mode of AVERAGING_MODES for the modes listed there.
+    """
+    if image.mode in AVERAGING_MODES:
+        image = image.convert(AVERAGING_MODES[image.mode])
+    factors = integral_factors(image.size, size)
+    if factors is None:
+        return image.resize(size, Image.Resampling.BOX)
+    if factors == (1, 1):
+        return image.copy()
+    return image.reduce(factors)
+
+
+def resize_cells(image: Image.Image, size: tuple[int, int], resample: str = DEFAULT_RESAMPLE) -> Image.Image:
+    """
+    Resamples an image to one pixel per character cell.
+
+    Args:
+        image (Image.Image): The image to resample.
+        size (tuple[int, int]): The (columns, rows) of the character grid.
+        resample (str): One of RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+
+    Returns:
+        Image.Image: The resampled image.
+    """
+    if resample == "area":
+        return area_resize(image, size)
+    return image.resize(size, PILLOW_FILTERS[resample])
@@ -0,0 +1,424 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image, UnidentifiedImageError
+
+# Only the conversion code is imported here: worker processes import this module
+# to run _convert_upload, and must never pay for (or require) tkinter.
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE, GLYPH_MODES, parse_cell_size
+from glyph_index import check_shape_cell_size
+from terminal import PALETTES
+
+# Output formats of the /convert endpoint and their content types.
+OUTPUT_CONTENT_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "ansi": "text/plain; charset=utf-8",
+    "png": "image/png",
+}
+
+# Uploads larger than this are rejected with 413 before being read.
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+
+# Largest accepted ASCII width and cell size, which bound the size of a single rendering.
+MAX_ASCII_WIDTH = 1000
+MAX_CELL_SIZE = 64
+
+# Limits of the request line and header block.
+MAX_HEADER_BYTES = 16 * 1024
+
+# Seconds a client gets to send a complete request before the connection is closed.
+REQUEST_TIMEOUT = 30.0
+
+
+def _init_worker():
+    """
+    Prepares a worker process. Ctrl+C reaches the whole process group, so workers
+    ignore it and leave the shutdown to the server process.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class RequestError(Exception):
+    """
+    An invalid request, answered with the given HTTP status and message.
+    """
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _convert_upload(image_bytes: bytes, output_format: str, color: bool, palette: str,
+                    ascii_width: int, cell_size: tuple[int, int], glyph_mode: str) -> tuple[bytes, str, HTTPStatus]:
+    """
+    Converts an uploaded image. Runs in a worker process, and never raises: every
+    error is returned, so that the client gets a response describing it.
+
+    Args:
+        image_bytes (bytes): The encoded image, as uploaded.
+        output_format (str): One of OUTPUT_CONTENT_TYPES.
+        color (bool): If True, colored ASCII art is generated.
+        palette (str): The terminal palette of the "ansi" format.
+        ascii_width (int): The number of characters per row.
+        cell_size (tuple[int, int]): The size in pixels of each character of the "png" format.
+        glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES.
+
+    Returns:
+        tuple[bytes, str, HTTPStatus]: The response body, None and 200, or None, an error message
+                                       and the status of the error: 400 if the upload is not a valid
+                                       image or cannot be converted with these parameters, 500 if
+                                       the conversion itself failed.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as error:
+        return None, f"Cannot decode the image: {error}", HTTPStatus.BAD_REQUEST
+    try:
+        return _render_upload(image, output_format, color, palette, ascii_width, cell_size, glyph_mode), \
+            None, HTTPStatus.OK
+    except ValueError as error:
+        # Parameters the request validation lets through but the conversion rejects.
+        return None, f"Cannot convert the image: {error}", HTTPStatus.BAD_REQUEST
+    except Exception as error:
+        return None, f"Conversion failed: {type(error).__name__}: {error}", HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def _render_upload(image: Image.Image, output_format: str, color: bool, palette: str,
+                   ascii_width: int, cell_size: tuple[int, int], glyph_mode: str) -> bytes:
+    """
+    Renders a decoded upload in the requested format. The arguments are those of _convert_upload.
+
+    Returns:
+        bytes: The response body.
+    """
+    ansii = Ansii(image, color, palette, ascii_width, cell_size, glyph_mode=glyph_mode)
+
+    # Only the work needed by the requested format is done.
+    glyph_indices = ansii.compute_glyph_indices()
+    color_matrix = ansii.compute_color_matrix() if color else None
+    if output_format == "png":
+        png_buffer = io.BytesIO()
+        ansii._create_png_from_ascii(glyph_indices, color_matrix).save(png_buffer, format="PNG")
+        return png_buffer.getvalue()
+    ascii_lines = ansii._glyph_indices_to_lines(glyph_indices)
+    if output_format == "ansi":
+        ascii_lines = ansii.format_console_lines(ascii_lines, color_matrix)
+    return ("\n".join(ascii_lines) + "\n").encode("utf-8")
+
+
+class ConversionServer:
+    """
+    A small HTTP/1.1 server converting uploaded images to ASCII art.
+
+    Conversions run in a bounded pool of worker processes. Identical requests
+    (same image bytes and parameters) that arrive while a conversion is in
+    flight share its result instead of being converted again, and once the
+    pool and its queue are full, new conversions are refused with 503 so that
+    latency stays bounded under overload.
+
+    Endpoints:
+        POST /convert?format=text|ansi|png&color=1&palette=256&width=80&cell=8x12&glyphs=shape
+            The request body is the raw image file.
+        GET /health
+            Returns the server statistics as JSON.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000, workers: int = None, queue_size: int = None):
+        """
+        Initializes the ConversionServer object.
+
+        Args:
+            host (str): The address to listen on. Defaults to "127.0.0.1".
+            port (int): The port to listen on. Defaults to 8000.
+            workers (int): The number of worker processes. Defaults to the number of CPUs.
+            queue_size (int): The number of conversions allowed to wait for a free worker.
+                              Defaults to twice the number of workers.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size if queue_size is not None else 2 * self.workers
+        self._executor = None
+        self._server = None
+        # Conversions in flight, keyed by request, shared by identical requests.
+        self._in_flight = {}
+        self.stats = {"requests": 0, "conversions": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+
+    async def start(self):
+        """
+        Starts the worker pool and begins accepting connections.
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        # With port 0 the system picks a free port.
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Serves until cancelled, starting the server first if needed.
+        """
+        if self._server is None:
+            await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stops accepting connections and shuts the worker pool down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            # Queued conversions are dropped; running ones are short and allowed to finish.
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the requests of one connection, keeping it open between requests unless the client asks not to.
+        """
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    # Idle, vanished or malformed clients are simply disconnected.
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, content_type, response_body = await self._dispatch(method, target, body)
+                except RequestError as error:
+                    status, content_type = error.status, "text/plain; charset=utf-8"
+                    response_body = (str(error) + "\n").encode("utf-8")
+                except Exception as error:
+                    # E.g. a broken worker pool: the client still gets a response, and the server keeps serving.
+                    self.stats["errors"] += 1
+                    status, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, "text/plain; charset=utf-8"
+                    response_body = f"Internal error: {type(error).__name__}: {error}\n".encode("utf-8")
+                # Requests whose body was not read cannot be followed by another on the same connection.
+                if status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
+                    keep_alive = False
+                self._write_response(writer, status, content_type, response_body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """
+        Reads one request from a connection.
+
+        Returns:
+            tuple: The method, the target, the headers (with lowercase names) and the body,
+                   or None if the client closed the connection.
+        """
+        try:
+            header_block = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as error:
+            if not error.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            return None
+        request_line, *header_lines = header_block.decode("latin-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        for header_line in header_lines:
+            name, separator, value = header_line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+
+        content_length = int(headers.get("content-length", "0") or 0)
+        if content_length > MAX_UPLOAD_BYTES:
+            return method, target, headers, None
+        body = await reader.readexactly(content_length) if content_length else b""
+        return method, target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        """
+        Routes a request to its endpoint.
+
+        Returns:
+            tuple: The status, the content type and the body of the response.
+        """
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        if url.path == "/health" and method == "GET":
+            health = dict(self.stats, workers=self.workers, queue_size=self.queue_size, in_flight=len(self._in_flight))
+            return HTTPStatus.OK, "application/json", json.dumps(health).encode("utf-8")
+        if url.path != "/convert":
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown path '{url.path}'.")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Images must be uploaded with POST.")
+        if body is None:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MiB.")
+        if not body:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "The request body must contain an image.")
+
+        parameters = self._parse_parameters(url.query)
+        response_body = await self._convert(body, parameters)
+        return HTTPStatus.OK, OUTPUT_CONTENT_TYPES[parameters[0]], response_body
+
+    def _parse_parameters(self, query: str) -> tuple:
+        """
+        Validates the query parameters of a conversion.
+
+        Returns:
+            tuple: The output format, color flag, palette, ASCII width, cell size and glyph mode.
+        """
+        values = {name: items[-1] for name, items in parse_qs(query).items()}
+        output_format = values.get("format", "text")
+        if output_format not in OUTPUT_CONTENT_TYPES:
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               f"Unknown format '{output_format}', expected one of {', '.join(OUTPUT_CONTENT_TYPES)}.")
+        color = values.get("color", "0").lower() in ("1", "true", "yes")
+        palette = values.get("palette", "truecolor")
+        if palette not in PALETTES:
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               f"Unknown palette '{palette}', expected one of {', '.join(PALETTES)}.")
+        try:
+            ascii_width = int(values.get("width", ASCII_WIDTH))
+            cell_size = parse_cell_size(values["cell"]) if "cell" in values else CELL_SIZE
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'width' must be an integer and 'cell' WIDTHxHEIGHT.")
+        if not 1 <= ascii_width <= MAX_ASCII_WIDTH:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'width' must be between 1 and {MAX_ASCII_WIDTH}.")
+        if not all(1 <= side <= MAX_CELL_SIZE for side in cell_size):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Cell sides must be between 1 and {MAX_CELL_SIZE}.")
+        glyph_mode = values.get("glyphs", "intensity")
+        if glyph_mode not in GLYPH_MODES:
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               f"Unknown glyph mode '{glyph_mode}', expected one of {', '.join(GLYPH_MODES)}.")
+        if glyph_mode == "shape":
+            try:
+                check_shape_cell_size(cell_size)
+            except ValueError as error:
+                raise RequestError(HTTPStatus.BAD_REQUEST, str(error))
+        return output_format, color, palette, ascii_width, tuple(cell_size), glyph_mode
+
+    async def _convert(self, image_bytes: bytes, parameters: tuple) -> bytes:
+        """
+        Converts an upload in the worker pool, sharing the result with identical requests in flight.
+
+        Args:
+            image_bytes (bytes): The encoded image.
+            parameters (tuple): The parameters returned by _parse_parameters.
+
+        Returns:
+            bytes: The response body.
+        """
+        key = (hashlib.blake2b(image_bytes, digest_size=20).hexdigest(), parameters)
+        conversion = self._in_flight.get(key)
+        if conversion is not None:
+            self.stats["coalesced"] += 1
+        else:
+            # Every conversion in flight either runs on a worker or waits in the pool's queue.
+            if len(self._in_flight) >= self.workers + self.queue_size:
+                self.stats["rejected"] += 1
+                raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "The server is busy, retry later.")
+            self.stats["conversions"] += 1
+            loop = asyncio.get_running_loop()
+            conversion = loop.run_in_executor(self._executor, _convert_upload, image_bytes, *parameters)
+            self._in_flight[key] = conversion
+            conversion.add_done_callback(lambda finished: self._finish_conversion(key, finished))
+
+        try:
+            # Shielded so that a client disconnecting does not cancel the conversion others may be waiting for.
+            response_body, error, status = await asyncio.shield(conversion)
+        except Exception as exception:
+            # E.g. a broken worker pool. Already counted as an error by _finish_conversion.
+            raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR,
+                               f"Internal error: {type(exception).__name__}: {exception}")
+        if error is not None:
+            raise RequestError(status, error)
+        return response_body
+
+    def _finish_conversion(self, key: tuple, conversion: asyncio.Future):
+        """
+        Forgets a finished conversion and counts its failure, once for all the requests that shared it.
+
+        Args:
+            key (tuple): The key of the conversion in self._in_flight.
+            conversion (asyncio.Future): The finished conversion.
+        """
+        self._in_flight.pop(key, None)
+        if conversion.cancelled():
+            return
+        if conversion.exception() is not None or conversion.result()[1] is not None:
+            self.stats["errors"] += 1
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, content_type: str, body: bytes,
+                        keep_alive: bool):
+        """
+        Writes a complete response to a connection.
+        """
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers["Retry-After"] = "1"
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1") + body)
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the server mode.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'serve'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve ASCII art conversions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default 8000).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (defaults to the number of CPUs).")
+    parser.add_argument("--queue-size", type=int,
+                        help="Conversions allowed to wait for a worker before answering 503 "
+                             "(defaults to twice the number of workers).")
+    options = parser.parse_args(arguments)
+
+    server = ConversionServer(options.host, options.port, options.workers, options.queue_size)
+
+    async def serve():
+        await server.start()
+        # Terminating the server shuts it down as cleanly as Ctrl+C, stopping the workers too.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        print(f"Serving on http://{server.host}:{server.port} with {server.workers} workers.", flush=True)
+        await server.serve_forever()
+
+    start_time = time.perf_counter()
+    try:
+        asyncio.run(serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print(f"Served {server.stats['requests']} requests in {time.perf_counter() - start_time:.0f}s: "
+          f"{server.stats['conversions']} conversions, {server.stats['coalesced']} coalesced, "
+          f"{server.stats['rejected']} rejected.")
+    return 0
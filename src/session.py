@@ -0,0 +1,267 @@
+import threading
+
+from PIL import Image
+import numpy as np
+
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE, GLYPH_MODES
+from dithering import DITHER_MODES
+from glyph_atlas import get_glyph_atlas
+from glyph_index import check_shape_cell_size
+from profiling import StageTimer, default_stage_timer
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE, check_resampling
+from terminal import TerminalEncoder
+
+# The intermediate stages a session keeps, each with the stages computed from it.
+# "resize" holds the Ansii object of the resized image, along with its pixel and luminance buffers.
+STAGE_DEPENDENTS = {
+    "resize": ("glyphs", "colors"),
+    "glyphs": ("lines", "console", "png"),
+    "colors": ("console", "png"),
+    "lines": ("console",),
+    "console": (),
+    "png": (),
+}
+
+# The parameters of a session, with the stages that have to be computed again when they change.
+PARAMETER_STAGES = {
+    "image": ("resize",),
+    "ascii_width": ("resize",),
+    "resample": ("resize",),
+    "cell_aspect": ("resize",),
+    "glyph_mode": ("glyphs",),
+    "dither": ("glyphs", "console"),  # Intensities, and the palette colors of the console output.
+    "cell_size": ("png",),  # And "glyphs" in shape mode, whose features depend on the cell size.
+    "color": ("console", "png"),
+    "palette": ("console",),
+}
+
+# Fraction of changed cells above which the PNG is rendered from scratch instead of patched.
+FULL_REDRAW_FRACTION = 0.5
+
+
+class ConversionSession:
+    """
+    Converts one image repeatedly while its parameters are being tuned. Every
+    intermediate stage (resized image, luminance, glyph grid, cell colors, text
+    lines, console output and PNG) is kept, and changing a parameter only drops
+    the stages that depend on it. The PNG of each color mode is kept as well and
+    patched: only the cells whose glyph or color changed are drawn again.
+
+    A session can be used from several threads; renders are serialized.
+    """
+    def __init__(self, image: Image.Image, color: bool = False, palette: str = "truecolor",
+                 ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE,
+                 glyph_mode: str = "intensity", stage_timer: StageTimer = None, resample: str = DEFAULT_RESAMPLE,
+                 cell_aspect: float = DEFAULT_CELL_ASPECT, dither: str = "none"):
+        """
+        Initializes the ConversionSession object. Nothing is computed until the first render.
+
+        Args:
+            image (Image.Image): The input PIL Image object.
+            color (bool): If True, the ASCII art is colored. Defaults to False.
+            palette (str): The terminal palette of colored console output. Defaults to "truecolor".
+            ascii_width (int): The number of ASCII characters per row. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The (width, height) in pixels of each character in the
+                                         generated PNG. Defaults to CELL_SIZE.
+            glyph_mode (str): One of ansii.GLYPH_MODES. Defaults to "intensity".
+            stage_timer (StageTimer): The timer recording the time spent in each stage. Defaults to
+                                      None, which uses profiling.default_stage_timer.
+            resample (str): The filter resampling the image to the character grid, see
+                            resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+            cell_aspect (float): The height of a character cell divided by its width. Defaults to
+                                 DEFAULT_CELL_ASPECT.
+            dither (str): How intensities and palette colors are dithered, one of dithering.DITHER_MODES.
+                          Defaults to "none".
+        """
+        check_resampling(resample, cell_aspect)
+        self.image = image
+        self.color = color
+        self.palette = palette
+        self.ascii_width = ascii_width
+        self.cell_size = tuple(cell_size)
+        self.glyph_mode = self._check_glyph_mode(glyph_mode)
+        if glyph_mode == "shape":
+            check_shape_cell_size(self.cell_size)
+        self.resample = resample
+        self.cell_aspect = cell_aspect
+        self.dither = self._check_dither(dither)
+        self.stage_timer = stage_timer or default_stage_timer
+        self._terminal_encoder = TerminalEncoder(palette, dither)
+        self._stages = {}     # Stage name -> cached result, see STAGE_DEPENDENTS.
+        self._canvases = {}   # Color flag -> (character set, cell size, glyph grid, ink grid, pixels).
+        self._lock = threading.Lock()  # Serializes updates and renders.
+
+        # What the last render had to do, for display and benchmarking.
+        self.computed_stages = []  # The stages computed by the last render, in order.
+        self.redrawn_cells = 0     # The number of PNG cells drawn by the last render.
+
+    def update(self, **parameters):
+        """
+        Changes some parameters, dropping only the stages that depend on them.
+
+        Args:
+            **parameters: New values for any of image, color, palette, ascii_width, cell_size, glyph_mode,
+                          dither, resample and cell_aspect.
+                          Values equal to the current ones invalidate nothing.
+        """
+        with self._lock:
+            self._update(parameters)
+
+    def render(self, **parameters) -> tuple[Image.Image, str]:
+        """
+        Converts the image with the current parameters, computing only the stages
+        that are not cached.
+
+        Args:
+            **parameters: Parameters to change first, as accepted by update.
+
+        Returns:
+            tuple[Image.Image, str]: A PIL Image object representing the ASCII art, and the
+                                     ASCII art formatted for the console, as Ansii.render() returns them.
+        """
+        with self._lock:
+            self._update(parameters)
+            self.computed_stages = []
+            self.redrawn_cells = 0
+            return self._stage("png"), self._stage("console")
+
+    def _update(self, parameters: dict):
+        """
+        Applies new parameter values and invalidates the stages depending on the changed ones.
+        """
+        unknown = set(parameters) - set(PARAMETER_STAGES)
+        if unknown:
+            raise TypeError(f"Unknown session parameter(s): {', '.join(sorted(unknown))}.")
+        if "cell_size" in parameters:
+            parameters["cell_size"] = tuple(parameters["cell_size"])
+        if "glyph_mode" in parameters:
+            self._check_glyph_mode(parameters["glyph_mode"])
+        if "dither" in parameters:
+            self._check_dither(parameters["dither"])
+        if parameters.get("glyph_mode", self.glyph_mode) == "shape":
+            check_shape_cell_size(parameters.get("cell_size", self.cell_size))
+        check_resampling(parameters.get("resample", self.resample), parameters.get("cell_aspect", self.cell_aspect))
+
+        # Images are compared by identity: comparing their pixels would cost as much as a resize.
+        changed = [name for name, value in parameters.items()
+                   if value is not getattr(self, name) and (name == "image" or value != getattr(self, name))]
+        for name in changed:
+            setattr(self, name, parameters[name])
+        if "palette" in changed or "dither" in changed:
+            self._terminal_encoder = TerminalEncoder(self.palette, self.dither)
+        for name in changed:
+            for stage in PARAMETER_STAGES[name]:
+                self._invalidate(stage)
+            if name == "cell_size" and self.glyph_mode == "shape":
+                self._invalidate("glyphs")
+
+    def _invalidate(self, stage: str):
+        """
+        Drops a cached stage and every stage computed from it.
+        """
+        self._stages.pop(stage, None)
+        for dependent in STAGE_DEPENDENTS[stage]:
+            self._invalidate(dependent)
+
+    def _stage(self, stage: str):
+        """
+        Returns the result of a stage, computing it (and the stages it needs) if it is not cached.
+        """
+        if stage not in self._stages:
+            self._stages[stage] = getattr(self, f"_compute_{stage}")()
+            self.computed_stages.append(stage)
+        return self._stages[stage]
+
+    def _ansii(self) -> Ansii:
+        """
+        Returns the Ansii object of the resized image, set up with the current parameters.
+        Only the resize is tied to it; the other parameters are plain attributes that are
+        updated in place, so that its pixel and luminance buffers are kept.
+        """
+        ansii = self._stage("resize")
+        ansii.enable_color = self.color
+        ansii.cell_size = self.cell_size
+        ansii.glyph_mode = self.glyph_mode
+        ansii.dither = self.dither
+        ansii.character_set = Ansii.character_set_of(self.glyph_mode)
+        ansii.terminal_encoder = self._terminal_encoder
+        return ansii
+
+    def _compute_resize(self) -> Ansii:
+        return Ansii(self.image, self.color, self.palette, self.ascii_width, self.cell_size,
+                     stage_timer=self.stage_timer, glyph_mode=self.glyph_mode, dither=self.dither,
+                     resample=self.resample, cell_aspect=self.cell_aspect)
+
+    def _compute_glyphs(self) -> np.ndarray:
+        ansii = self._ansii()
+        with self.stage_timer.measure("glyph_mapping"):
+            return ansii.compute_glyph_indices()
+
+    def _compute_lines(self) -> list[str]:
+        glyph_indices = self._stage("glyphs")
+        with self.stage_timer.measure("glyph_mapping"):
+            return self._ansii()._glyph_indices_to_lines(glyph_indices)
+
+    def _compute_colors(self) -> np.ndarray:
+        ansii = self._ansii()
+        with self.stage_timer.measure("color_extraction"):
+            return ansii.compute_color_matrix()
+
+    def _compute_console(self) -> str:
+        ascii_lines = self._stage("lines")
+        color_matrix = self._stage("colors") if self.color else None
+        with self.stage_timer.measure("console_formatting"):
+            return "\n".join(self._ansii().format_console_lines(ascii_lines, color_matrix))
+
+    def _compute_png(self) -> Image.Image:
+        glyph_indices = self._stage("glyphs")
+        color_matrix = self._stage("colors") if self.color else None
+        character_set = Ansii.character_set_of(self.glyph_mode)
+        atlas = get_glyph_atlas(character_set, self.cell_size)
+        if color_matrix is None:
+            ink = np.zeros(glyph_indices.shape + (3,), dtype=np.uint8)
+        else:
+            ink = np.ascontiguousarray(color_matrix, dtype=np.uint8)
+
+        with self.stage_timer.measure("png_rendering"):
+            previous = self._canvases.get(self.color)
+            changed_cells = None
+            if previous is not None:
+                previous_set, previous_cell_size, previous_glyphs, previous_ink, pixels = previous
+                # The previous pixels can only be patched if they were drawn with the same glyphs at the same size.
+                if (previous_set == character_set and previous_cell_size == self.cell_size
+                        and previous_glyphs.shape == glyph_indices.shape):
+                    changed_cells = (previous_glyphs != glyph_indices) | (previous_ink != ink).any(axis=2)
+
+            if changed_cells is not None and changed_cells.mean() <= FULL_REDRAW_FRACTION:
+                self.redrawn_cells = atlas.redraw(pixels, glyph_indices, color_matrix, changed_cells)
+            else:
+                pixels = atlas.render_array(glyph_indices, color_matrix)
+                self.redrawn_cells = glyph_indices.size
+            self._canvases[self.color] = (character_set, self.cell_size, glyph_indices, ink, pixels)
+            # Image.fromarray copies the pixels, so later patches never alter an image already handed out.
+            return Image.fromarray(pixels)
+
+    @staticmethod
+    def _check_glyph_mode(glyph_mode: str) -> str:
+        """
+        Validates a glyph mode.
+
+        Returns:
+            str: The glyph mode.
+        """
+        if glyph_mode not in GLYPH_MODES:
+            raise ValueError(f"Unknown glyph mode '{glyph_mode}', expected one of {', '.join(GLYPH_MODES)}.")
+        return glyph_mode
+
+    @staticmethod
+    def _check_dither(dither: str) -> str:
+        """
+        Validates a dither mode.
+
+        Returns:
+            str: The dither mode.
+        """
+        if dither not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither}', expected one of {', '.join(DITHER_MODES)}.")
+        return dither
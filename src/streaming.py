@@ -0,0 +1,288 @@
+from PIL import Image
+import numpy as np
+
+from ansii import Ansii, ASCII_CHARACTER_SET, ASCII_WIDTH, CELL_SIZE, ascii_output_height, parse_cell_size
+from glyph_atlas import get_glyph_atlas
+from image_input import map_image, resize_bands
+from png_stream import PngStreamWriter
+from terminal import PALETTES, write_to_terminal
+
+# Modes kept as they are while resizing; any other mode is converted to RGB first.
+STREAMABLE_MODES = ("L", "RGB", "RGBA")
+
+
+class StreamingAnsii:
+    """
+    Converts very large images into ASCII art without ever holding the whole
+    image in memory. The source is read in horizontal bands, each band is
+    narrowed to the ASCII width as soon as it is read, and ASCII rows are
+    produced (and written) as soon as the rows they depend on are available.
+    Narrowed rows are dropped once no later ASCII row depends on them, and the
+    ASCII rows are the same as those of a regular conversion.
+
+    Uncompressed layouts (PPM/PGM, uncompressed BMP, single-strip TIFF and
+    NumPy .npy files) are memory-mapped and read band by band, so peak memory
+    is bounded by a band. JPEGs are scaled on decode with Image.draft. Other formats still have
+    to be decoded at once by Pillow, but none of the intermediate full-size
+    copies of the regular conversion are made.
+    """
+    def __init__(self, image_path: str, color: bool = False, band_rows: int = 16, source_band_rows: int = 256,
+                 palette: str = "truecolor", ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE):
+        """
+        Initializes the StreamingAnsii object. The image is opened but not decoded.
+
+        Args:
+            image_path (str): The path of the image to convert.
+            color (bool): If True, the generated ASCII art will attempt to preserve original colors.
+                          Defaults to False.
+            band_rows (int): The number of ASCII rows produced at a time. Defaults to 16.
+            source_band_rows (int): The number of source image rows read at a time. Defaults to 256.
+            palette (str): The terminal palette used for colored console output. Defaults to "truecolor".
+            ascii_width (int): The number of characters per row. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The size in pixels of each character of the PNG. Defaults to CELL_SIZE.
+        """
+        self.image_path = image_path
+        self.enable_color = color
+        self.band_rows = band_rows
+        self.source_band_rows = source_band_rows
+        self.cell_size = cell_size
+
+        self._mapped_image = map_image(image_path)
+        self._image = Image.open(image_path) if self._mapped_image is None else None
+        source_size = self._image.size if self._image is not None else self._mapped_image.size
+        # Same output size as Ansii._resize_for_ascii.
+        self.width = ascii_width
+        self.height = ascii_output_height(source_size, ascii_width)
+
+        if self._image is not None:
+            # Let JPEG decode at a reduced scale (never below the output size). Other formats ignore this.
+            self._image.draft("RGB", (self.width, self.height))
+            source_size = self._image.size
+        self._source_width, self._source_height = source_size
+
+        # Only used for its formatting methods, which do not depend on the image.
+        self._formatter = Ansii.from_processed_image(Image.new("L", (self.width, 1)), color, palette)
+
+    def iter_bands(self):
+        """
+        Converts the image band by band.
+
+        Yields:
+            tuple[np.ndarray, np.ndarray]: For each band of ASCII rows, the (rows, width) glyph index
+                                           matrix and the (rows, width, 3) RGB matrix (None if color
+                                           is disabled).
+        """
+        # Only the source rows the next ASCII rows depend on are kept (see resize_bands).
+        for band_image in resize_bands(self._iter_source_bands(), self._source_height, (self.width, self.height),
+                                       self.band_rows):
+            yield self._convert_band(band_image)
+
+    def _iter_source_bands(self):
+        """
+        Reads the source image from top to bottom.
+
+        Yields:
+            Image.Image: Successive horizontal bands of the source image, in a mode of STREAMABLE_MODES.
+        """
+        if self._mapped_image is not None:
+            bands = self._mapped_image.iter_bands(self.source_band_rows)
+        else:
+            bands = self._iter_decoded_bands()
+        for band in bands:
+            if band.mode not in STREAMABLE_MODES:
+                band = band.convert("RGB")
+            yield band
+
+    def _iter_decoded_bands(self):
+        """
+        Decodes the image with Pillow and hands it out band by band.
+
+        Yields:
+            Image.Image: Successive horizontal bands of the source image.
+        """
+        self._image.load()
+        for top in range(0, self._source_height, self.source_band_rows):
+            bottom = min(top + self.source_band_rows, self._source_height)
+            yield self._image.crop((0, top, self._source_width, bottom))
+
+    def _convert_band(self, band_image: Image.Image) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Maps a band of the resized image to glyphs.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The glyph index matrix and the RGB matrix (None if color is disabled).
+        """
+        band_ansii = Ansii.from_processed_image(band_image, self.enable_color)
+        glyph_indices = band_ansii.compute_glyph_indices()
+        color_matrix = band_ansii.compute_color_matrix() if self.enable_color else None
+        return glyph_indices, color_matrix
+
+    def iter_rows(self):
+        """
+        Converts the image and yields the ASCII art formatted for the console.
+
+        Yields:
+            str: One row of ASCII art (with ANSI color codes if color is enabled).
+        """
+        for glyph_indices, color_matrix in self.iter_bands():
+            yield from self._format_band(glyph_indices, color_matrix)
+
+    def _format_band(self, glyph_indices: np.ndarray, color_matrix: np.ndarray) -> list[str]:
+        """
+        Formats a band of glyphs for the console.
+
+        Returns:
+            list[str]: One line per ASCII row (with ANSI color codes if color is enabled).
+        """
+        lines = self._formatter._glyph_indices_to_lines(glyph_indices)
+        return self._formatter.format_console_lines(lines, color_matrix)
+
+    def write(self, text_file=None, png_file=None, terminal: bool = False):
+        """
+        Converts the image and writes the outputs incrementally, band by band.
+
+        Args:
+            text_file: An optional text file object receiving the ASCII art (with ANSI color
+                       codes if color is enabled).
+            png_file: An optional binary file object receiving a PNG of the ASCII art.
+            terminal (bool): If True, the ASCII art is also printed to the console. Defaults to False.
+        """
+        png_renderer = None
+        if png_file is not None:
+            png_renderer = _BandPngRenderer(png_file, self.width, self.height, self.cell_size)
+
+        for glyph_indices, color_matrix in self.iter_bands():
+            band_output = "".join(line + "\n" for line in self._format_band(glyph_indices, color_matrix))
+            if text_file is not None:
+                text_file.write(band_output)
+            if terminal:
+                write_to_terminal(band_output)
+            if png_renderer is not None:
+                png_renderer.add_band(glyph_indices, color_matrix)
+
+        if png_renderer is not None:
+            png_renderer.close()
+        if terminal:
+            write_to_terminal("\n")
+
+
+class _BandPngRenderer:
+    """
+    Renders bands of glyphs with the glyph atlas and streams them into a PNG file.
+
+    Glyphs may ink outside of their cell, so rows are only written once the rows
+    their neighbours' ink can reach (GlyphAtlas.reach) are known: they are rendered
+    with that many rows of context on each side, and the context rows are cropped away.
+    """
+    def __init__(self, png_file, columns: int, rows: int, cell_size: tuple[int, int]):
+        """
+        Initializes the renderer and writes the PNG header.
+
+        Args:
+            png_file: A binary file object receiving the PNG.
+            columns (int): The number of ASCII columns.
+            rows (int): The total number of ASCII rows.
+            cell_size (tuple[int, int]): The size in pixels of each character.
+        """
+        cell_width, cell_height = cell_size
+        self._cell_height = cell_height
+        self._atlas = get_glyph_atlas(tuple(ASCII_CHARACTER_SET), tuple(cell_size))
+        self._reach = self._atlas.reach[0]
+        self._writer = PngStreamWriter(png_file, columns * cell_width, rows * cell_height)
+        self._written_rows = None   # Last rows written, as context of the pending ones.
+        self._pending_rows = None   # Rows waiting for the rows following them.
+
+    def add_band(self, glyph_indices: np.ndarray, color_matrix: np.ndarray):
+        """
+        Adds the next band of glyphs, writing the rows whose context is now known.
+        """
+        self._pending_rows = _concatenate_rows(self._pending_rows, (glyph_indices, color_matrix))
+        ready = len(self._pending_rows[0]) - self._reach
+        if ready > 0:
+            self._render_pending(ready)
+
+    def close(self):
+        """
+        Writes the last rows and finishes the PNG file.
+        """
+        if self._pending_rows is not None and len(self._pending_rows[0]):
+            self._render_pending(len(self._pending_rows[0]))
+        self._writer.close()
+
+    def _render_pending(self, count: int):
+        """
+        Renders the first pending rows between the last rows written and the rest of
+        the pending rows, and writes their pixels.
+
+        Args:
+            count (int): The number of pending rows to write.
+        """
+        context_glyphs, context_colors = _concatenate_rows(self._written_rows, self._pending_rows)
+        top = 0 if self._written_rows is None else len(self._written_rows[0]) * self._cell_height
+        rendered = self._atlas.render_array(context_glyphs, context_colors)
+        self._writer.write_rows(rendered[top:top + count * self._cell_height])
+
+        written = _concatenate_rows(self._written_rows, _slice_rows(self._pending_rows, 0, count))
+        self._written_rows = _slice_rows(written, max(len(written[0]) - self._reach, 0), len(written[0]))
+        self._pending_rows = _slice_rows(self._pending_rows, count, len(self._pending_rows[0]))
+
+
+def _concatenate_rows(first: tuple, second: tuple) -> tuple:
+    """
+    Stacks two (glyph indices, colors) groups of rows, either of which may be None.
+    """
+    if first is None:
+        return second
+    colors = None if first[1] is None else np.concatenate((first[1], second[1]))
+    return np.concatenate((first[0], second[0])), colors
+
+
+def _slice_rows(rows: tuple, start: int, stop: int) -> tuple:
+    """
+    Selects rows start to stop (excluded) of a (glyph indices, colors) group of rows.
+    """
+    glyph_indices, color_matrix = rows
+    return glyph_indices[start:stop], None if color_matrix is None else color_matrix[start:stop]
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the streaming mode. Converts one (possibly huge) image band by
+    band, printing it to the console and/or writing text and PNG outputs.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'stream'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py stream",
+                                     description="Convert a very large image to ASCII art with bounded memory.")
+    parser.add_argument("image", help="The image to convert.")
+    parser.add_argument("--color", action="store_true", help="Generate colored ASCII art.")
+    parser.add_argument("--text", help="Write the ASCII art to this text file.")
+    parser.add_argument("--png", help="Write a PNG of the ASCII art to this file.")
+    parser.add_argument("--palette", choices=PALETTES, default="truecolor",
+                        help="Terminal palette of the colored output.")
+    parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    parser.add_argument("--band-rows", type=int, default=16, help="ASCII rows produced at a time.")
+    options = parser.parse_args(arguments)
+
+    streaming_ansii = StreamingAnsii(options.image, options.color, band_rows=options.band_rows,
+                                     palette=options.palette, ascii_width=options.width,
+                                     cell_size=options.cell_size)
+    text_file = open(options.text, "w", encoding="utf-8") if options.text else None
+    png_file = open(options.png, "wb") if options.png else None
+    try:
+        # Print to the console unless the output goes to files.
+        streaming_ansii.write(text_file, png_file, terminal=text_file is None and png_file is None)
+    finally:
+        for output_file in (text_file, png_file):
+            if output_file is not None:
+                output_file.close()
+    return 0
@@ -0,0 +1,227 @@
+import sys
+
+import numpy as np
+
+from dithering import DITHER_MODES, dither_colors
+
+# Color palettes the terminal encoder can target.
+PALETTES = ("truecolor", "256", "16")
+
+# ANSI escape sequence resetting the colors to the terminal default.
+RESET = "\x1b[0m"
+
+# Intensity of each of the 6 levels of the xterm 256-color cube (codes 16 to 231).
+XTERM_CUBE_LEVELS = np.array([0, 95, 135, 175, 215, 255])
+
+# Intensity of each of the 24 shades of the xterm gray ramp (codes 232 to 255).
+XTERM_GRAY_LEVELS = np.arange(8, 248, 10)
+
+# RGB values of the 16 standard colors, in the xterm defaults. Codes 0-7 are the
+# normal colors (SGR 30-37) and codes 8-15 the bright ones (SGR 90-97).
+ANSI_16_COLORS = np.array([
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+])
+
+# Spacing between neighbouring colors of each palette on one channel, which sets the
+# amplitude of ordered dithering: the spacing of the xterm cube, and a third of the
+# channel range for the 16 colors.
+PALETTE_SPACING = {"256": 40, "16": 85}
+
+
+def palette_colors(palette: str) -> np.ndarray:
+    """
+    Lists the RGB color of every code of a palette, as returned by quantize_colors.
+
+    Args:
+        palette (str): "256" or "16".
+
+    Returns:
+        np.ndarray: A (code count, 3) int array of RGB colors, indexed by code.
+    """
+    if palette == "16":
+        return ANSI_16_COLORS
+    if palette == "256":
+        cube_index = np.indices((6, 6, 6)).reshape(3, -1).T
+        gray_colors = np.repeat(XTERM_GRAY_LEVELS[:, np.newaxis], 3, axis=1)
+        return np.concatenate([ANSI_16_COLORS, XTERM_CUBE_LEVELS[cube_index], gray_colors])
+    raise ValueError(f"Palette '{palette}' has no fixed colors, expected '256' or '16'.")
+
+
+def quantize_colors(color_matrix: np.ndarray, palette: str = "truecolor") -> np.ndarray:
+    """
+    Maps every color to a code of the target palette, in a vectorized way.
+
+    Args:
+        color_matrix (np.ndarray): A (..., 3) uint8 array of RGB colors.
+        palette (str): One of PALETTES. Defaults to "truecolor".
+
+    Returns:
+        np.ndarray: An int array with the color shape minus its last axis. For "truecolor"
+                    each code is the packed 0xRRGGBB value; otherwise it is the palette index.
+    """
+    colors = np.asarray(color_matrix).astype(np.int32)
+    if palette == "truecolor":
+        return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+    if palette == "256":
+        # Nearest level of the 6x6x6 cube on each channel.
+        cube_index = np.abs(colors[..., np.newaxis] - XTERM_CUBE_LEVELS).argmin(axis=-1)
+        cube_colors = XTERM_CUBE_LEVELS[cube_index]
+        cube_codes = 16 + 36 * cube_index[..., 0] + 6 * cube_index[..., 1] + cube_index[..., 2]
+        # Nearest shade of the gray ramp to the mean intensity.
+        gray_index = np.abs(colors.mean(axis=-1, keepdims=True) - XTERM_GRAY_LEVELS).argmin(axis=-1)
+        gray_colors = XTERM_GRAY_LEVELS[gray_index][..., np.newaxis]
+        # Keep whichever of the two is closer to the original color.
+        cube_distance = ((colors - cube_colors) ** 2).sum(axis=-1)
+        gray_distance = ((colors - gray_colors) ** 2).sum(axis=-1)
+        return np.where(gray_distance < cube_distance, 232 + gray_index, cube_codes)
+
+    if palette == "16":
+        distances = ((colors[..., np.newaxis, :] - ANSI_16_COLORS) ** 2).sum(axis=-1)
+        return distances.argmin(axis=-1)
+
+    raise ValueError(f"Unknown palette '{palette}', expected one of {', '.join(PALETTES)}.")
+
+
+def _color_escape(code: int, palette: str) -> str:
+    """
+    Builds the ANSI escape sequence selecting a foreground color.
+
+    Args:
+        code (int): A color code returned by quantize_colors.
+        palette (str): The palette the code belongs to.
+
+    Returns:
+        str: The escape sequence.
+    """
+    if palette == "truecolor":
+        # 38;2 indicates true color foreground, followed by the R;G;B components.
+        return f"\x1b[38;2;{code >> 16};{(code >> 8) & 0xFF};{code & 0xFF}m"
+    if palette == "256":
+        return f"\x1b[38;5;{code}m"
+    return f"\x1b[{30 + code if code < 8 else 90 + code - 8}m"
+
+
+class TerminalEncoder:
+    """
+    Formats ASCII art for the terminal. In color mode an escape sequence is only
+    emitted when the color changes from the previous character, and colors are
+    reset once per line instead of after every character, which makes wide
+    colored art several times smaller than coloring each character separately.
+    """
+    def __init__(self, palette: str = "truecolor", dither: str = "none"):
+        """
+        Initializes the TerminalEncoder object.
+
+        Args:
+            palette (str): The palette colors are quantized to: "truecolor" (24-bit),
+                           "256" (xterm 256 colors) or "16" (standard ANSI colors).
+                           Defaults to "truecolor".
+            dither (str): How colors are dithered across the palette, one of dithering.DITHER_MODES.
+                          Truecolor output is never dithered. Defaults to "none".
+        """
+        if palette not in PALETTES:
+            raise ValueError(f"Unknown palette '{palette}', expected one of {', '.join(PALETTES)}.")
+        if dither not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither}', expected one of {', '.join(DITHER_MODES)}.")
+        self.palette = palette
+        self.dither = dither
+        # The colors of the palette codes, needed to measure the error diffused by dithering.
+        self._palette_colors = palette_colors(palette) if palette != "truecolor" and dither != "none" else None
+        # Escape sequences are built once per distinct color code.
+        self._escapes = {}
+
+    def format_lines(self, ascii_lines: list[str], color_matrix: np.ndarray = None) -> list[str]:
+        """
+        Formats ASCII lines for the terminal.
+
+        Args:
+            ascii_lines (list[str]): The ASCII art, one string per row.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) RGB matrix of the same rows.
+                                       If None, the lines are returned unchanged.
+
+        Returns:
+            list[str]: The lines to print, one per row.
+        """
+        if color_matrix is None:
+            return ascii_lines
+
+        color_codes = self.quantize(color_matrix)
+        # A run of characters starts wherever the color differs from the previous column.
+        run_starts = np.ones(color_codes.shape, dtype=bool)
+        run_starts[:, 1:] = color_codes[:, 1:] != color_codes[:, :-1]
+
+        formatted_lines = []
+        for line, line_codes, line_run_starts in zip(ascii_lines, color_codes.tolist(), run_starts):
+            starts = np.flatnonzero(line_run_starts).tolist()
+            pieces = []
+            for start, end in zip(starts, starts[1:] + [len(line)]):
+                pieces.append(self._escape(line_codes[start]))
+                pieces.append(line[start:end])
+            pieces.append(RESET)
+            formatted_lines.append("".join(pieces))
+        return formatted_lines
+
+    def quantize(self, color_matrix: np.ndarray) -> np.ndarray:
+        """
+        Maps every color to a code of the palette, dithering them if enabled.
+
+        Args:
+            color_matrix (np.ndarray): A (rows, columns, 3) RGB matrix.
+
+        Returns:
+            np.ndarray: The (rows, columns) matrix of color codes (see quantize_colors).
+        """
+        if self._palette_colors is None:
+            return quantize_colors(color_matrix, self.palette)
+        return dither_colors(color_matrix, self._palette_colors,
+                             lambda colors: quantize_colors(colors, self.palette),
+                             self.dither, PALETTE_SPACING[self.palette])
+
+    def encode(self, ascii_lines: list[str], color_matrix: np.ndarray = None) -> bytes:
+        """
+        Formats ASCII lines for the terminal and encodes them into a single buffer.
+
+        Args:
+            ascii_lines (list[str]): The ASCII art, one string per row.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) RGB matrix of the same rows.
+
+        Returns:
+            bytes: The UTF-8 encoded output, one line per row, each terminated by a newline.
+        """
+        formatted_lines = self.format_lines(ascii_lines, color_matrix)
+        return ("\n".join(formatted_lines) + "\n").encode("utf-8")
+
+    def _escape(self, code: int) -> str:
+        """
+        Returns the escape sequence of a color code, building it on first use.
+        """
+        escape = self._escapes.get(code)
+        if escape is None:
+            escape = self._escapes[code] = _color_escape(code, self.palette)
+        return escape
+
+
+def write_to_terminal(data):
+    """
+    Writes text or pre-encoded bytes to the console in a single call, going
+    straight to the binary buffer of sys.stdout when there is one.
+
+    Args:
+        data (str | bytes): The output to write.
+    """
+    output_buffer = getattr(sys.stdout, "buffer", None)
+    if output_buffer is None:
+        # sys.stdout has been replaced by a text-only stream (e.g. when captured).
+        sys.stdout.write(data.decode("utf-8") if isinstance(data, bytes) else data)
+        sys.stdout.flush()
+        return
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    # Flush whatever print() has buffered first so that the output stays in order.
+    sys.stdout.flush()
+    output_buffer.write(data)
+    output_buffer.flush()
@@ -0,0 +1,169 @@
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+import numpy as np
+
+from glyph_atlas import GlyphAtlas
+from png_stream import PngStreamWriter
+
+# Number of character columns of a tile.
+TILE_COLUMNS = 256
+
+# Upper bound of the pixels of a band of tiles (a full-width strip of the image), which
+# sets the number of character rows per band, and with it the memory of streamed renders.
+BAND_PIXEL_BUDGET = 1 << 24
+
+# Bounds of the number of character rows per band.
+MIN_BAND_ROWS = 2
+MAX_BAND_ROWS = 32
+
+# Grids with at least this many cells are rendered by tiles in parallel; smaller ones are
+# rendered in one piece, which is faster than splitting them.
+TILED_RENDER_MIN_CELLS = 1 << 16
+
+
+class TiledRenderer:
+    """
+    Renders ASCII art with the glyph atlas tile by tile on a pool of threads.
+
+    The character grid is split into bands of rows, and each band into tiles of
+    columns. Tiles are rendered independently (see GlyphAtlas.render_region, the
+    result is identical to rendering the whole grid at once) and in parallel: the
+    array operations composing them release the GIL. Tiles are either pasted into
+    the final image, which is then the only full-size buffer, or gathered band by
+    band and streamed out as PNG rows, so that only a few bands are ever held.
+    """
+    def __init__(self, atlas: GlyphAtlas, workers: int = None, tile_columns: int = TILE_COLUMNS,
+                 band_rows: int = None):
+        """
+        Initializes the TiledRenderer object.
+
+        Args:
+            atlas (GlyphAtlas): The atlas of the character set and cell size to render with.
+            workers (int): The number of rendering threads. Defaults to None (the number of CPUs).
+            tile_columns (int): The number of character columns per tile. Defaults to TILE_COLUMNS.
+            band_rows (int): The number of character rows per band. Defaults to None, which fits
+                             bands to BAND_PIXEL_BUDGET.
+        """
+        self.atlas = atlas
+        self.workers = workers or os.cpu_count() or 1
+        self.tile_columns = tile_columns
+        self.band_rows = band_rows
+
+    def rows_per_band(self, columns: int) -> int:
+        """
+        Returns the number of character rows per band for a grid width.
+
+        Args:
+            columns (int): The number of character columns of the grid.
+
+        Returns:
+            int: The rows per band: band_rows if set, otherwise as many as BAND_PIXEL_BUDGET allows,
+                 within MIN_BAND_ROWS and MAX_BAND_ROWS.
+        """
+        if self.band_rows is not None:
+            return self.band_rows
+        row_pixels = columns * self.atlas.cell_width * self.atlas.cell_height
+        return min(max(BAND_PIXEL_BUDGET // max(row_pixels, 1), MIN_BAND_ROWS), MAX_BAND_ROWS)
+
+    def render(self, glyph_indices: np.ndarray, color_matrix: np.ndarray = None) -> Image.Image:
+        """
+        Composes an image of the ASCII art, rendering its tiles in parallel.
+
+        Args:
+            glyph_indices (np.ndarray): A (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) uint8 matrix of RGB colors,
+                                       one per cell. If None, glyphs are drawn in black.
+
+        Returns:
+            Image.Image: A PIL RGB Image of the ASCII art, identical to GlyphAtlas.render.
+        """
+        rows, columns = glyph_indices.shape
+        cell_width, cell_height = self.atlas.cell_width, self.atlas.cell_height
+        image = Image.new("RGB", (columns * cell_width, rows * cell_height), "white")
+        paste_lock = threading.Lock()
+
+        def render_tile(tile: tuple[int, int, int, int]):
+            top, bottom, left, right = tile
+            tile_image = Image.fromarray(self.atlas.render_region(glyph_indices, color_matrix,
+                                                                 top, bottom, left, right))
+            with paste_lock:
+                image.paste(tile_image, (left * cell_width, top * cell_height))
+
+        tiles = [tile for band in self._bands(rows, columns) for tile in self._band_tiles(band, columns)]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tile-render") as executor:
+            # Consuming the results re-raises any error of a tile.
+            for _ in executor.map(render_tile, tiles):
+                pass
+        return image
+
+    def write_png(self, png_file, glyph_indices: np.ndarray, color_matrix: np.ndarray = None,
+                  compression_level: int = 6):
+        """
+        Renders the ASCII art and streams it into a PNG file band by band. Bands are
+        rendered in parallel a few at a time, and written in order as soon as they are complete.
+
+        Args:
+            png_file: A binary file object receiving the PNG.
+            glyph_indices (np.ndarray): A (rows, columns) matrix of indices into the character set.
+            color_matrix (np.ndarray): An optional (rows, columns, 3) uint8 matrix of RGB colors,
+                                       one per cell. If None, glyphs are drawn in black.
+            compression_level (int): The zlib compression level, from 0 (none) to 9. Defaults to 6.
+        """
+        rows, columns = glyph_indices.shape
+        cell_width, cell_height = self.atlas.cell_width, self.atlas.cell_height
+        writer = PngStreamWriter(png_file, columns * cell_width, rows * cell_height, compression_level)
+
+        def render_tile(band_pixels: np.ndarray, tile: tuple[int, int, int, int]):
+            top, bottom, left, right = tile
+            band_pixels[:, left * cell_width:right * cell_width] = \
+                self.atlas.render_region(glyph_indices, color_matrix, top, bottom, left, right)
+
+        # Enough bands in flight to keep every thread busy, and no more.
+        tiles_per_band = math.ceil(columns / self.tile_columns)
+        bands_in_flight = max(2, math.ceil(2 * self.workers / tiles_per_band))
+        pending_bands = deque()  # (band pixels, futures of its tiles), in image order.
+        bands = iter(self._bands(rows, columns))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tile-render") as executor:
+            while True:
+                while len(pending_bands) < bands_in_flight:
+                    band = next(bands, None)
+                    if band is None:
+                        break
+                    top, bottom = band
+                    band_pixels = np.empty(((bottom - top) * cell_height, columns * cell_width, 3), dtype=np.uint8)
+                    futures = [executor.submit(render_tile, band_pixels, tile)
+                               for tile in self._band_tiles(band, columns)]
+                    pending_bands.append((band_pixels, futures))
+                if not pending_bands:
+                    break
+                band_pixels, futures = pending_bands.popleft()
+                for future in futures:
+                    future.result()
+                writer.write_rows(band_pixels)
+        writer.close()
+
+    def _bands(self, rows: int, columns: int) -> list[tuple[int, int]]:
+        """
+        Splits the rows of a grid into bands.
+
+        Returns:
+            list[tuple[int, int]]: The (top, bottom) rows of each band, bottom excluded.
+        """
+        band_rows = self.rows_per_band(columns)
+        return [(top, min(top + band_rows, rows)) for top in range(0, rows, band_rows)]
+
+    def _band_tiles(self, band: tuple[int, int], columns: int) -> list[tuple[int, int, int, int]]:
+        """
+        Splits a band into tiles.
+
+        Returns:
+            list[tuple[int, int, int, int]]: The (top, bottom, left, right) cells of each tile.
+        """
+        top, bottom = band
+        return [(top, bottom, left, min(left + self.tile_columns, columns))
+                for left in range(0, columns, self.tile_columns)]
@@ -0,0 +1,608 @@
+import json
+import os
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Only the conversion code is imported here: worker processes import this module
+# to run _convert_file, and must never pay for (or require) tkinter.
+from ansii import Ansii, ASCII_WIDTH, CELL_SIZE
+from art_format import ART_EXTENSION
+from batch import IMAGE_EXTENSIONS, _convert_one
+from cache import file_digest
+from resampling import DEFAULT_CELL_ASPECT, DEFAULT_RESAMPLE
+
+# Files kept in the output directory: the manifest of converted images, which lets a
+# restarted watcher resume without converting them again, and the default status file.
+MANIFEST_NAME = ".watch_manifest.json"
+STATUS_NAME = "watch_status.json"
+
+# Version of the manifest layout; manifests of another version are ignored.
+MANIFEST_VERSION = 2
+
+# Number of recent conversions the latency percentiles of the status file are computed over.
+LATENCY_WINDOW = 256
+
+# Seconds between two writes of the status file while nothing else changes.
+STATUS_INTERVAL = 1.0
+
+# With inotify, the directory is still rescanned this often in case an event was missed.
+INOTIFY_RESCAN_INTERVAL = 30.0
+
+# inotify flags (from <sys/inotify.h>): files finished writing, created, moved, deleted or touched.
+IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x4, 0x8, 0x40, 0x80, 0x100, 0x200
+WATCH_EVENTS = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+
+
+def _open_inotify(directory: str) -> int:
+    """
+    Starts watching a directory with inotify, through the C library.
+
+    Args:
+        directory (str): The directory to watch.
+
+    Returns:
+        int: The inotify file descriptor, or None where inotify is not available
+             (other systems than Linux, or no watch left).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        file_descriptor = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if file_descriptor < 0:
+        return None
+    if libc.inotify_add_watch(file_descriptor, os.fsencode(directory), WATCH_EVENTS) < 0:
+        os.close(file_descriptor)
+        return None
+    return file_descriptor
+
+
+class DirectoryMonitor:
+    """
+    Tells when the content of a directory may have changed. With inotify, a thread
+    waits for the events of the directory and sets the wakeup event as soon as one
+    arrives; otherwise (or with use_inotify=False, e.g. for network shares whose
+    remote changes inotify does not see) the watcher falls back to polling.
+    """
+    def __init__(self, directory: str, wakeup: threading.Event, use_inotify: bool = True):
+        """
+        Initializes the DirectoryMonitor object.
+
+        Args:
+            directory (str): The directory to watch.
+            wakeup (threading.Event): The event set whenever the directory changes.
+            use_inotify (bool): If False, inotify is not even tried. Defaults to True.
+        """
+        self.changed = False  # Set on every event, reset by the watcher before it rescans.
+        self._wakeup = wakeup
+        self._closed = False
+        self._file_descriptor = _open_inotify(directory) if use_inotify else None
+        self.backend = "polling" if self._file_descriptor is None else "inotify"
+        self._thread = None
+        if self._file_descriptor is not None:
+            self._thread = threading.Thread(target=self._read_events, name="inotify", daemon=True)
+            self._thread.start()
+
+    def _read_events(self):
+        """
+        Waits for inotify events until the monitor is closed. The events themselves are
+        drained and dropped: the watcher rescans the directory, which is cheap.
+        """
+        while not self._closed:
+            # A short timeout, so that closing the monitor ends the thread promptly.
+            readable, _, _ = select.select([self._file_descriptor], [], [], 0.5)
+            if not readable or self._closed:
+                continue
+            try:
+                os.read(self._file_descriptor, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self.changed = True
+            self._wakeup.set()
+
+    def close(self):
+        """
+        Stops watching the directory.
+        """
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join()
+            os.close(self._file_descriptor)
+
+
+def _init_worker():
+    """
+    Prepares a worker process. Ctrl+C reaches the whole process group, so workers
+    ignore it and finish their conversion while the watcher shuts down.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _convert_file(image_path: str, output_stem: str, conversion: dict) -> tuple[str, float]:
+    """
+    Converts a single image like the batch mode does and measures how long it takes.
+    Runs inside a worker process.
+
+    Args:
+        image_path (str): The path of the image to convert.
+        output_stem (str): The path of the outputs without extension.
+        conversion (dict): The keyword arguments of batch._convert_one (see FolderWatcher.conversion).
+
+    Returns:
+        tuple[str, float]: None on success, otherwise a description of the error,
+                           and the conversion time in seconds.
+    """
+    start_time = time.perf_counter()
+    error, _ = _convert_one(image_path, output_stem, **conversion)
+    return error, time.perf_counter() - start_time
+
+
+def _write_json(path: str, data: dict):
+    """
+    Writes a JSON file atomically, so that readers never see it half written.
+    """
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                                       suffix=".json.tmp")
+    with os.fdopen(file_descriptor, "w", encoding="utf-8") as json_file:
+        json.dump(data, json_file, indent=1)
+    os.replace(temporary_path, path)
+
+
+class FolderWatcher:
+    """
+    Converts the images dropped into a directory as they arrive.
+
+    The directory is rescanned whenever inotify reports a change (or every poll
+    interval without it). A file is considered again only when its modification
+    time or size changed; it is then hashed, and converted only if no output exists
+    for its content yet: unchanged content is skipped, and a copy of an image that
+    was already converted gets a copy of its outputs. Conversions run on a pool of
+    worker processes, with at most two per worker submitted at once; the others
+    wait in a queue. Every result is recorded in a manifest in the output
+    directory, so that a restarted watcher resumes where it stopped, and the queue
+    depth and conversion latencies are published in a JSON status file.
+    """
+    def __init__(self, directory: str, output_dir: str, workers: int = None, color: bool = False,
+                 ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE,
+                 glyph_mode: str = "intensity", dither: str = "none", resample: str = DEFAULT_RESAMPLE,
+                 cell_aspect: float = DEFAULT_CELL_ASPECT, save_art: bool = False, poll_interval: float = 1.0,
+                 settle_seconds: float = 1.0, status_path: str = None, use_inotify: bool = True):
+        """
+        Initializes the FolderWatcher object.
+
+        Args:
+            directory (str): The directory to watch. Only the images directly inside it are converted.
+            output_dir (str): The directory where the outputs, the manifest and the status file are written.
+            workers (int): The number of worker processes. Defaults to the number of CPUs.
+            color (bool): If True, the ASCII art is colored. Defaults to False.
+            ascii_width (int): The number of characters per row. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The size in pixels of each rendered character. Defaults to CELL_SIZE.
+            glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+            dither (str): How intensities are dithered, see dithering.DITHER_MODES. Defaults to "none".
+            resample (str): The resampling filter, see resampling.RESAMPLE_FILTERS. Defaults to DEFAULT_RESAMPLE.
+            cell_aspect (float): The height of a character cell divided by its width. Defaults to DEFAULT_CELL_ASPECT.
+            save_art (bool): If True, the ASCII art data is saved too (see art_format). Defaults to False.
+            poll_interval (float): Seconds between two scans of the directory without inotify. Defaults to 1.0.
+            settle_seconds (float): Files modified more recently than this are left for a later scan,
+                                    as they may still be being written. Defaults to 1.0.
+            status_path (str): The path of the status file. Defaults to STATUS_NAME in the output directory.
+            use_inotify (bool): If False, the directory is always polled. Defaults to True.
+        """
+        self.directory = directory
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count()
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.use_inotify = use_inotify
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.status_path = status_path or os.path.join(output_dir, STATUS_NAME)
+        self.output_extensions = (".png", ".txt") + ((ART_EXTENSION,) if save_art else ())
+
+        # The keyword arguments of every conversion. They are stored in the manifest too (with
+        # the character set, which code changes may alter): changing any of them converts again.
+        self.conversion = {
+            "color": color, "ascii_width": ascii_width, "cell_size": tuple(cell_size), "glyph_mode": glyph_mode,
+            "save_art": save_art, "dither": dither, "resample": resample, "cell_aspect": cell_aspect,
+        }
+        self.parameters = dict(self.conversion, cell_size=list(cell_size),
+                               character_set="".join(Ansii.character_set_of(glyph_mode)))
+
+        self._files = {}        # File name -> manifest record of every image seen.
+        self._pending = deque()  # (file name, record, detection time) waiting for a worker.
+        self._in_flight = {}    # Future -> (file name, record, detection time) of submitted conversions.
+        self._settling = False  # Whether the last scan left files that were still being written.
+        self._deferred = False  # Whether it left copies of content being converted, see _check.
+        self._rescan = False    # Set when a conversion deferred files depend on has finished.
+        self._stopping = False
+        self._wakeup = threading.Event()  # Set on directory changes, finished conversions and stop requests.
+        self._latencies = deque(maxlen=LATENCY_WINDOW)  # (conversion seconds, end-to-end seconds).
+        self._status_time = 0.0
+        self.backend = None   # "inotify" or "polling", once running.
+        self._started = None  # Start time of run(), as a Unix timestamp.
+
+        # Counters published in the status file.
+        self.stats = {"converted": 0, "copied": 0, "skipped": 0, "failed": 0}
+        self.recent_failures = deque(maxlen=10)
+
+    def run(self, once: bool = False):
+        """
+        Watches the directory until stop() is called (or, with once, until every image present
+        has been handled).
+
+        Args:
+            once (bool): If True, returns as soon as the directory has been processed. Defaults to False.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._load_manifest()
+        monitor = DirectoryMonitor(self.directory, self._wakeup, self.use_inotify)
+        self.backend = monitor.backend
+        rescan_interval = self.poll_interval if monitor.backend == "polling" else INOTIFY_RESCAN_INTERVAL
+        self._started = time.time()
+        next_scan = 0.0
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+                while not self._stopping:
+                    # Cleared first, so that anything happening from here on wakes the next wait up.
+                    self._wakeup.clear()
+                    changed, monitor.changed = monitor.changed, False
+                    if changed or self._rescan or time.monotonic() >= next_scan:
+                        self._rescan = False
+                        self.scan()
+                        # Files still being written are looked at again once they have settled.
+                        delay = min(rescan_interval, self.settle_seconds) if self._settling else rescan_interval
+                        next_scan = time.monotonic() + delay
+                    self._collect()
+                    self._submit(executor)
+                    self._write_status()
+                    if once and not (self._pending or self._in_flight or self._settling or self._deferred):
+                        break
+                    self._wakeup.wait(max(0.0, min(next_scan - time.monotonic(), STATUS_INTERVAL)))
+                # Conversions already running are finished and recorded; queued ones are left to the next run.
+                for future in list(self._in_flight):
+                    future.exception()
+                self._collect()
+        finally:
+            monitor.close()
+            self._save_manifest()
+            self._write_status(state="stopped")
+
+    def stop(self):
+        """
+        Asks the watcher to stop. Safe to call from a signal handler.
+        """
+        self._stopping = True
+        self._wakeup.set()
+
+    def scan(self):
+        """
+        Lists the images of the directory and queues those whose content has no output yet.
+        """
+        self._settling = self._deferred = False
+        busy = {name for name, _, _ in self._pending} | {name for name, _, _ in self._in_flight.values()}
+        now = time.time()
+        with os.scandir(self.directory) as entries:
+            images = [entry for entry in entries
+                      if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS and entry.is_file()]
+        present = {entry.name for entry in images}
+        for entry in images:
+            if entry.name in busy:
+                # A file changed during its conversion is seen as modified by the next scan.
+                continue
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                continue
+            record = self._files.get(entry.name)
+            if record is not None and (record["mtime_ns"], record["size"]) == (file_stat.st_mtime_ns,
+                                                                             file_stat.st_size):
+                if "error" in record or self._has_outputs(record):
+                    continue
+            if now - file_stat.st_mtime < self.settle_seconds:
+                self._settling = True
+                continue
+            self._check(entry.name, file_stat, record, present)
+
+        # Images removed from the directory are forgotten; their outputs are kept.
+        for name in set(self._files) - present - busy:
+            del self._files[name]
+
+    def _check(self, name: str, file_stat: os.stat_result, record: dict, present: set):
+        """
+        Hashes a new or modified image and either skips it, copies the outputs of the same
+        content, or queues it for conversion.
+
+        Args:
+            name (str): The file name of the image in the directory.
+            file_stat (os.stat_result): Its status, from the scan.
+            record (dict): Its manifest record, or None if it has never been seen.
+            present (set): The names of all the images in the directory.
+        """
+        try:
+            digest = file_digest(os.path.join(self.directory, name))
+        except OSError:
+            # Removed or unreadable since the scan: the next scan will tell.
+            return
+        new_record = {"mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size, "digest": digest}
+        # An image keeps the outputs name it was given when it was first seen.
+        stem = record.get("stem") if record is not None else None
+        if stem is None:
+            stem = self._choose_stem(name, present)
+        if stem is None:
+            error = "Its outputs would overwrite those of another image."
+            self._files[name] = dict(new_record, error=error)
+            self.stats["failed"] += 1
+            self.recent_failures.append({"file": name, "error": error})
+            print(f"Failed: '{name}': {error}", flush=True)
+            return
+        new_record["stem"] = stem
+        if record is not None and record["digest"] == digest and self._has_outputs(record):
+            # Touched or rewritten with the same content.
+            self._files[name] = new_record
+            self.stats["skipped"] += 1
+            return
+        if any(queued_record["digest"] == digest for _, queued_record, _ in
+               list(self._pending) + list(self._in_flight.values())):
+            # The same content is already being converted: its outputs are copied by a later scan.
+            self._deferred = True
+            return
+        source_name = next((other for other, other_record in self._files.items()
+                            if other_record["digest"] == digest and "error" not in other_record
+                            and self._has_outputs(other_record)), None)
+        if source_name is not None:
+            try:
+                for extension in self.output_extensions:
+                    shutil.copyfile(self._output_stem(self._files[source_name]) + extension,
+                                    self._output_stem(new_record) + extension)
+            except OSError:
+                pass
+            else:
+                self._files[name] = new_record
+                self.stats["copied"] += 1
+                print(f"Copied the outputs of '{source_name}' for '{name}' (same content).", flush=True)
+                return
+        self._pending.append((name, new_record, time.monotonic()))
+
+    def _submit(self, executor: ProcessPoolExecutor):
+        """
+        Submits queued conversions, keeping at most two per worker in the pool so that the
+        queue stays bounded and observable here instead of inside the executor.
+        """
+        while self._pending and len(self._in_flight) < 2 * self.workers:
+            name, record, detection_time = self._pending.popleft()
+            future = executor.submit(_convert_file, os.path.join(self.directory, name), self._output_stem(record),
+                                     self.conversion)
+            self._in_flight[future] = name, record, detection_time
+            future.add_done_callback(lambda _: self._wakeup.set())
+
+    def _collect(self):
+        """
+        Records the conversions that have finished, and saves the manifest if there were any.
+        """
+        finished = [future for future in self._in_flight if future.done()]
+        for future in finished:
+            name, record, detection_time = self._in_flight.pop(future)
+            try:
+                error, conversion_seconds = future.result()
+            except Exception as e:
+                # The worker itself failed, e.g. it was killed.
+                error, conversion_seconds = f"{type(e).__name__}: {e}", 0.0
+            if error is None:
+                self.stats["converted"] += 1
+                latency_seconds = time.monotonic() - detection_time
+                self._latencies.append((conversion_seconds, latency_seconds))
+                print(f"Converted '{name}' in {conversion_seconds:.2f}s ({latency_seconds:.2f}s after it was found).",
+                      flush=True)
+            else:
+                # Failed images are not retried until they change.
+                record = dict(record, error=error)
+                self.stats["failed"] += 1
+                self.recent_failures.append({"file": name, "error": error})
+                print(f"Failed: '{name}': {error}", flush=True)
+            self._files[name] = record
+        if finished:
+            self._save_manifest()
+            if self._deferred:
+                self._rescan = True
+                self._wakeup.set()
+
+    def _choose_stem(self, name: str, present: set) -> str:
+        """
+        Names the outputs of an image seen for the first time, like the batch mode does
+        (see batch.output_stems): after the image without its extension, unless another
+        image of the directory has the same name apart from its extension, in which case
+        the extension is kept.
+
+        Args:
+            name (str): The file name of the image.
+            present (set): The names of all the images in the directory.
+
+        Returns:
+            str: The name of the outputs without extension, or None if outputs of another
+                 image already use it.
+        """
+        stem = os.path.splitext(name)[0]
+        if any(other != name and os.path.normcase(os.path.splitext(other)[0]) == os.path.normcase(stem)
+               for other in present):
+            stem = name
+        queued = list(self._pending) + list(self._in_flight.values())
+        records = list(self._files.items()) + [(other, record) for other, record, _ in queued]
+        taken = {os.path.normcase(record["stem"]) for other, record in records if other != name and "stem" in record}
+        return None if os.path.normcase(stem) in taken else stem
+
+    def _output_stem(self, record: dict) -> str:
+        """
+        Returns the path of the outputs of an image, without extension, from its record.
+        """
+        return os.path.join(self.output_dir, record["stem"])
+
+    def _has_outputs(self, record: dict) -> bool:
+        """
+        Returns whether every output of an image exists, from its record.
+        """
+        if "stem" not in record:
+            return False
+        output_stem = self._output_stem(record)
+        return all(os.path.exists(output_stem + extension) for extension in self.output_extensions)
+
+    def _load_manifest(self):
+        """
+        Loads the records of a previous run, unless it used other conversion parameters.
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring the unreadable manifest '{self.manifest_path}': {e}", flush=True)
+            return
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("parameters") != self.parameters:
+            print("The conversion parameters changed since the last run: converting every image again.", flush=True)
+            return
+        self._files = manifest["files"]
+
+    def _save_manifest(self):
+        """
+        Writes the records of every image, atomically.
+        """
+        _write_json(self.manifest_path, {"version": MANIFEST_VERSION, "parameters": self.parameters,
+                                         "files": self._files})
+
+    def status(self, state: str = "watching") -> dict:
+        """
+        Builds the status published in the status file.
+
+        Args:
+            state (str): "watching", or "stopped" once the watcher has shut down. Defaults to "watching".
+
+        Returns:
+            dict: The state, queue depth, counters and latency percentiles (in milliseconds) of the
+                  last LATENCY_WINDOW conversions.
+        """
+        latencies = {}
+        if self._latencies:
+            for metric, values in zip(("conversion_ms", "end_to_end_ms"), np.array(self._latencies).T * 1000):
+                latencies[metric] = {
+                    "last": round(float(values[-1]), 1), "mean": round(float(values.mean()), 1),
+                    "p50": round(float(np.percentile(values, 50)), 1), "p90": round(float(np.percentile(values, 90)), 1),
+                    "p99": round(float(np.percentile(values, 99)), 1), "max": round(float(values.max()), 1),
+                }
+        return {
+            "state": state,
+            "directory": os.path.abspath(self.directory),
+            "backend": self.backend,
+            "workers": self.workers,
+            "pid": os.getpid(),
+            "started": self._started,
+            "updated": time.time(),
+            "queue_depth": len(self._pending) + len(self._in_flight),
+            "queued": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "tracked_files": len(self._files),
+            **self.stats,
+            "latency_window": len(self._latencies),
+            "latency": latencies,
+            "recent_failures": list(self.recent_failures),
+        }
+
+    def _write_status(self, state: str = "watching"):
+        """
+        Writes the status file, at most every STATUS_INTERVAL seconds unless the watcher stops.
+        """
+        if state == "watching" and time.monotonic() - self._status_time < STATUS_INTERVAL:
+            return
+        self._status_time = time.monotonic()
+        _write_json(self.status_path, self.status(state))
+
+
+def main(arguments: list[str]):
+    """
+    Entry point of the watch mode: converts the images dropped into a directory until
+    interrupted (Ctrl+C or SIGTERM), resuming from the manifest of a previous run.
+
+    Args:
+        arguments (list[str]): The command-line arguments following 'watch'.
+
+    Returns:
+        int: The process exit status.
+    """
+    import argparse
+    from ansii import GLYPH_MODES, parse_cell_size
+    from dithering import DITHER_MODES
+    from glyph_index import check_shape_cell_size
+    from resampling import RESAMPLE_FILTERS
+
+    parser = argparse.ArgumentParser(prog="main.py watch",
+                                     description="Convert the images dropped into a directory as they arrive.")
+    parser.add_argument("directory", help="The directory to watch.")
+    parser.add_argument("--out", required=True,
+                        help="Directory where the outputs, the manifest and the status file are written.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (defaults to the number of CPUs).")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Seconds between two scans of the directory when polling (default 1).")
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="Seconds a file must stay unmodified before it is converted (default 1).")
+    parser.add_argument("--polling", action="store_true",
+                        help="Poll the directory even where inotify is available, e.g. for network shares.")
+    parser.add_argument("--status", help=f"Path of the status file (default '{STATUS_NAME}' in the output directory).")
+    parser.add_argument("--once", action="store_true", help="Process the images present, then exit.")
+    parser.add_argument("--color", action="store_true", help="Generate colored ASCII art.")
+    parser.add_argument("--width", type=int, default=ASCII_WIDTH,
+                        help=f"Number of characters per row of the ASCII art (default {ASCII_WIDTH}).")
+    parser.add_argument("--cell-size", type=parse_cell_size, default=CELL_SIZE,
+                        help="Size in pixels of each rendered character, as WIDTHxHEIGHT or a single number.")
+    parser.add_argument("--glyphs", choices=GLYPH_MODES, default="intensity",
+                        help="Choose characters by cell brightness (intensity) or by glyph shape (shape).")
+    parser.add_argument("--dither", choices=DITHER_MODES, default="none",
+                        help="Dither intensities across the characters (intensity glyphs only).")
+    parser.add_argument("--resample", choices=RESAMPLE_FILTERS, default=DEFAULT_RESAMPLE,
+                        help=f"Filter resampling the image to the character grid (default {DEFAULT_RESAMPLE}).")
+    parser.add_argument("--cell-aspect", type=float, default=DEFAULT_CELL_ASPECT,
+                        help="Height of a character cell divided by its width, e.g. 2 for terminal fonts.")
+    parser.add_argument("--art", action="store_true",
+                        help=f"Also save the ASCII art data of each image as a compressed '{ART_EXTENSION}' file.")
+    options = parser.parse_args(arguments)
+    if options.glyphs == "shape":
+        # Checked here rather than failing every conversion in the workers.
+        try:
+            check_shape_cell_size(options.cell_size)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if not os.path.isdir(options.directory):
+        print(f"Error: '{options.directory}' is not a directory.")
+        return 1
+    if os.path.abspath(options.out) == os.path.abspath(options.directory):
+        # The PNG outputs would be picked up as new images.
+        print("Error: The output directory must differ from the watched directory.")
+        return 1
+
+    watcher = FolderWatcher(options.directory, options.out, options.workers, options.color, options.width,
+                            options.cell_size, options.glyphs, options.dither, options.resample, options.cell_aspect,
+                            options.art, options.interval, options.settle, options.status, not options.polling)
+    # Ctrl+C and SIGTERM both let the conversions in flight finish and the manifest be saved.
+    signal.signal(signal.SIGINT, lambda *_: watcher.stop())
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+
+    print(f"Watching '{options.directory}' with {watcher.workers} workers; status in '{watcher.status_path}'.",
+          flush=True)
+    watcher.run(once=options.once)
+    stats = watcher.stats
+    print(f"Converted {stats['converted']} images, copied {stats['copied']}, skipped {stats['skipped']}, "
+          f"{stats['failed']} failed.")
+    return 0
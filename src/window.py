@@ -1,6 +1,13 @@
-from tkinter import Tk, BOTH, Canvas, ttk, Label, StringVar, X
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import Tk, BOTH, Canvas, ttk, Label, StringVar, BooleanVar, IntVar, X
 from PIL import ImageTk, Image
-from ansii import Ansii  # Assuming 'Ansii' is a custom class for ASCII art conversion.
+from ansii import ASCII_WIDTH, CELL_SIZE
+from dithering import DITHER_MODES
+from session import ConversionSession
+from terminal import write_to_terminal
+
+# Range of the cell sizes, in pixels, offered by the cell size control.
+CELL_SIZE_RANGE = (4, 32)
 
 class Window:
     """
@@ -8,7 +15,9 @@ class Window:
     representations (grayscale and colored). It provides buttons to switch
     between these views.
     """
-    def __init__(self, width: int, height: int, img: Image.Image):
+    def __init__(self, width: int, height: int, img: Image.Image,
+                 ascii_width: int = ASCII_WIDTH, cell_size: tuple[int, int] = CELL_SIZE,
+                 glyph_mode: str = "intensity", dither: str = "none"):
         """
         Initializes the GUI window.
 
@@ -16,6 +25,11 @@ class Window:
             width (int): The desired width for the main image display area.
             height (int): The desired height for the main image display area.
             img (Image.Image): The PIL Image object to be displayed and converted.
+            ascii_width (int): The number of characters per row of the ASCII art. Defaults to ASCII_WIDTH.
+            cell_size (tuple[int, int]): The size in pixels of each character of the rendered
+                                         ASCII art. Defaults to CELL_SIZE.
+            glyph_mode (str): How characters are chosen, see ansii.GLYPH_MODES. Defaults to "intensity".
+            dither (str): How intensities are dithered, see dithering.DITHER_MODES. Defaults to "none".
         """
         self.image_display_width = width
         self.image_display_height = height
@@ -41,11 +55,29 @@ class Window:
                               width=self.image_display_width + 200)
         self._canvas.pack(fill=BOTH, expand=1)
 
-        # Flag to control the main event loop.
+        # Flag telling whether the main event loop is running.
         self._is_running = False
         
-        # Store the original PIL Image object.
+        # Store the original PIL Image object and the ASCII art parameters.
         self.original_image = img
+        self.ascii_width = ascii_width
+        self.cell_size = tuple(cell_size)
+        self.glyph_mode = glyph_mode
+        self.dither = dither
+
+        # Both views and every tuning of the parameters go through one conversion
+        # session: the resized image, glyphs and colors are shared, and a change of
+        # parameter only recomputes what depends on it and redraws the changed cells.
+        self._session = ConversionSession(img, ascii_width=ascii_width, cell_size=self.cell_size,
+                                          glyph_mode=glyph_mode, dither=dither)
+
+        # Conversions run in the background so the window stays responsive.
+        # Results are only ever handed to Tkinter from the UI thread, by polling.
+        self._conversion_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ascii-conversion")
+        self._conversions = {}            # color flag -> Future of (PNG image, console output)
+        self._pending_view = None         # Color flag of the ASCII view waiting for its conversion, if any.
+        self._is_polling = False          # Whether a poll of the conversions is scheduled.
+        self._conversion_poll_ms = 50     # Delay between two polls while conversions are running.
         
         # Configure ttk (themed Tkinter) styles for buttons.
         self._configure_button_styles()
@@ -59,6 +91,8 @@ class Window:
         self._create_picture_button()
         self._create_grayscale_button()
         self._create_color_button()
+        self._create_progress_indicator()
+        self._create_tuning_controls()
     
     def _configure_button_styles(self):
         """
@@ -91,34 +125,30 @@ class Window:
             width=13
         )
 
-    def _redraw_window(self):
-        """
-        Updates the Tkinter window. This is necessary to refresh the display
-        and process events within the main loop.
-        """
-        self.root.update()  
-
     def wait_for_close(self):
         """
         Starts the main event loop of the Tkinter window.
-        The window will remain open and responsive until the user closes it
-        or the `_is_running` flag is set to False.
+        The window will remain open and responsive until the user closes it.
+        The loop sleeps while there are no events, so an idle window uses no CPU.
         """
         self._is_running = True
-        while self._is_running:
-            self._redraw_window()
+        self.root.mainloop()
         print("Window closed....")
 
     def _on_window_close(self):
         """
         Callback function executed when the user attempts to close the window.
-        It sets the internal running flag to False, which terminates the main loop.
+        It abandons pending conversions and destroys the window, which terminates the main loop.
         """
         self._is_running = False
+        self._conversion_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
     
     def _display_original_picture(self):
         """
-        Displays the original image in the main display area of the window.
+        Displays the original image in the main display area of the window,
+        and starts converting both ASCII art views in the background so that
+        they are ready by the time the user asks for them.
         """
         self._is_picture_displayed = True
         # Convert PIL Image to Tkinter PhotoImage.
@@ -131,15 +161,112 @@ class Window:
                                           image=self._photo_image)
         self._image_display_label.place(x=self.padding_margin, y=self.padding_margin)
 
+        # Precompute both ASCII art variants.
+        self._start_conversion(False)
+        self._start_conversion(True)
+
     def _display_grayscale_ascii(self):
         """
-        Converts the image to grayscale ASCII art using the Ansii class
-        and displays it in the main display area.
+        Displays the grayscale ASCII art in the main display area, as soon as
+        its background conversion is finished.
+        """
+        self._display_ascii_when_ready(False)
+
+    def _display_color_ascii(self):
+        """
+        Displays the colored ASCII art in the main display area, as soon as
+        its background conversion is finished.
+        """
+        self._display_ascii_when_ready(True)
+
+    def _display_ascii_when_ready(self, color: bool):
+        """
+        Shows an ASCII art view right away if its conversion is done, otherwise
+        remembers it so that it is shown when the conversion completes.
+
+        Args:
+            color (bool): True for the colored view, False for the grayscale one.
+        """
+        conversion = self._start_conversion(color)
+        if conversion.done():
+            self._pending_view = None
+            self._show_conversion_result(color, conversion)
+        else:
+            self._pending_view = color
+
+    def _start_conversion(self, color: bool):
+        """
+        Submits the conversion of the image to the background executor, unless it was already submitted.
+
+        Args:
+            color (bool): True to convert to colored ASCII art, False for grayscale.
+
+        Returns:
+            Future: The future of the conversion, resolving to (PNG image, console output).
+        """
+        if color not in self._conversions:
+            # The parameters are bound now, so a later tuning does not change a conversion already submitted.
+            self._conversions[color] = self._conversion_executor.submit(
+                self._session.render, color=color, cell_size=self.cell_size, glyph_mode=self.glyph_mode,
+                dither=self.dither)
+            self._update_progress_indicator()
+            self._schedule_conversion_poll()
+        return self._conversions[color]
+
+    def _schedule_conversion_poll(self):
+        """
+        Schedules a check of the running conversions on the UI thread, if none is scheduled yet.
+        """
+        if not self._is_polling:
+            self._is_polling = True
+            self.root.after(self._conversion_poll_ms, self._poll_conversions)
+
+    def _poll_conversions(self):
+        """
+        Runs on the UI thread while conversions are in progress: shows the view
+        the user is waiting for once it is ready, and keeps polling until every
+        conversion is done.
+        """
+        self._is_polling = False
+        if self._pending_view is not None and self._conversions[self._pending_view].done():
+            color = self._pending_view
+            self._pending_view = None
+            self._show_conversion_result(color, self._conversions[color])
+
+        self._update_progress_indicator()
+        if any(not conversion.done() for conversion in self._conversions.values()):
+            self._schedule_conversion_poll()
+
+    def _show_conversion_result(self, color: bool, conversion):
+        """
+        Displays a finished conversion and prints the ASCII art to the console.
+
+        Args:
+            color (bool): True for the colored view, False for the grayscale one.
+            conversion (Future): The finished conversion.
+        """
+        try:
+            ascii_image, console_output = conversion.result()
+        except Exception as e:
+            # Forget the failed conversion so that clicking the button again retries it.
+            del self._conversions[color]
+            self._update_progress_indicator()
+            print(f"An unexpected error occurred while converting the image: {e}")
+            return
+        write_to_terminal(console_output + "\n\n")
+        if color:
+            self._show_color_ascii(ascii_image)
+        else:
+            self._show_grayscale_ascii(ascii_image)
+
+    def _show_grayscale_ascii(self, grayscale_ascii_image: Image.Image):
+        """
+        Displays the grayscale ASCII art in the main display area.
+
+        Args:
+            grayscale_ascii_image (Image.Image): The rendered grayscale ASCII art.
         """
         self._is_grayscale_displayed = True
-        # Create an Ansii object (without color) and convert the image to ASCII art.
-        grayscale_ascii_image = Ansii(self.original_image).convert_image_to_ascii()
-        
         # Convert the generated PIL Image (of ASCII art) to Tkinter PhotoImage.
         self._grayscale_ascii_photo_image = ImageTk.PhotoImage(grayscale_ascii_image)
         
@@ -149,15 +276,14 @@ class Window:
                                               image=self._grayscale_ascii_photo_image)
         self._grayscale_display_label.place(x=self.padding_margin, y=self.padding_margin)        
 
-    def _display_color_ascii(self):
+    def _show_color_ascii(self, color_ascii_image: Image.Image):
         """
-        Converts the image to colored ASCII art using the Ansii class
-        and displays it in the main display area.
+        Displays the colored ASCII art in the main display area.
+
+        Args:
+            color_ascii_image (Image.Image): The rendered colored ASCII art.
         """
         self._is_color_displayed = True
-        # Create an Ansii object (with color enabled) and convert the image to ASCII art.
-        color_ascii_image = Ansii(self.original_image, True).convert_image_to_ascii()
-        
         # Convert the generated PIL Image (of colored ASCII art) to Tkinter PhotoImage.
         self._color_ascii_photo_image = ImageTk.PhotoImage(color_ascii_image)
         
@@ -167,6 +293,79 @@ class Window:
                                           image=self._color_ascii_photo_image)
         self._color_display_label.place(x=self.padding_margin, y=self.padding_margin) 
         
+    def _create_progress_indicator(self):
+        """
+        Creates and places the progress bar and status text shown while conversions are running.
+        """
+        self._progress_bar = ttk.Progressbar(self.root, mode='indeterminate', length=150)
+        self._progress_bar.place(x=(self.image_display_width + 10), y=400)
+        self._progress_text = StringVar(value="")
+        self._progress_label = Label(self.root, textvariable=self._progress_text, bg="white")
+        self._progress_label.place(x=(self.image_display_width + 10), y=430)
+
+    def _update_progress_indicator(self):
+        """
+        Animates the progress bar while at least one conversion is running, and stops it otherwise.
+        """
+        running_count = sum(not conversion.done() for conversion in self._conversions.values())
+        if running_count:
+            self._progress_text.set(f"Converting... ({running_count} pending)")
+            self._progress_bar.start(20)
+        else:
+            self._progress_text.set("")
+            self._progress_bar.stop()
+
+    def _create_tuning_controls(self):
+        """
+        Creates and places the controls tuning the ASCII art: shape-matched glyphs, the cell size
+        and the dither mode. Dithering only moves some cells to a neighbouring character, so the
+        session patches the previous PNG instead of rendering it again.
+        """
+        self._shape_glyphs = BooleanVar(value=self.glyph_mode == "shape")
+        self._shape_glyphs_button = ttk.Checkbutton(self.root, text="Shape glyphs", variable=self._shape_glyphs,
+                                                    command=self._on_tuning_change)
+        self._shape_glyphs_button.place(x=(self.image_display_width + 10), y=470)
+
+        self._cell_size_label = Label(self.root, text="Cell size", bg="white")
+        self._cell_size_label.place(x=(self.image_display_width + 10), y=510)
+        self._cell_size_value = IntVar(value=self.cell_size[0])
+        self._cell_size_spinbox = ttk.Spinbox(self.root, from_=CELL_SIZE_RANGE[0], to=CELL_SIZE_RANGE[1], width=5,
+                                              textvariable=self._cell_size_value, command=self._on_tuning_change)
+        self._cell_size_spinbox.bind("<Return>", lambda event: self._on_tuning_change())
+        self._cell_size_spinbox.place(x=(self.image_display_width + 80), y=510)
+
+        self._dither_label = Label(self.root, text="Dither", bg="white")
+        self._dither_label.place(x=(self.image_display_width + 10), y=550)
+        self._dither_value = StringVar(value=self.dither)
+        self._dither_combobox = ttk.Combobox(self.root, values=DITHER_MODES, state="readonly", width=14,
+                                             textvariable=self._dither_value)
+        self._dither_combobox.bind("<<ComboboxSelected>>", lambda event: self._on_tuning_change())
+        self._dither_combobox.place(x=(self.image_display_width + 60), y=550)
+
+    def _on_tuning_change(self):
+        """
+        Handles a change of the tuning controls: forgets the conversions made with
+        the previous parameters and converts the ASCII art view being shown again.
+        The session only recomputes the stages the change affects.
+        """
+        glyph_mode = "shape" if self._shape_glyphs.get() else "intensity"
+        try:
+            cell_width = min(max(self._cell_size_value.get(), CELL_SIZE_RANGE[0]), CELL_SIZE_RANGE[1])
+        except ValueError:
+            return  # Not a number (yet): keep the current parameters.
+        cell_size = (cell_width, cell_width) if cell_width != self.cell_size[0] else self.cell_size
+        dither = self._dither_value.get()
+        if glyph_mode == self.glyph_mode and cell_size == self.cell_size and dither == self.dither:
+            return
+        self.glyph_mode = glyph_mode
+        self.cell_size = cell_size
+        self.dither = dither
+        self._conversions = {}
+        if self._is_grayscale_displayed or self._pending_view is False:
+            self._on_grayscale_button_click()
+        elif self._is_color_displayed or self._pending_view is True:
+            self._on_color_button_click()
+
     def _create_picture_button(self):
         """
         Creates and places the "Actual Picture" button.
@@ -199,6 +398,7 @@ class Window:
         Handles the click event for the "Actual Picture" button.
         Destroys other active views and displays the original picture.
         """
+        self._pending_view = None
         self._destroy_grayscale_view()
         self._destroy_color_view()
         self._display_original_picture()
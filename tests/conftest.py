@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+REPOSITORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SOURCE_DIR = os.path.join(REPOSITORY_DIR, "src")
+IMAGES_DIR = os.path.join(REPOSITORY_DIR, "images")
+
+# The modules of src/ are flat and imported by name, as src/main.py does.
+sys.path.insert(0, SOURCE_DIR)
+
+
+@pytest.fixture
+def image_paths() -> list[str]:
+    """
+    The paths of the images bundled with the repository.
+    """
+    return sorted(os.path.join(IMAGES_DIR, name) for name in os.listdir(IMAGES_DIR))
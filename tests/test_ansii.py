@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+
+# Sizes of the random test images: odd sizes catch row stride mistakes.
+RANDOM_IMAGE_SIZES = [(1, 1), (7, 5), (97, 61)]
+
+
+def random_image(mode: str, size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """
+    Builds an image of random pixels in the given mode.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    if mode == "L":
+        return Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), "L")
+    if mode in ("RGB", "RGBA"):
+        return Image.fromarray(rng.integers(0, 256, (height, width, len(mode)), dtype=np.uint8), mode)
+    if mode == "I":
+        # 32-bit intensities within the range the reference mapping accepts.
+        return Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.int32), "I")
+    if mode == "P":
+        image = Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), "P")
+        image.putpalette(rng.integers(0, 256, 768, dtype=np.uint8).tobytes())
+        return image
+    raise ValueError(mode)
+
+
+def assert_matches_reference(ansii: Ansii):
+    """
+    Checks the vectorized glyph mapping and color extraction against the per-pixel reference.
+    """
+    reference_lines, reference_colors = ansii._convert_image_to_ascii_reference()
+    assert ansii._glyph_indices_to_lines(ansii.compute_glyph_indices()) == reference_lines
+    if ansii.enable_color:
+        assert np.array_equal(ansii.compute_color_matrix(), np.array(reference_colors, dtype=np.uint8))
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "I", "P"])
+@pytest.mark.parametrize("size", RANDOM_IMAGE_SIZES)
+@pytest.mark.parametrize("color", [False, True])
+def test_random_processed_images_match_the_reference(mode, size, color):
+    ansii = Ansii.from_processed_image(random_image(mode, size), color)
+    assert_matches_reference(ansii)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "I", "P"])
+@pytest.mark.parametrize("color", [False, True])
+def test_random_images_match_the_reference_after_resizing(mode, color):
+    ansii = Ansii(random_image(mode, (211, 137), seed=1), color, ascii_width=42)
+    assert_matches_reference(ansii)
+
+
+@pytest.mark.parametrize("color", [False, True])
+@pytest.mark.parametrize("ascii_width", [1, 42, 160])
+def test_bundled_images_match_the_reference(image_paths, color, ascii_width):
+    for image_path in image_paths:
+        with Image.open(image_path) as image:
+            assert_matches_reference(Ansii(image, color, ascii_width=ascii_width))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from PIL import Image
+
+from ansii import Ansii
+from art_format import HEADER, AsciiArt, _aligned, main
+
+CHARACTER_SET = ("@", "#", ".", " ")
+
+
+def sample_art() -> AsciiArt:
+    """
+    A small colored ASCII art with a few distinct colors, so that it is stored with a palette.
+    """
+    rng = np.random.default_rng(0)
+    glyph_indices = rng.integers(0, len(CHARACTER_SET), (5, 7), dtype=np.uint8)
+    palette = np.array([[255, 0, 0], [0, 255, 0], [0, 0, 255]], dtype=np.uint8)
+    return AsciiArt(CHARACTER_SET, glyph_indices, palette[rng.integers(0, len(palette), (5, 7))])
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("color_encoding", ["rgb", "palette"])
+def test_art_round_trips(compress, color_encoding):
+    art = sample_art()
+    decoded = AsciiArt.from_bytes(art.to_bytes(compress, color_encoding))
+    assert decoded.character_set == art.character_set
+    assert np.array_equal(decoded.glyph_indices, art.glyph_indices)
+    assert np.array_equal(decoded.color_matrix, art.color_matrix)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_glyph_indices_outside_of_the_character_set_are_rejected(compress):
+    art = sample_art()
+    glyph_indices = art.glyph_indices.copy()
+    glyph_indices[2, 3] = len(CHARACTER_SET)
+    data = AsciiArt(CHARACTER_SET, glyph_indices, art.color_matrix).to_bytes(compress)
+    with pytest.raises(ValueError, match="outside of the character set"):
+        AsciiArt.from_bytes(data)
+
+
+def test_corrupted_glyph_bytes_are_rejected():
+    data = bytearray(sample_art().to_bytes())
+    charset_size = len("".join(CHARACTER_SET).encode("utf-8"))
+    data[_aligned(_aligned(HEADER.size) + charset_size)] = 255
+    with pytest.raises(ValueError, match="outside of the character set"):
+        AsciiArt.from_bytes(bytes(data))
+
+
+def test_palette_indices_outside_of_the_palette_are_rejected():
+    # The palette indices are the last bytes of an uncompressed file.
+    data = bytearray(sample_art().to_bytes(color_encoding="palette"))
+    data[-1] = 3
+    with pytest.raises(ValueError, match="outside of the palette"):
+        AsciiArt.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize("cell_size", [(12, 12), (8, 16)])
+def test_saved_shape_art_is_matched_at_the_cell_size(tmp_path, image_paths, cell_size):
+    out_path = str(tmp_path / "image.aart")
+    arguments = ["save", image_paths[-1], "--out", out_path, "--glyphs", "shape", "--width", "30"]
+    assert main(arguments + ["--cell-size", f"{cell_size[0]}x{cell_size[1]}"]) == 0
+    with Image.open(image_paths[-1]) as image:
+        expected = Ansii(image, ascii_width=30, cell_size=cell_size, glyph_mode="shape").to_art()
+    assert np.array_equal(AsciiArt.load(out_path).glyph_indices, expected.glyph_indices)
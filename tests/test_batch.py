@@ -0,0 +1,46 @@
+import os
+import shutil
+
+from PIL import Image
+
+import batch
+from batch import output_stems
+
+
+def test_output_stems_drop_the_extension_unless_names_collide():
+    stems = output_stems([os.path.join("in", name) for name in ("a.png", "x.png", "x.jpg")], "in")
+    assert stems == {os.path.join("in", "a.png"): "a", os.path.join("in", "x.png"): "x.png",
+                     os.path.join("in", "x.jpg"): "x.jpg"}
+
+
+def test_output_stems_keep_subdirectories():
+    paths = [os.path.join("in", "x.png"), os.path.join("in", "sub", "x.png")]
+    assert output_stems(paths, "in") == {paths[0]: "x", paths[1]: os.path.join("sub", "x")}
+
+
+def test_images_sharing_a_name_get_their_own_outputs(tmp_path, image_paths):
+    source_dir = tmp_path / "in"
+    (source_dir / "sub").mkdir(parents=True)
+    shutil.copy(image_paths[0], source_dir / "x.png")
+    shutil.copy(image_paths[0], source_dir / "sub" / "x.png")
+    Image.open(image_paths[-1]).convert("RGB").save(source_dir / "x.jpg")
+
+    assert batch.main([str(source_dir), "--out", str(tmp_path / "flat"), "--workers", "1"]) == 0
+    assert sorted(os.listdir(tmp_path / "flat")) == ["x.jpg.png", "x.jpg.txt", "x.png.png", "x.png.txt"]
+    assert (tmp_path / "flat" / "x.png.txt").read_text() != (tmp_path / "flat" / "x.jpg.txt").read_text()
+
+    pattern = os.path.join(str(source_dir), "**", "*.png")
+    assert batch.main([pattern, "--out", str(tmp_path / "recursive"), "--workers", "1"]) == 0
+    assert (tmp_path / "recursive" / "x.txt").exists() and (tmp_path / "recursive" / "sub" / "x.txt").exists()
+
+
+def test_outputs_that_would_still_collide_are_reported(tmp_path, image_paths):
+    source_dir = tmp_path / "in"
+    source_dir.mkdir()
+    for name in ("x.png", "x.jpg.png"):
+        shutil.copy(image_paths[0], source_dir / name)
+    Image.open(image_paths[0]).convert("RGB").save(source_dir / "x.jpg")
+
+    # 'x.jpg' keeps its extension, which is the name 'x.jpg.png' drops its own to.
+    assert batch.main([str(source_dir), "--out", str(tmp_path / "out"), "--workers", "1"]) == 1
+    assert sorted(os.listdir(tmp_path / "out")) == ["x.jpg.png", "x.jpg.txt", "x.png.png", "x.png.txt"]
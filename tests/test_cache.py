@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cache import DISK_EVICTION_HEADROOM, ConversionCache, file_digest
+
+
+def make_result(index: int) -> tuple[Image.Image, str]:
+    """
+    Builds a distinct (PNG image, console output) pair.
+    """
+    return Image.new("RGB", (3, 2), (index, 2 * index, 3 * index)), f"art {index}\nline"
+
+
+def cached_keys(cache_dir) -> set[str]:
+    """
+    Returns the keys of the complete entries of an on-disk tier.
+    """
+    return {name[:-len(".txt")] for name in os.listdir(cache_dir) if name.endswith(".txt")}
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = ConversionCache(max_entries=2)
+    cache.put("a", make_result(1))
+    cache.put("b", make_result(2))
+    assert cache.get("a") is not None
+    cache.put("c", make_result(3))
+    # "a" was used after "b", so "b" goes first.
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats() == {"hits": 3, "disk_hits": 0, "misses": 1, "evictions": 1, "entries": 2}
+
+
+def test_disk_tier_round_trips_results(tmp_path):
+    png_image, console_output = make_result(7)
+    ConversionCache(cache_dir=str(tmp_path)).put("key", (png_image, console_output))
+
+    # A new cache, e.g. in another process, finds the entry on disk.
+    cache = ConversionCache(cache_dir=str(tmp_path))
+    cached_image, cached_output = cache.get("key")
+    assert cached_output == console_output
+    assert np.array_equal(np.asarray(cached_image), np.asarray(png_image))
+    assert cache.get("key") is not None
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["hits"] == 1
+    assert cache.get("other") is None and cache.stats()["misses"] == 1
+
+
+def test_disk_tier_evicts_the_least_recently_used_entries(tmp_path):
+    cache = ConversionCache(max_entries=1, cache_dir=str(tmp_path), max_disk_entries=10)
+    for index in range(10):
+        cache.put(f"key{index}", make_result(index))
+        # Entries are ordered by modification time, which is only as fine as the file system allows.
+        os.utime(tmp_path / f"key{index}.txt", (index, index))
+    assert cached_keys(tmp_path) == {f"key{index}" for index in range(10)}
+
+    # Reading an entry back from disk makes it the most recently used.
+    assert cache.get("key0") is not None
+    cache.put("key10", make_result(10))
+    kept_count = int(10 * (1 - DISK_EVICTION_HEADROOM))
+    # Of the 11 entries, the oldest ones beyond kept_count go, starting from key1.
+    evicted_count = 11 - kept_count
+    assert cached_keys(tmp_path) == {"key0", "key10"} | {f"key{index}" for index in range(1 + evicted_count, 10)}
+    assert not any(name.endswith(".png") and name[:-4] not in cached_keys(tmp_path) for name in os.listdir(tmp_path))
+
+    # The next entries fit in the headroom without another eviction.
+    for index in range(11, 11 + 10 - kept_count):
+        cache.put(f"key{index}", make_result(index))
+    assert len(cached_keys(tmp_path)) == 10
+
+
+def test_existing_entries_count_towards_the_disk_bound(tmp_path):
+    for index in range(4):
+        ConversionCache(cache_dir=str(tmp_path)).put(f"key{index}", make_result(index))
+    cache = ConversionCache(cache_dir=str(tmp_path), max_disk_entries=4)
+    cache.put("key0", make_result(0))
+    assert len(cached_keys(tmp_path)) == 4
+    cache.put("key4", make_result(4))
+    assert len(cached_keys(tmp_path)) == int(4 * (1 - DISK_EVICTION_HEADROOM))
+
+
+@pytest.mark.parametrize("parameters", [
+    {"color": True},
+    {"ascii_width": 40},
+    {"cell_size": (8, 16)},
+    {"glyph_mode": "shape"},
+    {"dither": "bayer"},
+    {"resample": "area"},
+    {"cell_aspect": 2.0},
+])
+def test_keys_depend_on_every_parameter(parameters):
+    cache = ConversionCache()
+    default_key = cache.make_key("digest", False)
+    arguments = {"color": False, **parameters}
+    assert cache.make_key("digest", **arguments) != default_key
+    assert cache.make_key("digest", **arguments) == cache.make_key("digest", **arguments)
+    assert cache.make_key("other digest", **arguments) != cache.make_key("digest", **arguments)
+
+
+def test_file_digests_follow_the_content(tmp_path):
+    (tmp_path / "a").write_bytes(b"pixels")
+    (tmp_path / "b").write_bytes(b"pixels")
+    (tmp_path / "c").write_bytes(b"pixelz")
+    assert file_digest(str(tmp_path / "a")) == file_digest(str(tmp_path / "b"))
+    assert file_digest(str(tmp_path / "a")) != file_digest(str(tmp_path / "c"))
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from dithering import (BAYER_MATRIX, ERROR_DIFFUSION_KERNELS, MAX_VALUE, bayer_matrix, diffuse_errors,
+                       dither_levels, ordered_offsets)
+
+# The intensity step and level count of the intensity glyphs (see Ansii.compute_glyph_indices).
+STEP, LEVEL_COUNT = 25, 11
+
+
+def reference_diffusion(values: np.ndarray, quantize, kernel: tuple) -> np.ndarray:
+    """
+    Quantizes an image with error diffusion the textbook way: value by value, in raster order.
+    """
+    height, width, channels = values.shape
+    errors = [[[0.0] * channels for _ in range(width)] for _ in range(height)]
+    codes = np.zeros((height, width), dtype=np.int64)
+    for row in range(height):
+        for column in range(width):
+            wanted = [min(max(float(values[row, column, channel]) + errors[row][column][channel], 0), MAX_VALUE)
+                      for channel in range(channels)]
+            value_codes, quantized = quantize(np.array([wanted], dtype=np.float32))
+            codes[row, column] = value_codes[0]
+            for row_offset, column_offset, share in kernel:
+                target_row, target_column = row + row_offset, column + column_offset
+                if target_row < height and 0 <= target_column < width:
+                    for channel in range(channels):
+                        residual = wanted[channel] - float(quantized[0][channel])
+                        errors[target_row][target_column][channel] += residual * share
+    return codes
+
+
+def quantize_channels(wanted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rounds every channel to a multiple of 85, encoding the four levels of each channel in base 4.
+    """
+    levels = np.rint(wanted / 85).astype(np.int32)
+    return levels @ np.array([16, 4, 1]), levels * 85.0
+
+
+def level_quantizer(wanted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The quantizer dither_levels uses for the intensity glyphs.
+    """
+    level_values = (np.arange(LEVEL_COUNT) + 0.5) * STEP
+    level_values[0], level_values[-1] = 0, MAX_VALUE
+    levels = np.minimum(wanted // STEP, LEVEL_COUNT - 1).astype(np.int32)
+    return levels[..., 0], level_values[levels]
+
+
+@pytest.mark.parametrize("mode", list(ERROR_DIFFUSION_KERNELS))
+@pytest.mark.parametrize("shape", [(1, 1), (1, 9), (9, 1), (2, 3), (13, 31), (40, 7)])
+def test_diagonal_sweep_matches_a_serial_diffusion(mode, shape):
+    # Integer values and kernel shares that are powers of two keep every error exact,
+    # so both orders of summing the errors give the same codes.
+    rng = np.random.default_rng(sum(shape))
+    kernel = ERROR_DIFFUSION_KERNELS[mode]
+
+    intensities = rng.integers(0, 256, shape + (1,))
+    expected = reference_diffusion(intensities, level_quantizer, kernel)
+    assert np.array_equal(diffuse_errors(intensities, level_quantizer, kernel), expected)
+    assert np.array_equal(dither_levels(intensities[..., 0], STEP, LEVEL_COUNT, mode), expected)
+
+    colors = rng.integers(0, 256, shape + (3,))
+    expected = reference_diffusion(colors, quantize_channels, kernel)
+    assert np.array_equal(diffuse_errors(colors, quantize_channels, kernel), expected)
+
+
+@pytest.mark.parametrize("order", [0, 1, 2, 3, 4])
+def test_bayer_thresholds_are_evenly_spread(order):
+    matrix = bayer_matrix(order)
+    size = 2 ** order
+    assert matrix.shape == (size, size) and matrix.dtype == np.float32
+    expected = (np.arange(size * size) + 0.5) / (size * size) - 0.5
+    assert np.array_equal(np.sort(matrix, axis=None), expected.astype(np.float32))
+    if order > 0:
+        # Every 2x2 block holds one threshold of each quarter of the range.
+        quarters = np.floor((matrix + 0.5) * 4).astype(int)
+        for row in range(0, size, 2):
+            for column in range(0, size, 2):
+                assert sorted(quarters[row:row + 2, column:column + 2].ravel()) == [0, 1, 2, 3]
+
+
+def test_bayer_matrix_is_tiled_over_the_image():
+    assert np.array_equal(bayer_matrix(1), (np.array([[0, 2], [3, 1]]) + 0.5) / 4 - 0.5)
+    offsets = ordered_offsets((19, 21))
+    assert offsets.shape == (19, 21)
+    assert np.array_equal(offsets[8:16, 16:21], BAYER_MATRIX[:, :5])
+
+
+def test_no_dithering_divides_by_the_step():
+    intensities = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    levels = dither_levels(intensities, STEP, LEVEL_COUNT, "none")
+    assert levels.dtype == np.uint8
+    assert np.array_equal(levels, np.minimum(intensities // STEP, LEVEL_COUNT - 1))
+
+
+@pytest.mark.parametrize("intensity", range(0, 256, 5))
+def test_bayer_dithering_averages_to_the_intensity(intensity):
+    levels = dither_levels(np.full((16, 16), intensity, dtype=np.uint8), STEP, LEVEL_COUNT, "bayer")
+    level_values = (np.arange(LEVEL_COUNT) + 0.5) * STEP
+    level_values[0], level_values[-1] = 0, MAX_VALUE
+    # Only the two levels around the intensity are used, mixed in proportion to its position between them.
+    lower = min(np.searchsorted(level_values, intensity, side="right") - 1, LEVEL_COUNT - 2)
+    assert set(np.unique(levels)) <= {lower, lower + 1}
+    spacing = level_values[lower + 1] - level_values[lower]
+    assert abs(level_values[levels].mean() - intensity) <= spacing / BAYER_MATRIX.size
+
+
+@pytest.mark.parametrize("intensity", [0, 255])
+@pytest.mark.parametrize("mode", ["bayer", "floyd-steinberg", "atkinson"])
+def test_black_and_white_stay_flat(mode, intensity):
+    levels = dither_levels(np.full((9, 9), intensity, dtype=np.uint8), STEP, LEVEL_COUNT, mode)
+    assert np.all(levels == (0 if intensity == 0 else LEVEL_COUNT - 1))
+
+
+def test_unknown_modes_are_rejected():
+    with pytest.raises(ValueError, match="dither mode"):
+        dither_levels(np.zeros((2, 2), dtype=np.uint8), STEP, LEVEL_COUNT, "random")
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from glyph_atlas import GlyphAtlas
+from tiled_render import TiledRenderer
+
+# The default cell, the smallest the GUI offers and sizes whose glyphs spill over several cells.
+CELL_SIZES = [(12, 12), (4, 4), (6, 6), (8, 16), (5, 9), (7, 3), (32, 32)]
+
+
+def reference_pixels(character_set: tuple[str, ...], cell_size: tuple[int, int],
+                     glyph_indices: np.ndarray, color_matrix: np.ndarray = None) -> np.ndarray:
+    """
+    Renders a glyph grid with the reference renderer, drawing every character with ImageDraw.text.
+    """
+    ansii = Ansii.from_processed_image(Image.new("L", (1, 1)), color_matrix is not None)
+    ansii.cell_size = cell_size
+    characters = [[character_set[index] for index in row] for row in glyph_indices.tolist()]
+    colors = None if color_matrix is None else [[tuple(color) for color in row] for row in color_matrix.tolist()]
+    return np.asarray(ansii._create_png_from_ascii_reference(characters, colors))
+
+
+def random_grid(character_set: tuple[str, ...], shape: tuple[int, int], seed: int = 0):
+    """
+    Builds random glyph indices and colors for a grid of the given (rows, columns).
+    """
+    rng = np.random.default_rng(seed)
+    glyph_indices = rng.integers(0, len(character_set), shape)
+    color_matrix = rng.integers(0, 256, shape + (3,), dtype=np.uint8)
+    return glyph_indices, color_matrix
+
+
+@pytest.mark.parametrize("glyph_mode", ["intensity", "shape"])
+@pytest.mark.parametrize("cell_size", CELL_SIZES)
+@pytest.mark.parametrize("color", [False, True])
+def test_random_grids_match_the_reference(glyph_mode, cell_size, color):
+    character_set = Ansii.character_set_of(glyph_mode)
+    glyph_indices, color_matrix = random_grid(character_set, (9, 11))
+    color_matrix = color_matrix if color else None
+    rendered = np.asarray(GlyphAtlas(character_set, cell_size).render(glyph_indices, color_matrix))
+    assert np.array_equal(rendered, reference_pixels(character_set, cell_size, glyph_indices, color_matrix))
+
+
+@pytest.mark.parametrize("cell_size", CELL_SIZES)
+@pytest.mark.parametrize("color", [False, True])
+def test_bundled_image_matches_the_reference(image_paths, cell_size, color):
+    with Image.open(image_paths[-1]) as image:
+        ansii = Ansii(image, color, ascii_width=42, cell_size=cell_size)
+    glyph_indices = ansii.compute_glyph_indices()
+    color_matrix = ansii.compute_color_matrix() if color else None
+    rendered = np.asarray(ansii._create_png_from_ascii(glyph_indices, color_matrix))
+    assert np.array_equal(rendered, reference_pixels(ansii.character_set, cell_size, glyph_indices, color_matrix))
+
+
+@pytest.mark.parametrize("cell_size", [(4, 4), (12, 12)])
+def test_tiles_and_redraws_match_a_full_render(cell_size):
+    character_set = Ansii.character_set_of("intensity")
+    atlas = GlyphAtlas(character_set, cell_size)
+    glyph_indices, color_matrix = random_grid(character_set, (23, 37), seed=1)
+    expected = atlas.render_array(glyph_indices, color_matrix)
+
+    tiled = TiledRenderer(atlas, workers=2, tile_columns=5, band_rows=3).render(glyph_indices, color_matrix)
+    assert np.array_equal(np.asarray(tiled), expected)
+
+    new_indices, new_colors = random_grid(character_set, (23, 37), seed=2)
+    changed_cells = np.random.default_rng(3).random((23, 37)) < 0.05
+    glyph_indices = np.where(changed_cells, new_indices, glyph_indices)
+    color_matrix = np.where(changed_cells[..., np.newaxis], new_colors, color_matrix)
+    pixels = expected.copy()
+    atlas.redraw(pixels, glyph_indices, color_matrix, changed_cells)
+    assert np.array_equal(pixels, atlas.render_array(glyph_indices, color_matrix))
@@ -0,0 +1,35 @@
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from glyph_index import SHAPE_CHARACTER_SET, check_shape_cell_size, get_glyph_index
+from session import ConversionSession
+
+
+@pytest.mark.parametrize("cell_size", [(1, 1), (2, 2), (2, 12), (12, 2), (3, 3)])
+def test_cells_too_small_for_shape_glyphs_are_rejected(cell_size):
+    with pytest.raises(ValueError, match="too small for shape glyphs"):
+        check_shape_cell_size(cell_size)
+    with pytest.raises(ValueError, match="too small for shape glyphs"):
+        Ansii(Image.new("L", (64, 64)), glyph_mode="shape", cell_size=cell_size)
+    # Small cells remain valid for intensity glyphs.
+    Ansii(Image.new("L", (64, 64)), glyph_mode="intensity", cell_size=cell_size)
+
+
+def test_sessions_reject_cells_too_small_for_shape_glyphs():
+    session = ConversionSession(Image.new("L", (64, 64)), cell_size=(2, 2))
+    with pytest.raises(ValueError, match="too small for shape glyphs"):
+        session.update(glyph_mode="shape")
+    session.update(glyph_mode="shape", cell_size=(8, 8))
+    with pytest.raises(ValueError, match="too small for shape glyphs"):
+        session.update(cell_size=(2, 2))
+
+
+@pytest.mark.parametrize("cell_size", [(4, 4), (8, 12), (12, 12), (32, 32)])
+def test_shape_glyphs_match_within_the_character_set(cell_size):
+    check_shape_cell_size(cell_size)
+    glyph_index = get_glyph_index(SHAPE_CHARACTER_SET, cell_size)
+    image = Image.linear_gradient("L").resize((80, 60))
+    glyph_indices = glyph_index.match_image(image, 10, 6)
+    assert glyph_indices.shape == (6, 10)
+    assert glyph_indices.max() < len(SHAPE_CHARACTER_SET)
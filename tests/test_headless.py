@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from headless import convert
+
+from .conftest import SOURCE_DIR
+
+# Modules a headless conversion to text must never load.
+HEADLESS_FORBIDDEN_MODULES = ("tkinter", "PIL.ImageTk", "PIL.ImageDraw", "PIL.ImageFont", "window")
+
+
+def loaded_modules(*arguments: str) -> set[str]:
+    """
+    Runs a fresh interpreter in src/ with `-X importtime` and returns the names of the modules it imported.
+    """
+    result = subprocess.run([sys.executable, "-s", "-X", "importtime", *arguments], cwd=SOURCE_DIR, check=True,
+                            capture_output=True, text=True, timeout=120)
+    return {line.rsplit("|", 1)[1].strip() for line in result.stderr.splitlines()
+            if line.startswith("import time:") and "self [us]" not in line}
+
+
+def test_importing_the_headless_api_loads_no_gui_or_drawing_module():
+    modules = loaded_modules("-c", "import headless")
+    assert "headless" in modules
+    assert not modules.intersection(HEADLESS_FORBIDDEN_MODULES)
+
+
+@pytest.mark.parametrize("color", [False, True])
+def test_converting_to_text_loads_no_gui_or_drawing_module(image_paths, color):
+    arguments = ["main.py", "convert", image_paths[-1], "--text", os.devnull] + (["--color"] if color else [])
+    modules = loaded_modules(*arguments)
+    assert "ansii" in modules
+    assert not modules.intersection(HEADLESS_FORBIDDEN_MODULES)
+
+
+@pytest.mark.parametrize("cell_aspect", [0.5, 1.0, 2.0])
+@pytest.mark.parametrize("extension", [".bmp", ".npy"])
+def test_converting_a_mapped_file_resamples_it_once(tmp_path, image_paths, cell_aspect, extension):
+    with Image.open(image_paths[0]) as image:
+        image = image.convert("RGB")
+    path = str(tmp_path / ("image" + extension))
+    if extension == ".npy":
+        np.save(path, np.asarray(image))
+    else:
+        image.save(path)
+
+    art = convert(path, True, ascii_width=40, cell_aspect=cell_aspect)
+    expected = Ansii(image, True, ascii_width=40, cell_aspect=cell_aspect)
+    assert np.array_equal(art.glyph_indices, expected.compute_glyph_indices())
+    assert np.array_equal(art.color_matrix, expected.compute_color_matrix())
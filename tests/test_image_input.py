@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from image_input import map_image
+from resampling import RESAMPLE_FILTERS, resize_cells
+from streaming import StreamingAnsii
+
+CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+
+def save_random_npy(path, mode: str, size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """
+    Writes random pixels as a NumPy file, which map_image memory-maps, and returns them as an image.
+    """
+    width, height = size
+    shape = (height, width) if mode == "L" else (height, width, CHANNELS[mode])
+    pixels = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    np.save(path, pixels)
+    return Image.fromarray(pixels, mode)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+@pytest.mark.parametrize("resample", RESAMPLE_FILTERS)
+@pytest.mark.parametrize("size", [(40, 37), (77, 301), (31, 3000)])
+@pytest.mark.parametrize("band_rows", [1, 7, 256])
+def test_mapped_resize_matches_a_whole_image_resize(tmp_path, mode, resample, size, band_rows):
+    image = save_random_npy(tmp_path / "image.npy", mode, (301, 997))
+    resized = map_image(str(tmp_path / "image.npy")).resize(size, band_rows, resample)
+    assert np.array_equal(np.asarray(resized), np.asarray(resize_cells(image, size, resample)))
+
+
+@pytest.mark.parametrize("color", [False, True])
+@pytest.mark.parametrize("extension", [".npy", ".png"])
+def test_streaming_a_tall_image_matches_a_regular_conversion(tmp_path, color, extension):
+    image = save_random_npy(tmp_path / "image.npy", "RGB", (120, 4001), seed=1)
+    image.save(tmp_path / "image.png")
+    streaming_ansii = StreamingAnsii(str(tmp_path / ("image" + extension)), color, band_rows=3, source_band_rows=64,
+                                     ascii_width=40)
+    bands = list(streaming_ansii.iter_bands())
+
+    ansii = Ansii(image, color, ascii_width=40)
+    assert np.array_equal(np.concatenate([glyph_indices for glyph_indices, _ in bands]), ansii.compute_glyph_indices())
+    if color:
+        assert np.array_equal(np.concatenate([colors for _, colors in bands]), ansii.compute_color_matrix())
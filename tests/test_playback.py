@@ -0,0 +1,41 @@
+import os
+
+import pytest
+from PIL import Image
+
+from playback import AsciiPlayer, list_frame_paths
+from playback import main as playback_main
+
+
+@pytest.fixture
+def frame_directory(tmp_path) -> str:
+    """
+    A directory of three frames, with files that are not images mixed in.
+    """
+    for index in range(3):
+        Image.new("RGB", (16, 16), (index * 100, 0, 0)).save(tmp_path / f"frame{index}.png")
+    (tmp_path / "notes.txt").write_text("not a frame")
+    (tmp_path / "Thumbs.db").write_bytes(b"\0")
+    os.mkdir(tmp_path / "nested.png")
+    return str(tmp_path)
+
+
+def test_directories_and_globs_list_only_images(frame_directory):
+    expected = [os.path.join(frame_directory, f"frame{index}.png") for index in range(3)]
+    assert list_frame_paths(frame_directory) == expected
+    assert list_frame_paths(os.path.join(frame_directory, "*")) == expected
+    assert list_frame_paths(expected[0]) == []
+
+
+@pytest.mark.parametrize("pattern", ["", "*"])
+def test_playback_skips_files_that_are_not_images(frame_directory, pattern):
+    player = AsciiPlayer(os.path.join(frame_directory, pattern), fps=1000, workers=1, ascii_width=8)
+    player.play()
+    assert player.frames_shown + player.frames_dropped == 3
+
+
+def test_sources_without_images_are_reported(tmp_path, capsys):
+    (tmp_path / "notes.txt").write_text("not a frame")
+    assert playback_main([str(tmp_path)]) == 1
+    assert playback_main([str(tmp_path / "*")]) == 1
+    assert "No frames found" in capsys.readouterr().out
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from profiling import PIPELINE_STAGES, PROFILE_ENVIRONMENT_VARIABLE, StageTimer
+
+from .conftest import SOURCE_DIR
+
+
+def test_disabled_timers_record_nothing(image_paths):
+    stage_timer = StageTimer()
+    with stage_timer.measure("resize"):
+        pass
+    with Image.open(image_paths[0]) as image:
+        Ansii(image, True, stage_timer=stage_timer).render()
+    assert stage_timer.durations == {}
+    assert stage_timer.totals() == {}
+
+
+def test_enabled_timers_record_every_stage(image_paths):
+    stage_timer = StageTimer(enabled=True)
+    with Image.open(image_paths[0]) as image:
+        Ansii(image, True, stage_timer=stage_timer).render()
+    assert set(stage_timer.totals()) <= set(PIPELINE_STAGES)
+    assert {"resize", "glyph_mapping", "color_extraction", "png_rendering"} <= set(stage_timer.totals())
+    assert "Stage timings:" in stage_timer.report()
+    stage_timer.reset()
+    assert stage_timer.durations == {}
+
+
+def test_nested_stages_are_timed_separately():
+    stage_timer = StageTimer(enabled=True)
+    with stage_timer.measure("png_rendering"):
+        with stage_timer.measure("glyph_mapping"):
+            time.sleep(0.01)
+        with stage_timer.measure("glyph_mapping"):
+            pass
+    assert [len(stage_timer.durations[stage]) for stage in ("png_rendering", "glyph_mapping")] == [1, 2]
+    totals = stage_timer.totals()
+    # Reported in pipeline order, the outer stage including the time of the inner ones.
+    assert list(totals) == ["glyph_mapping", "png_rendering"]
+    assert totals["png_rendering"] >= totals["glyph_mapping"] >= 0.01
+
+
+def test_stages_timed_from_several_threads_all_accumulate():
+    stage_timer = StageTimer(enabled=True)
+    thread_count, run_count = 8, 500
+    barrier = threading.Barrier(thread_count)
+
+    def time_stages(index: int):
+        barrier.wait()
+        for _ in range(run_count):
+            with stage_timer.measure("resize"):
+                with stage_timer.measure(f"worker {index % 2}"):
+                    pass
+            stage_timer.record("console_output", 0.5)
+
+    threads = [threading.Thread(target=time_stages, args=(index,)) for index in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(stage_timer.durations["resize"]) == thread_count * run_count
+    assert len(stage_timer.durations["worker 0"]) == len(stage_timer.durations["worker 1"]) == thread_count * run_count // 2
+    assert stage_timer.totals()["console_output"] == thread_count * run_count * 0.5
+
+
+@pytest.mark.parametrize("value, enabled", [(None, False), ("", False), ("0", False), ("1", True), ("yes", True)])
+def test_environment_variable_enables_the_default_timer(value, enabled):
+    environment = {name: setting for name, setting in os.environ.items() if name != PROFILE_ENVIRONMENT_VARIABLE}
+    if value is not None:
+        environment[PROFILE_ENVIRONMENT_VARIABLE] = value
+    result = subprocess.run([sys.executable, "-c", "import profiling; print(profiling.default_stage_timer.enabled)"],
+                            cwd=SOURCE_DIR, env=environment, check=True, capture_output=True, text=True, timeout=120)
+    assert result.stdout.strip() == str(enabled)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from pyramid import build_ascii_pyramid
+
+
+@pytest.fixture
+def image(image_paths) -> Image.Image:
+    # 640x512 splits into 140x112 and then exactly into 70x56, but 30 columns are not a whole
+    # fraction of 70, so the last level takes the resize fallback.
+    with Image.open(image_paths[0]) as source:
+        return source.convert("RGB").resize((640, 512))
+
+
+def assert_same_conversion(level: Ansii, expected: Ansii):
+    """
+    Checks that two Ansii objects convert and render identically.
+    """
+    assert np.array_equal(np.asarray(level.processed_image), np.asarray(expected.processed_image))
+    assert np.array_equal(level.compute_glyph_indices(), expected.compute_glyph_indices())
+    png_image, console_output = level.render()
+    expected_png, expected_console = expected.render()
+    assert np.array_equal(np.asarray(png_image), np.asarray(expected_png))
+    assert console_output == expected_console
+
+
+@pytest.mark.parametrize("color", [False, True])
+def test_levels_match_a_direct_conversion_of_the_level_above(image, color):
+    levels = build_ascii_pyramid(image, (30, 70, 140), color, "256", (6, 8))
+    assert sorted(levels) == [30, 70, 140]
+    assert [level.processed_image.size for _, level in sorted(levels.items())] == [(30, 24), (70, 56), (140, 112)]
+
+    # The largest level is resized from the source.
+    assert_same_conversion(levels[140], Ansii(image, color, "256", ascii_width=140, cell_size=(6, 8)))
+    # 140 to 70 columns is an exact reduction, the average of every 2x2 block.
+    assert_same_conversion(levels[70], Ansii(levels[140].processed_image, color, "256", ascii_width=70,
+                                             cell_size=(6, 8), resample="area"))
+    # 70 to 30 columns is not: that level is resized as a direct conversion would.
+    assert_same_conversion(levels[30], Ansii(levels[70].processed_image, color, "256", ascii_width=30,
+                                             cell_size=(6, 8)))
+
+
+@pytest.mark.parametrize("width", [30, 70])
+def test_reduced_levels_stay_close_to_a_conversion_of_the_source(image, width):
+    levels = build_ascii_pyramid(image, (30, 70, 140))
+    direct_indices = Ansii(image, ascii_width=width).compute_glyph_indices().astype(int)
+    level_indices = levels[width].compute_glyph_indices().astype(int)
+    assert level_indices.shape == direct_indices.shape
+    # Averaging the level above blurs a little more than resizing the source at once.
+    assert np.abs(level_indices - direct_indices).mean() < 0.05
+
+
+def test_palette_images_are_averaged(image):
+    levels = build_ascii_pyramid(image.quantize(16), (35, 70))
+    assert levels[35].processed_image.mode == "RGB"
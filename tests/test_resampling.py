@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from resampling import (AVERAGING_MODES, RESAMPLE_FILTERS, area_resize, ascii_output_height, check_resampling,
+                        integral_factors, resize_cells)
+
+
+def random_image(mode: str, size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """
+    Builds an image of random pixels.
+    """
+    width, height = size
+    channels = {"L": (), "RGB": (3,), "RGBA": (4,)}[mode]
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width) + channels, dtype=np.uint8)
+    return Image.fromarray(pixels, mode)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+@pytest.mark.parametrize("factors", [(1, 1), (2, 2), (3, 1), (1, 4), (5, 7)])
+def test_area_filter_matches_reduce_on_integral_factors(mode, factors):
+    image = random_image(mode, (35 * factors[0], 21 * factors[1]))
+    assert integral_factors(image.size, (35, 21)) == factors
+    resized = area_resize(image, (35, 21))
+    assert np.array_equal(np.asarray(resized), np.asarray(image.reduce(factors)))
+    if mode != "RGBA":
+        # The average of every block, up to the rounding of Pillow's fixed-point arithmetic.
+        # (RGBA colors are averaged premultiplied by their 8-bit alpha, which loses more.)
+        blocks = np.asarray(image, dtype=np.float64).reshape(21, factors[1], 35, factors[0], -1)
+        averages = np.floor(blocks.mean(axis=(1, 3)) + 0.5).reshape(np.asarray(resized).shape)
+        assert np.abs(np.asarray(resized) - averages).max() <= 1
+
+
+@pytest.mark.parametrize("size", [(34, 21), (35, 20), (60, 50)])
+def test_area_filter_uses_a_box_filter_on_other_scales(size):
+    image = random_image("RGB", (70, 42))
+    assert integral_factors(image.size, size) is None
+    resized = area_resize(image, size)
+    assert np.array_equal(np.asarray(resized), np.asarray(image.resize(size, Image.Resampling.BOX)))
+
+
+@pytest.mark.parametrize("mode", ["P", "1"])
+def test_area_filter_averages_converted_modes(mode):
+    image = random_image("RGB", (20, 20)).convert(mode)
+    resized = area_resize(image, (10, 10))
+    assert resized.mode == AVERAGING_MODES[mode]
+    assert np.array_equal(np.asarray(resized), np.asarray(image.convert(AVERAGING_MODES[mode]).reduce(2)))
+
+
+@pytest.mark.parametrize("source_size, ascii_width, cell_aspect, rows", [
+    ((100, 50), 50, 1.0, 25),
+    ((100, 50), 50, 2.0, 12),
+    ((100, 50), 50, 0.5, 50),
+    ((100, 1), 50, 2.0, 1),
+    # An image already at the grid size keeps all its rows.
+    ((37, 74), 37, 1.0, 74),
+    ((49, 147), 49, 3.0, 49),
+])
+def test_output_height_honours_the_cell_aspect(source_size, ascii_width, cell_aspect, rows):
+    assert ascii_output_height(source_size, ascii_width, cell_aspect) == rows
+
+
+@pytest.mark.parametrize("resample", RESAMPLE_FILTERS)
+@pytest.mark.parametrize("cell_aspect", [0.5, 1.0, 2.0])
+def test_conversions_resample_to_the_grid(resample, cell_aspect):
+    image = random_image("RGB", (120, 90))
+    ansii = Ansii(image, ascii_width=40, resample=resample, cell_aspect=cell_aspect)
+    size = (40, ascii_output_height(image.size, 40, cell_aspect))
+    assert ansii.processed_image.size == size
+    assert np.array_equal(np.asarray(ansii.processed_image), np.asarray(resize_cells(image, size, resample)))
+
+
+def test_unknown_filters_and_aspects_are_rejected():
+    for resample in RESAMPLE_FILTERS:
+        check_resampling(resample, 2.0)
+    with pytest.raises(ValueError, match="resampling filter 'box'"):
+        check_resampling("box", 1.0)
+    for cell_aspect in (0, -1.0, float("nan")):
+        with pytest.raises(ValueError, match="aspect ratio"):
+            check_resampling("area", cell_aspect)
+    with pytest.raises(ValueError, match="resampling filter"):
+        Ansii(random_image("RGB", (8, 8)), resample="hamming")
@@ -0,0 +1,192 @@
+import asyncio
+import http.client
+import io
+import json
+import os
+import re
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from PIL import Image
+
+import server
+from server import ConversionServer, RequestError, _convert_upload
+
+from .conftest import SOURCE_DIR
+
+
+def png_bytes(size: tuple[int, int] = (64, 48)) -> bytes:
+    """
+    Encodes a small gradient as PNG.
+    """
+    image = Image.linear_gradient("L").resize(size)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def decompression_bomb_bytes() -> bytes:
+    """
+    Builds a PNG whose header claims far more pixels than Pillow accepts to decode.
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 20000, 20000, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"\0")) + chunk(b"IEND", b"")
+
+
+async def post(port: int, target: str, body: bytes) -> tuple[int, bytes]:
+    """
+    Sends one request to a local server and returns the response status and body.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), response_body
+
+
+def request(port: int, method: str, target: str, body: bytes = None) -> tuple[int, bytes]:
+    """
+    Sends one request to a server running in another process and returns the response status and body.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request(method, target, body)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def server_port():
+    """
+    Runs the server in its own process, as `main.py serve` does. Worker processes forked from
+    the process of the test client would inherit its sockets, and keep connections open.
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(SOURCE_DIR, "main.py"), "serve", "--port", "0",
+                                "--workers", "1"], stdout=subprocess.PIPE, text=True)
+    try:
+        banner = process.stdout.readline()
+        yield int(re.search(r":(\d+) ", banner).group(1))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def serve_requests(requests: list[tuple[str, bytes]], patch) -> tuple[list[tuple[int, bytes]], dict]:
+    """
+    Starts a server in this process, sends the requests one after the other and stops it.
+
+    Args:
+        requests (list[tuple[str, bytes]]): The (target, body) of every request.
+        patch (callable): A function applied to the server before it starts, which must keep
+                          the requests from reaching the worker pool (see server_port).
+
+    Returns:
+        tuple[list[tuple[int, bytes]], dict]: The (status, body) of every response, and the server statistics.
+    """
+    conversion_server = ConversionServer(port=0, workers=1)
+    patch(conversion_server)
+
+    async def run():
+        await conversion_server.start()
+        try:
+            return [await post(conversion_server.port, target, body) for target, body in requests]
+        finally:
+            await conversion_server.close()
+
+    return asyncio.run(run()), conversion_server.stats
+
+
+def test_conversion_errors_inside_the_worker_are_returned():
+    body, error, status = _convert_upload(png_bytes(), "text", False, "truecolor", 80, (2, 2), "shape")
+    assert body is None and status == HTTPStatus.BAD_REQUEST
+    assert "Cannot convert the image" in error
+
+
+def test_decompression_bombs_are_rejected():
+    body, error, status = _convert_upload(decompression_bomb_bytes(), "text", False, "truecolor", 80, (8, 8),
+                                          "intensity")
+    assert body is None and status == HTTPStatus.BAD_REQUEST
+    assert "Cannot decode the image" in error
+
+
+def test_every_request_gets_a_status(server_port):
+    _, health = request(server_port, "GET", "/health")
+    errors_before = json.loads(health)["errors"]
+    responses = [request(server_port, "POST", target, body) for target, body in [
+        ("/convert?format=text&width=20", png_bytes()),
+        ("/convert?glyphs=shape&cell=2x2", png_bytes()),
+        ("/convert", decompression_bomb_bytes()),
+        ("/convert", b"not an image"),
+    ]]
+    assert [status for status, _ in responses] == [200, 400, 400, 400]
+    assert len(responses[0][1].splitlines()) > 1
+    # Invalid parameters are refused before converting; only failed conversions count as errors.
+    _, health = request(server_port, "GET", "/health")
+    assert json.loads(health)["errors"] - errors_before == 2
+
+
+def test_unexpected_errors_answer_500():
+    async def failing_convert(image_bytes, parameters):
+        raise RuntimeError("the worker pool is broken")
+
+    def patch(conversion_server):
+        conversion_server._convert = failing_convert
+
+    responses, stats = serve_requests([("/convert", png_bytes()), ("/convert", png_bytes())], patch)
+    # The server answers every request, and keeps serving after the failure.
+    assert [status for status, _ in responses] == [500, 500]
+    assert b"the worker pool is broken" in responses[0][1]
+    assert stats["errors"] == 2
+
+
+def test_cells_too_small_for_shape_glyphs_are_rejected_before_converting(server_port):
+    status, body = request(server_port, "POST", "/convert?glyphs=shape&cell=2x2", png_bytes())
+    assert status == 400
+    assert b"too small for shape glyphs" in body
+
+
+@pytest.mark.parametrize("failure", ["error", "exception"])
+def test_failed_coalesced_conversions_count_as_one_error(monkeypatch, failure):
+    release = threading.Event()
+
+    def failing_upload(image_bytes, *parameters):
+        release.wait(30)
+        if failure == "exception":
+            raise RuntimeError("the worker pool is broken")
+        return None, "Conversion failed: RuntimeError: boom", HTTPStatus.INTERNAL_SERVER_ERROR
+
+    # Threads instead of worker processes, so that the patched conversion is the one that runs.
+    monkeypatch.setattr(server, "_convert_upload", failing_upload)
+    conversion_server = ConversionServer(port=0, workers=1)
+    conversion_server._executor = ThreadPoolExecutor(1)
+
+    async def run():
+        parameters = ("text", False, "truecolor", 20, (8, 8), "intensity")
+        requests = [asyncio.create_task(conversion_server._convert(b"image", parameters)) for _ in range(3)]
+        # Let every request find the conversion in flight before it finishes.
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        conversion_server._executor.shutdown()
+    assert all(isinstance(result, RequestError) and result.status == HTTPStatus.INTERNAL_SERVER_ERROR
+               for result in results)
+    assert conversion_server.stats["conversions"] == 1 and conversion_server.stats["coalesced"] == 2
+    assert conversion_server.stats["errors"] == 1
+    assert conversion_server._in_flight == {}
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from session import PARAMETER_STAGES, ConversionSession
+
+
+@pytest.fixture
+def image(image_paths) -> Image.Image:
+    with Image.open(image_paths[0]) as source:
+        return source.convert("RGB")
+
+
+def assert_matches_fresh_render(session: ConversionSession, image: Image.Image):
+    """
+    Checks a session's render against a new Ansii conversion with the same parameters.
+    """
+    png_image, console_output = session.render()
+    ansii = Ansii(image, session.color, session.palette, session.ascii_width, session.cell_size,
+                  glyph_mode=session.glyph_mode, dither=session.dither, resample=session.resample,
+                  cell_aspect=session.cell_aspect)
+    expected_png, expected_console = ansii.render()
+    assert np.array_equal(np.asarray(png_image), np.asarray(expected_png))
+    assert console_output == expected_console
+
+
+def test_every_parameter_invalidates_some_stage():
+    session_parameters = set(ConversionSession.__init__.__code__.co_varnames) - {"self", "stage_timer"}
+    assert set(PARAMETER_STAGES) == session_parameters
+
+
+@pytest.mark.parametrize("parameters, expected_stages", [
+    ({}, []),
+    ({"palette": "256"}, ["console"]),
+    ({"color": True}, ["colors", "png", "console"]),
+    ({"cell_size": (8, 16)}, ["png"]),
+    ({"dither": "bayer"}, ["glyphs", "png", "lines", "console"]),
+    ({"glyph_mode": "shape"}, ["glyphs", "png", "lines", "console"]),
+    ({"ascii_width": 40}, ["resize", "glyphs", "png", "lines", "console"]),
+    ({"resample": "area"}, ["resize", "glyphs", "png", "lines", "console"]),
+    ({"cell_aspect": 2.0}, ["resize", "glyphs", "png", "lines", "console"]),
+])
+def test_changing_a_parameter_recomputes_only_its_stages(image, parameters, expected_stages):
+    session = ConversionSession(image)
+    session.render()
+    session.render(**parameters)
+    assert session.computed_stages == expected_stages
+    assert_matches_fresh_render(session, image)
+
+
+def test_cell_size_recomputes_shape_glyphs(image):
+    session = ConversionSession(image, glyph_mode="shape")
+    session.render()
+    session.render(cell_size=(8, 16))
+    assert session.computed_stages == ["glyphs", "png", "lines", "console"]
+
+
+@pytest.mark.parametrize("color", [False, True])
+@pytest.mark.parametrize("dither", ["bayer", "floyd-steinberg", "atkinson"])
+def test_dither_changes_patch_the_png(image, color, dither):
+    session = ConversionSession(image, color=color, palette="256")
+    session.render()
+    session.render(dither=dither)
+    glyph_count = session._stages["glyphs"].size
+    # Dithering moves only some cells, so the previous PNG is patched rather than rendered again.
+    assert 0 < session.redrawn_cells < glyph_count
+    assert_matches_fresh_render(session, image)
+
+    session.render(dither="none")
+    assert session.redrawn_cells < glyph_count
+    assert_matches_fresh_render(session, image)
+
+
+def test_unchanged_glyphs_redraw_nothing(image):
+    # Shape matching is never dithered: the new glyph grid is the same as the previous one.
+    session = ConversionSession(image, glyph_mode="shape")
+    session.render()
+    session.render(dither="bayer")
+    assert "glyphs" in session.computed_stages
+    assert session.redrawn_cells == 0
+
+
+def test_other_glyph_sets_are_rendered_again(image):
+    session = ConversionSession(image)
+    session.render()
+    session.render(glyph_mode="shape")
+    assert session.redrawn_cells == session._stages["glyphs"].size
+    assert_matches_fresh_render(session, image)
+
+
+def test_unknown_parameters_and_modes_are_rejected(image):
+    session = ConversionSession(image)
+    with pytest.raises(TypeError):
+        session.update(brightness=2)
+    with pytest.raises(ValueError, match="dither"):
+        session.update(dither="random")
+    with pytest.raises(ValueError, match="dither"):
+        ConversionSession(image, dither="random")
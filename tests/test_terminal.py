@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ansii import Ansii
+from dithering import DITHER_MODES
+from terminal import PALETTES, RESET, TerminalEncoder, palette_colors, quantize_colors
+
+
+def reference_lines(encoder: TerminalEncoder, ascii_lines: list[str], color_matrix: np.ndarray) -> list[str]:
+    """
+    Formats lines character by character, with an escape wherever the color code changes.
+    """
+    codes = encoder.quantize(color_matrix).tolist()
+    formatted_lines = []
+    for line, line_codes in zip(ascii_lines, codes):
+        pieces = []
+        for column, character in enumerate(line):
+            if column == 0 or line_codes[column] != line_codes[column - 1]:
+                pieces.append(encoder._escape(line_codes[column]))
+            pieces.append(character)
+        formatted_lines.append("".join(pieces) + RESET)
+    return formatted_lines
+
+
+def test_runs_of_equal_colors_share_one_escape():
+    color_matrix = np.array([[(255, 0, 0)] * 3 + [(0, 0, 255)] * 2 + [(255, 0, 0)],
+                             [(1, 2, 3)] * 6], dtype=np.uint8)
+    lines = TerminalEncoder().format_lines(["abcdef", "ghijkl"], color_matrix)
+    assert lines == ["\x1b[38;2;255;0;0mabc\x1b[38;2;0;0;255mde\x1b[38;2;255;0;0mf" + RESET,
+                     "\x1b[38;2;1;2;3mghijkl" + RESET]
+
+
+def test_lines_without_colors_are_unchanged():
+    assert TerminalEncoder("16").format_lines(["ab", "cd"]) == ["ab", "cd"]
+
+
+@pytest.mark.parametrize("palette, color, code, escape", [
+    ("truecolor", (18, 52, 86), 0x123456, "\x1b[38;2;18;52;86m"),
+    ("256", (0, 0, 0), 16, "\x1b[38;5;16m"),
+    ("256", (255, 255, 255), 231, "\x1b[38;5;231m"),
+    ("256", (255, 0, 0), 196, "\x1b[38;5;196m"),
+    ("256", (95, 135, 175), 67, "\x1b[38;5;67m"),
+    # Grays between the cube levels go to the gray ramp.
+    ("256", (128, 128, 128), 244, "\x1b[38;5;244m"),
+    ("256", (50, 52, 48), 236, "\x1b[38;5;236m"),
+    ("16", (0, 0, 0), 0, "\x1b[30m"),
+    ("16", (200, 10, 0), 1, "\x1b[31m"),
+    ("16", (130, 125, 127), 8, "\x1b[90m"),
+    ("16", (255, 10, 0), 9, "\x1b[91m"),
+    ("16", (250, 250, 250), 15, "\x1b[97m"),
+])
+def test_colors_map_to_the_expected_codes(palette, color, code, escape):
+    assert quantize_colors(np.array([[color]], dtype=np.uint8), palette).tolist() == [[code]]
+    lines = TerminalEncoder(palette).format_lines(["#"], np.array([[color]], dtype=np.uint8))
+    assert lines == [escape + "#" + RESET]
+
+
+@pytest.mark.parametrize("palette, first_code", [("256", 16), ("16", 0)])
+def test_palette_colors_map_to_their_own_code(palette, first_code):
+    # The 256-color quantization only uses the cube and the gray ramp, not the 16 standard colors.
+    colors = palette_colors(palette)[first_code:]
+    codes = quantize_colors(colors.astype(np.uint8), palette)
+    assert np.array_equal(codes, np.arange(first_code, first_code + len(colors)))
+
+
+@pytest.mark.parametrize("palette", PALETTES)
+@pytest.mark.parametrize("dither", DITHER_MODES)
+def test_encoded_output_matches_the_console_lines(image_paths, palette, dither):
+    with Image.open(image_paths[-1]) as image:
+        ansii = Ansii(image, True, palette, ascii_width=48, dither=dither)
+    art = ansii.to_art()
+    ascii_lines, color_matrix = art.lines(), art.color_matrix
+
+    encoder = TerminalEncoder(palette, dither)
+    console_lines = ansii.format_console_lines(ascii_lines, color_matrix)
+    assert console_lines == reference_lines(encoder, ascii_lines, color_matrix)
+    assert encoder.encode(ascii_lines, color_matrix) == ("\n".join(console_lines) + "\n").encode("utf-8")
+    assert ansii.render()[1] == "\n".join(console_lines)
+
+
+def test_unknown_palettes_and_modes_are_rejected():
+    with pytest.raises(ValueError, match="palette"):
+        TerminalEncoder("8")
+    with pytest.raises(ValueError, match="dither mode"):
+        TerminalEncoder("256", "random")
+    with pytest.raises(ValueError, match="palette"):
+        quantize_colors(np.zeros((1, 1, 3), dtype=np.uint8), "8")
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+
+from PIL import Image
+
+from watch import MANIFEST_NAME, FolderWatcher
+
+
+def run_watcher(source_dir, output_dir) -> FolderWatcher:
+    """
+    Runs a watcher over the images present, polling, with one worker.
+    """
+    watcher = FolderWatcher(str(source_dir), str(output_dir), workers=1, settle_seconds=0, use_inotify=False)
+    watcher.run(once=True)
+    return watcher
+
+
+def manifest_stems(output_dir) -> dict:
+    with open(output_dir / MANIFEST_NAME, encoding="utf-8") as manifest_file:
+        return {name: record.get("stem") for name, record in json.load(manifest_file)["files"].items()}
+
+
+def test_images_sharing_a_name_get_their_own_outputs(tmp_path, image_paths):
+    source_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    source_dir.mkdir()
+    shutil.copy(image_paths[0], source_dir / "x.png")
+    Image.open(image_paths[-1]).convert("RGB").save(source_dir / "x.jpg")
+
+    assert run_watcher(source_dir, output_dir).stats["converted"] == 2
+    assert manifest_stems(output_dir) == {"x.png": "x.png", "x.jpg": "x.jpg"}
+    assert (output_dir / "x.png.txt").read_text() != (output_dir / "x.jpg.txt").read_text()
+    # A restart resumes from the manifest.
+    assert run_watcher(source_dir, output_dir).stats["converted"] == 0
+
+
+def test_a_new_image_never_resumes_with_the_outputs_of_another(tmp_path, image_paths):
+    source_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    source_dir.mkdir()
+    shutil.copy(image_paths[0], source_dir / "x.png")
+    run_watcher(source_dir, output_dir)
+    x_text = (output_dir / "x.txt").read_text()
+
+    Image.open(image_paths[-1]).convert("RGB").save(source_dir / "x.jpg")
+    watcher = run_watcher(source_dir, output_dir)
+    assert watcher.stats["converted"] == 1 and watcher.stats["skipped"] == 0
+    # The image converted first keeps its outputs; the new one gets its own.
+    assert manifest_stems(output_dir) == {"x.png": "x", "x.jpg": "x.jpg"}
+    assert (output_dir / "x.txt").read_text() == x_text
+    assert (output_dir / "x.jpg.txt").read_text() != x_text
+
+
+def test_copies_of_converted_content_get_a_copy_of_the_outputs(tmp_path, image_paths):
+    source_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    source_dir.mkdir()
+    shutil.copy(image_paths[0], source_dir / "a.png")
+    shutil.copy(image_paths[0], source_dir / "b.png")
+
+    watcher = run_watcher(source_dir, output_dir)
+    assert (watcher.stats["converted"], watcher.stats["copied"]) == (1, 1)
+    assert (output_dir / "a.txt").read_text() == (output_dir / "b.txt").read_text()
+
+
+def test_outputs_that_would_collide_are_reported(tmp_path, image_paths):
+    source_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    source_dir.mkdir()
+    for name in ("x.png", "x.jpg.png"):
+        shutil.copy(image_paths[0], source_dir / name)
+    Image.open(image_paths[-1]).convert("RGB").save(source_dir / "x.jpg")
+
+    watcher = run_watcher(source_dir, output_dir)
+    assert watcher.stats["failed"] == 1
+    assert "would overwrite" in watcher.recent_failures[0]["error"]
+    stems = [stem for stem in manifest_stems(output_dir).values() if stem is not None]
+    assert len(stems) == len(set(stems)) == 2